@@ -9,4 +9,80 @@ class DevEnv:
         self.VERSION=os.getenv('VERSION','default-v1')
         self.SECRET_KEY=os.getenv('SECRET_KEY','default-secret')
 
-settings = DevEnv()
\ No newline at end of file
+        # Background job subsystem for large returns calculations
+        self.JOB_WORKERS=int(os.getenv('JOB_WORKERS', str(os.cpu_count() or 2)))
+        self.JOB_QUEUE_SIZE=int(os.getenv('JOB_QUEUE_SIZE', '100'))
+        self.JOB_MAX_PER_USER=int(os.getenv('JOB_MAX_PER_USER', '2'))
+        self.JOB_RESULT_TTL_SECONDS=int(os.getenv('JOB_RESULT_TTL_SECONDS', '3600'))
+
+        # Execution policy for CPU-bound engine work ('thread' or 'process' pool)
+        self.EXECUTION_INLINE_THRESHOLD=int(os.getenv('EXECUTION_INLINE_THRESHOLD', '1000'))
+        self.EXECUTION_POOL=os.getenv('EXECUTION_POOL', 'thread')
+        self.EXECUTION_WORKERS=int(os.getenv('EXECUTION_WORKERS', str(os.cpu_count() or 2)))
+
+        # Bulk returns endpoint for employer/partner integrations
+        self.BATCH_WORKERS=int(os.getenv('BATCH_WORKERS', str(os.cpu_count() or 2)))
+        self.BATCH_CHUNK_SIZE=int(os.getenv('BATCH_CHUNK_SIZE', '50'))
+        self.BATCH_MAX_ITEMS=int(os.getenv('BATCH_MAX_ITEMS', '50000'))
+
+        # History export; admins may export the history of all users
+        self.EXPORT_CHUNK_SIZE=int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+        self.ADMIN_EMAILS=[
+            email.strip() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()
+        ]
+
+        # How long stored Idempotency-Key responses are replayed
+        self.IDEMPOTENCY_TTL_SECONDS=int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+
+        # Admission control for the calculation routes
+        self.ADMISSION_USER_BURST=float(os.getenv('ADMISSION_USER_BURST', '100'))
+        self.ADMISSION_USER_REFILL_PER_SECOND=float(os.getenv('ADMISSION_USER_REFILL_PER_SECOND', '10'))
+        self.ADMISSION_ROWS_PER_TOKEN=int(os.getenv('ADMISSION_ROWS_PER_TOKEN', '1000'))
+        self.ADMISSION_MAX_CONCURRENCY=int(os.getenv('ADMISSION_MAX_CONCURRENCY', str(2 * (os.cpu_count() or 2))))
+        self.ADMISSION_LATENCY_BUDGET_MS=int(os.getenv('ADMISSION_LATENCY_BUDGET_MS', '2000'))
+
+        # Startup warm-up before the readiness endpoint reports ready. Warm
+        # connections beyond DB_POOL_SIZE are overflow and closed again right away.
+        self.DB_POOL_SIZE=int(os.getenv('DB_POOL_SIZE', '5'))
+        self.DB_WARMUP_CONNECTIONS=int(os.getenv('DB_WARMUP_CONNECTIONS', '2'))
+        self.WARMUP_RETRY_SECONDS=float(os.getenv('WARMUP_RETRY_SECONDS', '5'))
+
+        # Monthly partitions of calculation_history. A retention of 0 months keeps
+        # every partition; old partitions are either dropped or detached ('archive').
+        self.HISTORY_PARTITIONS_AHEAD=int(os.getenv('HISTORY_PARTITIONS_AHEAD', '3'))
+        self.HISTORY_RETENTION_MONTHS=int(os.getenv('HISTORY_RETENTION_MONTHS', '0'))
+        self.HISTORY_RETENTION_MODE=os.getenv('HISTORY_RETENTION_MODE', 'archive')
+        self.PARTITION_MAINTENANCE_INTERVAL_SECONDS=int(os.getenv('PARTITION_MAINTENANCE_INTERVAL_SECONDS', '21600'))
+
+        # Optional read replica for read-only queries; unset means everything uses DATABASE_URL
+        self.DATABASE_READ_URL=os.getenv('DATABASE_READ_URL') or None
+        self.READ_REPLICA_RETRY_SECONDS=float(os.getenv('READ_REPLICA_RETRY_SECONDS', '30'))
+
+        # Opt-in request profiling: requests sending X-Profile: <PROFILING_TOKEN> are
+        # always profiled, matching paths are sampled at PROFILING_SAMPLE_RATE
+        self.PROFILING_TOKEN=os.getenv('PROFILING_TOKEN') or None
+        self.PROFILING_SAMPLE_RATE=float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+        self.PROFILING_PATH_PATTERN=os.getenv('PROFILING_PATH_PATTERN', r'/(returns|transactions):')
+        self.PROFILING_DIR=os.getenv('PROFILING_DIR', '/tmp/retiresaveup-profiles')
+        self.PROFILING_MAX_FILES=int(os.getenv('PROFILING_MAX_FILES', '50'))
+
+        # Largest wage vector accepted by /tax:batch
+        self.TAX_BATCH_MAX_ROWS=int(os.getenv('TAX_BATCH_MAX_ROWS', '1000000'))
+
+        # Rule checks (rows x (1 + q, p and k periods)) the streaming (SSE) engine runs
+        # between two progress events, which bounds how long one slice holds the event loop
+        self.STREAM_CHUNK_SIZE=int(os.getenv('STREAM_CHUNK_SIZE', '5000'))
+
+        # Request body guard, enforced while the body streams in. REQUEST_ROUTE_LIMITS
+        # overrides the defaults per route as "route=bytes:rows,..." (rows 0 = no limit).
+        # A validated input takes about 6x its JSON size, so 64MB costs roughly 400MB
+        self.REQUEST_MAX_BODY_BYTES=int(os.getenv('REQUEST_MAX_BODY_BYTES', str(32 * 1024 * 1024)))
+        self.REQUEST_MAX_ROWS=int(os.getenv('REQUEST_MAX_ROWS', '200000'))
+        self.REQUEST_ROUTE_LIMITS=os.getenv(
+            'REQUEST_ROUTE_LIMITS',
+            'returns:nps:batch=67108864:500000,returns:index:batch=67108864:500000,'
+            'jobs/returns:nps=67108864:500000,jobs/returns:index=67108864:500000,'
+            'tax:batch=67108864:0'
+        )
+
+settings = DevEnv()
@@ -1,20 +1,67 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from src.services.startupProfile import startup_profile, FirstRequestMiddleware
+
+from contextlib import asynccontextmanager
+import asyncio
 import os
 
+with startup_profile.phase("import:framework"):
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.middleware.cors import CORSMiddleware
+
 from config import settings
-from src.routes.AuthRouter import router as user_router
-from src.routes.PerformanceRouter import router as ps_router
-from src.routes.RetireSaveUp import router as retriveSaveUp_router
+
+with startup_profile.phase("import:routers"):
+    from src.routes.AuthRouter import router as user_router
+    from src.routes.PerformanceRouter import router as ps_router
+    from src.routes.RetireSaveUp import router as retriveSaveUp_router
+    from src.routes.JobRouter import router as job_router
+    from src.routes.HealthRouter import router as health_router
+    from src.services.jobServices import job_manager
+    from src.services.executionPolicy import execution_policy
+    from src.services.batchServices import batch_runner
+    from src.services.warmup import warm_up
+    from src.services.requestProfiler import ProfilingMiddleware, request_profiler
+    from src.services.stageTimer import StageTimingMiddleware
+    from src.services.memoryProfiler import MemoryTracingMiddleware
+    from src.services.requestLimits import RequestLimitMiddleware
+    from src.services.partitionServices import run_partition_maintenance
+    from src.connection.session import engine
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: liveness answers right away, readiness once warm
+    warm_up_task = asyncio.create_task(warm_up())
+    # Keep calculation_history partitions created ahead of time and apply retention
+    partition_task = asyncio.create_task(
+        run_partition_maintenance(engine, settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+    )
+    yield
+    warm_up_task.cancel()
+    partition_task.cancel()
+    # Stop background job and engine workers so the process can exit cleanly
+    await job_manager.shutdown()
+    execution_policy.shutdown()
+    batch_runner.shutdown()
+
 app = FastAPI(
     title="RetireSaveUp",
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
+app.add_middleware(FirstRequestMiddleware, profile=startup_profile)
+
+app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
+app.add_middleware(StageTimingMiddleware)
+
+app.add_middleware(MemoryTracingMiddleware)
+
+# Added after the profiling layers so it rejects oversized bodies before they run;
+# only CORS sits outside it, so 413 responses still carry the CORS headers
+app.add_middleware(RequestLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # In production, replace "*" with your frontend's actual URL
@@ -23,15 +70,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(user_router)
-app.include_router(ps_router)
-app.include_router(retriveSaveUp_router)
+with startup_profile.phase("app:routes"):
+    app.include_router(user_router)
+    app.include_router(ps_router)
+    app.include_router(retriveSaveUp_router)
+    app.include_router(job_router)
+    app.include_router(health_router)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+_static_assets = None
+
+def static_assets():
+    """
+    Static files are loaded and precompressed once, on the first static
+    request, so the compressors stay off the startup path.
+    """
+    global _static_assets
+    if _static_assets is None:
+        from src.services.staticAssets import StaticAssetStore
+
+        with startup_profile.phase("app:static-assets"):
+            _static_assets = StaticAssetStore(STATIC_DIR)
+    return _static_assets
+
+@app.api_route("/static/{name:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(name: str, request: Request):
+    response = static_assets().response(request, name)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
-@app.get("/", include_in_schema=False)
-async def serve_index():
-    return FileResponse(os.path.join(STATIC_DIR, "index.html"))
\ No newline at end of file
+@app.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_index(request: Request):
+    return static_assets().response(request, "index.html")
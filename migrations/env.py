@@ -10,6 +10,8 @@ from alembic import context
 from sqlmodel import SQLModel
 from src.models.userModel import User
 from src.models.history import CalculationHistory
+from src.models.summary import UserSavingsSummary
+from src.models.idempotency import IdempotencyRecord
 from config import settings
 
 # this is the Alembic Config object, which provides
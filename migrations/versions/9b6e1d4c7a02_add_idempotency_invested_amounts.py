@@ -0,0 +1,29 @@
+"""add idempotency invested amounts
+
+Revision ID: 9b6e1d4c7a02
+Revises: f3a8c6d1e205
+Create Date: 2026-10-19 16:08:12.774190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b6e1d4c7a02'
+down_revision: Union[str, Sequence[str], None] = 'f3a8c6d1e205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('idempotency_keys', sa.Column('invested_amounts', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_keys', 'invested_amounts')
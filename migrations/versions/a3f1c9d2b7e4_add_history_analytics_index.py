@@ -0,0 +1,33 @@
+"""add history analytics index
+
+Revision ID: a3f1c9d2b7e4
+Revises: 1eee66ee8cd8
+Create Date: 2026-10-18 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d2b7e4'
+down_revision: Union[str, Sequence[str], None] = '1eee66ee8cd8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_calculation_history_user_type_created',
+        'calculation_history',
+        ['user_id', 'investment_type', 'created_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_calculation_history_user_type_created', table_name='calculation_history')
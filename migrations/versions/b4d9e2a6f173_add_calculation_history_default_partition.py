@@ -0,0 +1,37 @@
+"""add calculation history default partition
+
+Revision ID: b4d9e2a6f173
+Revises: e7c2f05d4a19
+Create Date: 2026-10-19 10:41:07.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d9e2a6f173'
+down_revision: Union[str, Sequence[str], None] = 'e7c2f05d4a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Catches rows outside every monthly partition, so inserts keep working
+    # when partition maintenance has not run for longer than it plans ahead
+    op.execute('CREATE TABLE calculation_history_default PARTITION OF calculation_history DEFAULT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DO $$ BEGIN "
+        "IF EXISTS (SELECT 1 FROM calculation_history_default) THEN "
+        "RAISE EXCEPTION 'calculation_history_default still holds rows, create their monthly partitions first'; "
+        "END IF; "
+        "END $$"
+    )
+    op.drop_table('calculation_history_default')
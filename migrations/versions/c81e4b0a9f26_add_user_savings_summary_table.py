@@ -0,0 +1,54 @@
+"""add user savings summary table
+
+Revision ID: c81e4b0a9f26
+Revises: a3f1c9d2b7e4
+Create Date: 2026-10-18 10:04:17.882301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81e4b0a9f26'
+down_revision: Union[str, Sequence[str], None] = 'a3f1c9d2b7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_savings_summary',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('calculations', sa.Integer(), nullable=False),
+    sa.Column('total_invested', sa.Float(), nullable=False),
+    sa.Column('total_profit', sa.Float(), nullable=False),
+    sa.Column('total_tax_benefit', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill the summary for history rows that already exist
+    op.execute(
+        """
+        INSERT INTO user_savings_summary
+            (user_id, calculations, total_invested, total_profit, total_tax_benefit, updated_at)
+        SELECT
+            h.user_id,
+            count(DISTINCT h.id),
+            coalesce(sum((s.value ->> 'amount')::float), 0),
+            coalesce(sum((s.value ->> 'profit')::float), 0),
+            coalesce(sum((s.value ->> 'taxBenefit')::float), 0),
+            now()
+        FROM calculation_history h
+        LEFT JOIN LATERAL jsonb_array_elements(h.result -> 'savingsByDates') AS s ON true
+        GROUP BY h.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_savings_summary')
@@ -0,0 +1,103 @@
+"""partition calculation history by month
+
+Revision ID: e7c2f05d4a19
+Revises: 5d2a7e91c3b8
+Create Date: 2026-10-18 13:02:55.140276
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c2f05d4a19'
+down_revision: Union[str, Sequence[str], None] = '5d2a7e91c3b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+INDEXES = {
+    'ix_calculation_history_id': ['id'],
+    'ix_calculation_history_user_id': ['user_id'],
+    'ix_calculation_history_user_type_created': ['user_id', 'investment_type', 'created_at'],
+}
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_to_legacy() -> None:
+    op.rename_table('calculation_history', 'calculation_history_legacy')
+    op.execute('ALTER TABLE calculation_history_legacy RENAME CONSTRAINT calculation_history_pkey TO calculation_history_legacy_pkey')
+    for name in INDEXES:
+        op.execute(f'ALTER INDEX {name} RENAME TO {name}_legacy')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_to_legacy()
+
+    op.create_table('calculation_history',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('investment_type', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'calculation_history', columns, unique=False)
+
+    # One partition per month from the oldest existing row up to a few months ahead
+    oldest = op.get_bind().execute(sa.text('SELECT min(created_at) FROM calculation_history_legacy')).scalar()
+    month = date((oldest or datetime.utcnow()).year, (oldest or datetime.utcnow()).month, 1)
+    today = datetime.utcnow().date()
+    last = _add_months(date(today.year, today.month, 1), PARTITIONS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE calculation_history_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF calculation_history FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+
+    op.execute(
+        'INSERT INTO calculation_history (id, user_id, investment_type, payload, result, created_at) '
+        'SELECT id, user_id, investment_type, payload, result, created_at FROM calculation_history_legacy'
+    )
+    op.drop_table('calculation_history_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_to_legacy()
+
+    op.create_table('calculation_history',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('investment_type', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'calculation_history', columns, unique=False)
+
+    op.execute(
+        'INSERT INTO calculation_history (id, user_id, investment_type, payload, result, created_at) '
+        'SELECT id, user_id, investment_type, payload, result, created_at FROM calculation_history_legacy'
+    )
+    # Dropping the partitioned parent drops every monthly partition with it
+    op.drop_table('calculation_history_legacy')
@@ -0,0 +1,36 @@
+"""add calculation totals to history
+
+Revision ID: f3a8c6d1e205
+Revises: b4d9e2a6f173
+Create Date: 2026-10-19 15:26:44.301958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c6d1e205'
+down_revision: Union[str, Sequence[str], None] = 'b4d9e2a6f173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('total_invested', 'total_profit', 'total_tax_benefit')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Added on the partitioned parent, so every partition gets the columns.
+    # Existing rows stay NULL: their totals need the engine, so
+    # `python -m src.commands.rebuildSummary` fills them in batches and then
+    # rebuilds user_savings_summary with every remanent counted once
+    for name in COLUMNS:
+        op.add_column('calculation_history', sa.Column(name, sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(COLUMNS):
+        op.drop_column('calculation_history', name)
@@ -0,0 +1,208 @@
+"""
+Measures the peak memory allocated per transaction by every transaction
+endpoint: request validation, the engine and response serialization. Also
+measures the peak memory of streaming bodies through the request size guard,
+which must stay flat for rejected bodies however large they are, and the
+working memory of the returns engine for an accepted request against the
+chunk size it folds the rows in.
+
+Usage: python -m src.commands.benchmarkMemory [sizes...]
+"""
+import asyncio
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from typing import Any, Callable, List
+
+from pydantic import TypeAdapter
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.schema.transactions import ExpenseInput, FilterInput, ValidatorInput
+from src.services.requestLimits import RequestLimitMiddleware, RequestLimits, RouteLimit
+from src.services.returnCalcServices import iter_returns, process_returns
+from src.services.transactionServices import (
+    apply_period_rules,
+    parse_expenses,
+    validate_parsed_transactions
+)
+from src.services.validationServices import validate_compact
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+GUARD_LIMIT = RouteLimit(max_body_bytes=1024 * 1024, max_rows=0)
+GUARD_CHUNK_BYTES = 64 * 1024
+ENGINE_CHUNK_SIZES = [1000, 10000, 100000]
+
+def _dates(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+        f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+        for _ in range(count)
+    ]
+
+def _periods() -> dict:
+    return {
+        "q": [{"fixed": 0, "start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59"}],
+        "p": [{"extra": 25, "start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59"}],
+        "k": [
+            {"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"},
+            {"start": "2023-03-01 00:00:00", "end": "2023-11-30 23:59:59"}
+        ]
+    }
+
+def _parsed(count: int) -> List[dict]:
+    rng = random.Random(11)
+    rows = []
+    for date in _dates(count):
+        amount = round(rng.uniform(1, 2000), 2)
+        ceiling = -(-amount // 100) * 100
+        rows.append({"date": date, "amount": amount, "ceiling": ceiling, "remanent": ceiling - amount})
+    return rows
+
+def _endpoints():
+    """(name, request body builder, request type, handler) for every transaction endpoint."""
+    return [
+        ("transactions:parse",
+         lambda n: [{"date": date, "amount": 375.0} for date in _dates(n)],
+         List[ExpenseInput],
+         parse_expenses),
+        ("transactions:validator",
+         lambda n: {"wage": 50000, "transactions": _parsed(n)},
+         ValidatorInput,
+         validate_parsed_transactions),
+        ("transactions:validator?mode=compact",
+         lambda n: {"wage": 50000, "transactions": _parsed(n)},
+         ValidatorInput,
+         lambda payload: validate_compact(payload, False)),
+        ("transactions:filter",
+         lambda n: {"wage": 50000, **_periods(), "transactions": _parsed(n)},
+         FilterInput,
+         apply_period_rules),
+        ("returns:nps",
+         lambda n: {"age": 29, "wage": 50000, "inflation": 5.5, **_periods(), "transactions": _parsed(n)},
+         ReturnsInput,
+         lambda payload: process_returns(payload, "nps")),
+        ("returns:index",
+         lambda n: {"age": 29, "wage": 50000, "inflation": 5.5, **_periods(), "transactions": _parsed(n)},
+         ReturnsInput,
+         lambda payload: process_returns(payload, "index")),
+    ]
+
+def measure(body: bytes, request_type: Any, handler: Callable[[Any], Any]) -> dict:
+    """Peak traced bytes of validating the body, running the handler and serializing its result."""
+    adapter = TypeAdapter(request_type)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        payload = adapter.validate_json(body)
+        _, validated_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        result = handler(payload)
+        _, engine_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        TypeAdapter(type(result)).dump_json(result)
+        _, total_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"validation": validated_peak, "engine": engine_peak, "total": max(validated_peak, engine_peak, total_peak)}
+
+def measure_engine_chunks(body: bytes, investment_type: str, chunk_size: int) -> dict:
+    """
+    Peak traced bytes the returns engine allocates on top of the validated
+    payload when it folds the rows in chunks of chunk_size.
+    """
+    payload = ReturnsInput.model_validate_json(body)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in iter_returns(payload, investment_type, chunk_size):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"engine": peak - baseline}
+
+async def _drive_guard(body: bytes, limits: RequestLimits, chunk_bytes: int) -> int:
+    """Sends the body in chunks without a Content-Length, as a chunked upload does."""
+    async def buffering_app(scope, receive, send):
+        # Buffers the whole body the way a route reading request.body() does
+        received = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            received += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    offset = 0
+
+    async def receive():
+        nonlocal offset
+        chunk = body[offset:offset + chunk_bytes]
+        offset += chunk_bytes
+        return {"type": "http.request", "body": chunk, "more_body": offset < len(body)}
+
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    scope = {"type": "http", "method": "POST", "path": "/returns:nps", "headers": []}
+    await RequestLimitMiddleware(buffering_app, limits)(scope, receive, send)
+    return statuses[0]
+
+def measure_guard(body: bytes, limit: RouteLimit = GUARD_LIMIT, chunk_bytes: int = GUARD_CHUNK_BYTES) -> dict:
+    """Response status and peak traced bytes of streaming the body through the size guard."""
+    limits = RequestLimits(default=limit, routes={}, prefix="")
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        status = asyncio.run(_drive_guard(body, limits, chunk_bytes))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"status": status, "peak": peak}
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print(f"{'endpoint':<38} {'rows':>8} {'body B/tx':>10} {'validate B/tx':>14} {'engine B/tx':>12} {'peak B/tx':>10}")
+    for name, build, request_type, handler in _endpoints():
+        for size in sizes:
+            body = json.dumps(build(size)).encode("utf-8")
+            peaks = measure(body, request_type, handler)
+            print(
+                f"{name:<38} {size:>8} {len(body) / size:>10.0f} {peaks['validation'] / size:>14.0f} "
+                f"{peaks['engine'] / size:>12.0f} {peaks['total'] / size:>10.0f}"
+            )
+
+    rows = max(sizes)
+    body = json.dumps(_endpoints()[4][1](rows)).encode("utf-8")
+    print()
+    print(f"returns:nps engine working memory, {rows} rows")
+    print(f"{'chunk rows':>10} {'engine bytes':>13} {'B/tx':>6}")
+    for chunk_size in ENGINE_CHUNK_SIZES:
+        engine = measure_engine_chunks(body, "nps", chunk_size)["engine"]
+        print(f"{chunk_size:>10} {engine:>13} {engine / rows:>6.0f}")
+
+    print()
+    print(f"request guard, limit {GUARD_LIMIT.max_body_bytes} bytes, {GUARD_CHUNK_BYTES} byte chunks")
+    print(f"{'rows':>8} {'body bytes':>12} {'status':>7} {'peak bytes':>12}")
+    build = _endpoints()[4][1]
+    for size in sizes:
+        body = json.dumps(build(size)).encode("utf-8")
+        result = measure_guard(body)
+        print(f"{size:>8} {len(body):>12} {result['status']:>7} {result['peak']:>12}")
+
+if __name__ == "__main__":
+    main()
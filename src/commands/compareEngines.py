@@ -0,0 +1,310 @@
+"""
+Differential harness: generates random payloads that stress the subtle engine
+rules (duplicate dates, the Q tie-break, inclusive period bounds, overlapping
+periods) and checks that a candidate engine returns exactly what the frozen
+reference engine returns, recording the relative speed of every case.
+
+Usage: python -m src.commands.compareEngines [--engine NAME] [--cases N] [--seed S]
+                                             [--max-rows R] [--candidate module:function]
+                                             [--report report.json]
+"""
+import argparse
+import importlib
+import json
+import random
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.schema.transactions import FilterInput
+from src.services.periodServices import expand_k_spec
+from src.services.referenceEngines import reference_apply_period_rules, reference_process_returns
+from src.services.returnCalcServices import process_returns
+from src.services.transactionServices import apply_period_rules
+
+DATE_FORMAT = "{year}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}"
+
+def _random_date(rng: random.Random) -> str:
+    return DATE_FORMAT.format(
+        year=2023,
+        month=rng.randint(1, 12),
+        day=rng.randint(1, 28),
+        hour=rng.randint(0, 23),
+        minute=rng.choice([0, 0, 30, rng.randint(0, 59)]),
+        second=rng.choice([0, 0, 59, rng.randint(0, 59)])
+    )
+
+def _random_amount(rng: random.Random) -> float:
+    kind = rng.random()
+    if kind < 0.08:
+        return -round(rng.uniform(0.01, 500), 2)
+    if kind < 0.2:
+        return float(rng.randint(0, 50) * 100)
+    if kind < 0.25:
+        return round(rng.uniform(100000, 499999.99), 2)
+    return round(rng.uniform(0.01, 5000), 2)
+
+def _random_periods(rng: random.Random, dates: List[str], count: int) -> List[dict]:
+    """Overlapping periods whose bounds often coincide with transaction dates."""
+    periods = []
+    for _ in range(count):
+        bounds = [rng.choice(dates) if dates and rng.random() < 0.5 else _random_date(rng) for _ in range(2)]
+        start, end = sorted(bounds)
+        periods.append({"start": start, "end": end})
+    # Equal start dates exercise the Q tie-break on the lowest index
+    if len(periods) > 1 and rng.random() < 0.4:
+        periods[-1]["start"] = periods[0]["start"]
+        periods[-1]["end"] = max(periods[-1]["end"], periods[-1]["start"])
+    return periods
+
+def _random_transactions(rng: random.Random, max_rows: int) -> List[dict]:
+    transactions = []
+    for _ in range(rng.randint(0, max_rows)):
+        # Reusing an earlier date creates duplicates, including duplicates of invalid rows
+        if transactions and rng.random() < 0.15:
+            date = rng.choice(transactions)["date"]
+        else:
+            date = _random_date(rng)
+        transactions.append({"date": date, "amount": _random_amount(rng)})
+    return transactions
+
+def _random_rules(rng: random.Random, dates: List[str]) -> dict:
+    return {
+        "q": [
+            {**period, "fixed": float(rng.choice([0, 0, rng.randint(0, 1000)]))}
+            for period in _random_periods(rng, dates, rng.randint(0, 5))
+        ],
+        "p": [
+            {**period, "extra": float(rng.randint(0, 500))}
+            for period in _random_periods(rng, dates, rng.randint(0, 5))
+        ],
+        "k": _random_periods(rng, dates, rng.randint(0, 5))
+    }
+
+def generate_returns_case(rng: random.Random, max_rows: int) -> dict:
+    transactions = _random_transactions(rng, max_rows)
+    case = {
+        "age": rng.randint(18, 70),
+        "wage": float(rng.choice([30000, 50000, 90000, 110000, 150000, 400000])),
+        "inflation": round(rng.uniform(0, 12), 2),
+        **_random_rules(rng, [tx["date"] for tx in transactions]),
+        "transactions": transactions
+    }
+    if rng.random() < 0.25:
+        first, last = sorted([_random_date(rng), _random_date(rng)])
+        case["kSpec"] = {"granularity": rng.choice(["day", "week", "month", "quarter"]), "from": first, "to": last}
+    return case
+
+def generate_filter_case(rng: random.Random, max_rows: int) -> dict:
+    transactions = _random_transactions(rng, max_rows)
+    return {
+        "wage": float(rng.choice([30000, 50000, 90000])),
+        **_random_rules(rng, [tx["date"] for tx in transactions]),
+        "transactions": transactions
+    }
+
+def _with_explicit_periods(payload: ReturnsInput) -> ReturnsInput:
+    """The reference engine predates kSpec, so it gets the expanded periods as explicit K periods."""
+    if payload.kSpec is None:
+        return payload
+    return payload.model_copy(update={"k": list(payload.k) + expand_k_spec(payload.kSpec), "kSpec": None})
+
+@dataclass
+class Engine:
+    input_model: type
+    generate: Callable[[random.Random, int], dict]
+    reference: Callable[[Any], BaseModel]
+    candidate: Callable[[Any], BaseModel]
+
+ENGINES: Dict[str, Engine] = {
+    "returns:nps": Engine(
+        ReturnsInput,
+        generate_returns_case,
+        lambda payload: reference_process_returns(_with_explicit_periods(payload), "nps"),
+        lambda payload: process_returns(payload, "nps")
+    ),
+    "returns:index": Engine(
+        ReturnsInput,
+        generate_returns_case,
+        lambda payload: reference_process_returns(_with_explicit_periods(payload), "index"),
+        lambda payload: process_returns(payload, "index")
+    ),
+    "transactions:filter": Engine(
+        FilterInput,
+        generate_filter_case,
+        reference_apply_period_rules,
+        apply_period_rules
+    )
+}
+
+@dataclass
+class CaseResult:
+    case: int
+    rows: int
+    matched: bool
+    reference_ms: float
+    candidate_ms: float
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_ms / self.candidate_ms if self.candidate_ms else float("inf")
+
+@dataclass
+class HarnessReport:
+    engine: str
+    seed: int
+    results: List[CaseResult] = field(default_factory=list)
+    # Smallest failing payload found by shrinking, with both outputs
+    mismatch: Optional[dict] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.mismatch is None
+
+    def summary(self) -> dict:
+        speedups = sorted(result.speedup for result in self.results)
+        reference_ms = sum(result.reference_ms for result in self.results)
+        candidate_ms = sum(result.candidate_ms for result in self.results)
+        return {
+            "engine": self.engine,
+            "seed": self.seed,
+            "cases": len(self.results),
+            "passed": self.passed,
+            "referenceMs": round(reference_ms, 3),
+            "candidateMs": round(candidate_ms, 3),
+            "totalSpeedup": round(reference_ms / candidate_ms, 3) if candidate_ms else None,
+            "medianSpeedup": round(statistics.median(speedups), 3) if speedups else None,
+            "p10Speedup": round(speedups[len(speedups) // 10], 3) if speedups else None,
+            "p90Speedup": round(speedups[len(speedups) * 9 // 10], 3) if speedups else None
+        }
+
+def _timed(fn: Callable[[Any], BaseModel], payload: Any, repeat: int):
+    best = float("inf")
+    output = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            output = fn(payload).model_dump()
+        except Exception as exc:
+            output = {"error": f"{exc.__class__.__name__}: {exc}"}
+        best = min(best, time.perf_counter() - started)
+    return output, best * 1000
+
+def _mismatches(engine: Engine, raw: dict) -> bool:
+    payload = engine.input_model.model_validate(raw)
+    return _timed(engine.reference, payload, 1)[0] != _timed(engine.candidate, payload, 1)[0]
+
+def shrink(engine: Engine, raw: dict, max_attempts: int = 2000) -> dict:
+    """Greedily drops transactions and periods while the case still mismatches."""
+    attempts = 0
+    changed = True
+    while changed and attempts < max_attempts:
+        changed = False
+        for key in ("transactions", "q", "p", "k", "kSpec"):
+            if key == "kSpec":
+                if raw.get("kSpec") is not None:
+                    attempts += 1
+                    candidate = {**raw, "kSpec": None}
+                    if _mismatches(engine, candidate):
+                        raw, changed = candidate, True
+                continue
+            # Try dropping halves first, then single entries
+            size = len(raw.get(key, [])) // 2 or 1
+            while size >= 1 and raw.get(key):
+                start = 0
+                while start < len(raw[key]) and attempts < max_attempts:
+                    attempts += 1
+                    candidate = {**raw, key: raw[key][:start] + raw[key][start + size:]}
+                    if _mismatches(engine, candidate):
+                        raw, changed = candidate, True
+                    else:
+                        start += size
+                size //= 2
+    return raw
+
+def run_differential(
+    engine_name: str,
+    candidate: Optional[Callable[[Any], BaseModel]] = None,
+    cases: int = 200,
+    seed: int = 0,
+    max_rows: int = 200,
+    repeat: int = 3
+) -> HarnessReport:
+    """
+    Checks a candidate (the current engine by default) against the reference
+    on seeded random cases. Stops at the first mismatch and shrinks it.
+    """
+    base = ENGINES[engine_name]
+    engine = Engine(base.input_model, base.generate, base.reference, candidate or base.candidate)
+    rng = random.Random(seed)
+    report = HarnessReport(engine=engine_name, seed=seed)
+
+    for case in range(cases):
+        raw = engine.generate(rng, max_rows)
+        payload = engine.input_model.model_validate(raw)
+        expected, reference_ms = _timed(engine.reference, payload, repeat)
+        actual, candidate_ms = _timed(engine.candidate, payload, repeat)
+
+        matched = expected == actual
+        report.results.append(CaseResult(case, len(raw["transactions"]), matched, reference_ms, candidate_ms))
+        if not matched:
+            smallest = shrink(engine, raw)
+            smallest_payload = engine.input_model.model_validate(smallest)
+            report.mismatch = {
+                "case": case,
+                "payload": smallest,
+                "expected": _timed(engine.reference, smallest_payload, 1)[0],
+                "actual": _timed(engine.candidate, smallest_payload, 1)[0]
+            }
+            break
+    return report
+
+def _load_candidate(path: str) -> Callable[[Any], BaseModel]:
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--engine", choices=sorted(ENGINES), action="append")
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-rows", type=int, default=200)
+    parser.add_argument("--candidate", help="module:function taking the validated payload")
+    parser.add_argument("--report", help="write every case with its timings to this JSON file")
+    args = parser.parse_args()
+
+    candidate = _load_candidate(args.candidate) if args.candidate else None
+    reports = [
+        run_differential(name, candidate, args.cases, args.seed, args.max_rows)
+        for name in (args.engine or sorted(ENGINES))
+    ]
+
+    for report in reports:
+        summary = report.summary()
+        status = "ok" if report.passed else "MISMATCH"
+        print(
+            f"{summary['engine']:<22} {status:<9} cases={summary['cases']:<5} "
+            f"speedup total={summary['totalSpeedup']} median={summary['medianSpeedup']} "
+            f"p10={summary['p10Speedup']} p90={summary['p90Speedup']}"
+        )
+        if not report.passed:
+            print(json.dumps(report.mismatch, indent=2))
+
+    if args.report:
+        with open(args.report, "w") as handle:
+            json.dump([
+                {**report.summary(), "mismatch": report.mismatch, "results": [
+                    {**asdict(result), "speedup": round(result.speedup, 3)} for result in report.results
+                ]}
+                for report in reports
+            ], handle, indent=2)
+
+    sys.exit(0 if all(report.passed for report in reports) else 1)
+
+if __name__ == "__main__":
+    main()
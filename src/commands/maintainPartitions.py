@@ -0,0 +1,18 @@
+"""
+Creates upcoming calculation_history partitions and applies the retention policy.
+
+Usage: python -m src.commands.maintainPartitions
+"""
+import asyncio
+
+from src.connection.session import engine
+from src.services.partitionServices import maintain_partitions
+
+async def main() -> None:
+    outcome = await maintain_partitions(engine)
+    await engine.dispose()
+    print(f"Created partitions: {', '.join(outcome['created']) or 'none'}")
+    print(f"Pruned partitions: {', '.join(outcome['pruned']) or 'none'}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Runs 'alembic upgrade head' only when the database is not already at head,
+so container restarts skip the alembic upgrade machinery entirely.
+
+Usage: python -m src.commands.migrate
+"""
+import asyncio
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import settings
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+async def current_revisions() -> set:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    try:
+        async with engine.connect() as connection:
+            return await connection.run_sync(
+                lambda sync_connection: set(MigrationContext.configure(sync_connection).get_current_heads())
+            )
+    finally:
+        await engine.dispose()
+
+def main() -> None:
+    alembic_config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    head_revisions = set(ScriptDirectory.from_config(alembic_config).get_heads())
+
+    if asyncio.run(current_revisions()) == head_revisions:
+        print(f"Database already at {', '.join(sorted(head_revisions))}, skipping migrations")
+        return
+
+    command.upgrade(alembic_config, "head")
+
+if __name__ == "__main__":
+    main()
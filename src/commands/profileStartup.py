@@ -0,0 +1,26 @@
+"""
+Prints the import-time breakdown of the application.
+
+Usage: python -m src.commands.profileStartup [top]
+"""
+import sys
+import time
+import subprocess
+
+from src.services.startupProfile import import_time_breakdown
+
+def main() -> None:
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], check=True)
+    total_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Interpreter start + 'import main': {total_ms:.1f} ms\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in import_time_breakdown("main", top):
+        indent = "  " * entry["depth"]
+        print(f"{entry['cumulativeMs']:>14.1f} {entry['selfMs']:>9.1f}  {indent}{entry['module']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Backfills the per-calculation totals of older calculation_history rows and
+rebuilds user_savings_summary from them.
+
+Usage: python -m src.commands.rebuildSummary
+"""
+import asyncio
+
+from src.connection.session import AsyncSessionLocal, engine
+from src.services.historyServices import backfill_totals
+from src.services.summaryServices import rebuild_summaries
+
+async def main() -> None:
+    async with AsyncSessionLocal() as db:
+        backfilled = await backfill_totals(db)
+        rebuilt = await rebuild_summaries(db)
+    await engine.dispose()
+    print(f"Backfilled totals for {backfilled} calculations")
+    print(f"Rebuilt savings summaries for {rebuilt} users")
+
+if __name__ == "__main__":
+    asyncio.run(main())
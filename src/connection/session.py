@@ -1,4 +1,8 @@
 import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -6,11 +10,123 @@ from sqlalchemy.orm import sessionmaker
 from config import settings
 
 # Initialize a new SQLAlchemy engine using create_async_engine
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+engine = create_async_engine(settings.DATABASE_URL, echo=True, pool_size=settings.DB_POOL_SIZE)
 
 # Create an asynchronous Context manager for handling database sessions
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Read-only queries go to a replica when DATABASE_READ_URL is set, otherwise to the primary
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(settings.DATABASE_READ_URL, echo=True, pool_size=settings.DB_POOL_SIZE)
+    ReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+else:
+    read_engine = engine
+    ReadSessionLocal = AsyncSessionLocal
+
+# Errors that send a read back to the primary, raised on connect or by a query
+REPLICA_ERRORS = (OSError, SQLAlchemyError)
+
+class ReplicaSession:
+    """
+    Session on the replica that reruns a failed query on the primary, so a
+    lagging or broken replica costs a retry instead of a 500. Once it has
+    failed over, every later call in the session goes to the primary.
+
+    stream() is only retried while it is opened. Rows already handed out
+    cannot be taken back, so a failure while iterating the stream reaches
+    the caller, which has to resume itself (see the history export).
+    """
+
+    RETRIED_METHODS = ("exec", "execute", "scalar", "scalars", "get", "stream")
+
+    def __init__(self, router: "ReadSessionRouter", replica):
+        self._router = router
+        self._session = replica
+        self.on_replica = True
+
+    async def _fail_over(self) -> None:
+        await self._session.close()
+        self._router.replica_failed()
+        self._session = self._router.primary_sessions()
+        self.on_replica = False
+
+    def __getattr__(self, name):
+        attribute = getattr(self._session, name)
+        if name not in self.RETRIED_METHODS or not self.on_replica:
+            return attribute
+
+        async def with_fallback(*args, **kwargs):
+            try:
+                return await attribute(*args, **kwargs)
+            except REPLICA_ERRORS:
+                if self.on_replica:
+                    await self._fail_over()
+                return await getattr(self._session, name)(*args, **kwargs)
+        return with_fallback
+
+    async def close(self) -> None:
+        await self._session.close()
+
+class ReadSessionRouter:
+    """
+    Hands out sessions on the read engine and falls back to the primary when
+    the replica cannot be reached or a query on it fails. After a failure the
+    replica is skipped for retry_seconds so requests do not keep paying for
+    the connect timeout.
+    """
+
+    def __init__(self, read_sessions, primary_sessions, retry_seconds: float):
+        self.read_sessions = read_sessions
+        self.primary_sessions = primary_sessions
+        self.retry_seconds = retry_seconds
+        self.replica_down_until = 0.0
+        self.fallbacks = 0
+
+    @property
+    def uses_replica(self) -> bool:
+        return self.read_sessions is not self.primary_sessions
+
+    def replica_failed(self) -> None:
+        self.replica_down_until = time.monotonic() + self.retry_seconds
+        self.fallbacks += 1
+
+    async def _open_replica(self):
+        session = self.read_sessions()
+        try:
+            # Checks a connection out of the pool so an unreachable replica fails here
+            await session.connection()
+        except REPLICA_ERRORS:
+            await session.close()
+            self.replica_failed()
+            return None
+        return ReplicaSession(self, session)
+
+    @asynccontextmanager
+    async def session(self):
+        replica = None
+        if self.uses_replica and time.monotonic() >= self.replica_down_until:
+            replica = await self._open_replica()
+
+        if replica is not None:
+            try:
+                yield replica
+            finally:
+                await replica.close()
+            return
+
+        async with self.primary_sessions() as session:
+            yield session
+
+read_sessions = ReadSessionRouter(ReadSessionLocal, AsyncSessionLocal, settings.READ_REPLICA_RETRY_SECONDS)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_db(primary: AsyncSession = Depends(get_db)):
+    # Without a replica, auth and the route share the request's primary session
+    if not read_sessions.uses_replica:
+        yield primary
+        return
+    async with read_sessions.session() as session:
+        yield session
@@ -1,12 +1,19 @@
 import uuid
 from datetime import datetime
+from typing import Optional
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from pydantic import BaseModel
 
 class CalculationHistory(SQLModel, table=True):
     __tablename__ = "calculation_history"
+    __table_args__ = (
+        # Serves the per-user analytics group-bys and the /history ordering
+        Index("ix_calculation_history_user_type_created", "user_id", "investment_type", "created_at"),
+        # Monthly partitions are created by src.services.partitionServices
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     user_id: uuid.UUID = Field(foreign_key="users.id", index=True)
@@ -14,8 +21,15 @@ class CalculationHistory(SQLModel, table=True):
     
     payload: dict = Field(default_factory=dict, sa_column=Column(JSONB))
     result: dict = Field(default_factory=dict, sa_column=Column(JSONB))
+
+    # Totals of the calculation with every remanent counted once, K windows may overlap.
+    # NULL for rows written before they existed until rebuildSummary backfills them
+    total_invested: Optional[float] = Field(default=None)
+    total_profit: Optional[float] = Field(default=None)
+    total_tax_benefit: Optional[float] = Field(default=None)
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Part of the primary key because the table is range partitioned on it
+    created_at: datetime = Field(default_factory=datetime.utcnow, primary_key=True)
 
 class CalculationHistoryResponse(BaseModel):
     id: uuid.UUID
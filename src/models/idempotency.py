@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+
+class IdempotencyRecord(SQLModel, table=True):
+    __tablename__ = "idempotency_keys"
+
+    user_id: uuid.UUID = Field(foreign_key="users.id", primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    investment_type: str
+    request_hash: str = Field(description="SHA-256 of the request payload")
+
+    response: dict = Field(default_factory=dict, sa_column=Column(JSONB))
+    # Unrounded invested amount per K period, lets replays be projected without the engine
+    invested_amounts: Optional[List[float]] = Field(default=None, sa_column=Column(JSONB))
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
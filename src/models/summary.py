@@ -0,0 +1,23 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from pydantic import BaseModel
+
+class UserSavingsSummary(SQLModel, table=True):
+    __tablename__ = "user_savings_summary"
+
+    user_id: uuid.UUID = Field(foreign_key="users.id", primary_key=True)
+    calculations: int = Field(default=0)
+    total_invested: float = Field(default=0.0)
+    total_profit: float = Field(default=0.0)
+    total_tax_benefit: float = Field(default=0.0)
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class UserSavingsSummaryResponse(BaseModel):
+    calculations: int
+    total_invested: float
+    total_profit: float
+    total_tax_benefit: float
+    updated_at: Optional[datetime] = None
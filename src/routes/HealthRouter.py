@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from config import settings
+from src.services.warmup import readiness
+
+router = APIRouter(
+    prefix=f"/blackrock/challenge/{settings.VERSION}",
+    tags=['health']
+)
+
+@router.get("/health/live")
+def liveness():
+    """The process is up and serving requests, regardless of warm-up."""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+def readiness_check():
+    """Reports ready only after the database pool and engine code paths have been warmed up."""
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=snapshot)
@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from config import settings
+from src.models.userModel import User
+from src.schema.jobSchema import JobSubmitResponse, JobStatusResponse
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.services.jobServices import (
+    Job,
+    JobStatus,
+    JobQueueFullError,
+    UserJobLimitError,
+    job_manager
+)
+from src.utils import get_current_user
+
+router = APIRouter(
+    prefix=f"/blackrock/challenge/{settings.VERSION}",
+    tags=['jobs']
+)
+
+def _to_datetime(timestamp):
+    return datetime.utcfromtimestamp(timestamp) if timestamp is not None else None
+
+def _to_status_response(job: Job) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status.value,
+        investment_type=job.investment_type,
+        created_at=_to_datetime(job.created_at),
+        started_at=_to_datetime(job.started_at),
+        finished_at=_to_datetime(job.finished_at),
+        error=job.error,
+        persist_error=job.persist_error,
+        history_id=job.history_id
+    )
+
+async def _submit(current_user: User, investment_type: str, payload: ReturnsInput) -> JobSubmitResponse:
+    try:
+        job = await job_manager.submit(current_user.id, investment_type, payload)
+    except UserJobLimitError as exc:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(exc))
+    except JobQueueFullError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+
+    return JobSubmitResponse(job_id=job.id, status=job.status.value)
+
+@router.post(
+    "/jobs/returns:nps",
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_nps_returns_job(
+    payload: ReturnsInput,
+    current_user: User = Depends(get_current_user)
+):
+    """Queues an NPS returns calculation and returns the job id to poll."""
+    return await _submit(current_user, "nps", payload)
+
+@router.post(
+    "/jobs/returns:index",
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_index_returns_job(
+    payload: ReturnsInput,
+    current_user: User = Depends(get_current_user)
+):
+    """Queues an Index fund returns calculation and returns the job id to poll."""
+    return await _submit(current_user, "index", payload)
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse
+)
+async def get_job_status(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user)
+):
+    job = job_manager.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_status_response(job)
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=ReturnsResponse
+)
+async def get_job_result(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user)
+):
+    job = job_manager.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job.error}")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status.value}")
+    return job.result
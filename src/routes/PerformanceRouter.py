@@ -1,11 +1,25 @@
-from fastapi import APIRouter
-import psutil
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Literal, Optional
 import os
 import time
 from datetime import timedelta
 
 from config import settings
 from comms import START_TIME
+from src.services.executionPolicy import execution_policy
+from src.services.admissionControl import admission_controller
+from src.services.startupProfile import startup_profile
+from src.services.requestProfiler import request_profiler
+from src.services.stageTimer import stage_metrics
+from src.services.requestLimits import request_limits
+from src.services.memoryProfiler import (
+    MemorySnapshotNotFoundError,
+    MemoryTracingNotStartedError,
+    memory_diagnostics
+)
+from src.models.userModel import User
+from src.utils import get_current_user
 
 router = APIRouter(
     prefix=f"/blackrock/challenge/{settings.VERSION}",
@@ -16,8 +30,13 @@ router = APIRouter(
 def get_performance():
     """
     Reports system execution metrics including uptime, memory usage, 
-    and the number of active threads used by the process.
+    the number of active threads used by the process, the state of the
+    engine execution pool, the admission controller and the request size
+    guard and the per-stage timing histograms.
     """
+    # psutil is imported on first use to keep it off the startup path
+    import psutil
+
     process = psutil.Process(os.getpid())
     
     memory_info = process.memory_info()
@@ -38,5 +57,146 @@ def get_performance():
     return {
         "time": formatted_time,
         "memory": formatted_memory,
-        "threads": threads
-    }
\ No newline at end of file
+        "threads": threads,
+        "executionPolicy": execution_policy.snapshot(),
+        "admission": admission_controller.snapshot(),
+        "requestLimits": request_limits.snapshot(),
+        "stages": stage_metrics.snapshot()
+    }
+
+@router.get("/performance/admission")
+def get_admission_state(current_user: User = Depends(get_current_user)):
+    """
+    Reports the global admission controller state together with the
+    token bucket of the authenticated user.
+    """
+    return {
+        **admission_controller.snapshot(),
+        "user": admission_controller.user_snapshot(current_user.id)
+    }
+
+@router.get("/performance/stages")
+def get_stage_timings():
+    """
+    Reports a latency histogram for every engine and handler stage that is
+    also sent per request in the Server-Timing header.
+    """
+    return stage_metrics.snapshot()
+
+@router.get("/performance/startup")
+def get_startup_report():
+    """
+    Reports how long each startup phase took and the time from process
+    start until the app was imported, ready and served its first request.
+    """
+    import psutil
+
+    return startup_profile.report(psutil.Process(os.getpid()).create_time())
+
+def _require_admin(current_user: User) -> None:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Only admins can use the profiling endpoints")
+
+@router.get("/performance/profiles")
+def list_request_profiles(current_user: User = Depends(get_current_user)):
+    """
+    Lists the stored request profiles, newest first. Requests are profiled
+    when they send the X-Profile token or are picked by the sampling rate.
+    """
+    _require_admin(current_user)
+    return {
+        "sampleRate": request_profiler.sample_rate,
+        "profiled": request_profiler.profiled,
+        "skippedBusy": request_profiler.skipped_busy,
+        "profiles": request_profiler.store.list()
+    }
+
+@router.get("/performance/profiles/{profile_id}")
+def get_request_profile(
+    profile_id: str,
+    format: Literal["prof", "text"] = "prof",
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Downloads one profile as a raw cProfile dump (for pstats or snakeviz)
+    or as a pstats text report sorted by cumulative time.
+    """
+    _require_admin(current_user)
+    if format == "text":
+        report = request_profiler.store.render(profile_id)
+        if report is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return PlainTextResponse(report)
+
+    path = request_profiler.store.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+@router.get("/performance/memory")
+def get_memory_tracing_status(current_user: User = Depends(get_current_user)):
+    """Reports whether tracemalloc is tracing, the traced memory and the stored snapshots."""
+    _require_admin(current_user)
+    return memory_diagnostics.status()
+
+@router.post("/performance/memory/start")
+def start_memory_tracing(frames: int = Query(1, ge=1, le=50), current_user: User = Depends(get_current_user)):
+    """
+    Starts tracemalloc keeping the given number of frames per allocation.
+    Allocations get noticeably slower while tracing, so stop it when done.
+    """
+    _require_admin(current_user)
+    return memory_diagnostics.start(frames)
+
+@router.post("/performance/memory/stop")
+def stop_memory_tracing(current_user: User = Depends(get_current_user)):
+    _require_admin(current_user)
+    return memory_diagnostics.stop()
+
+@router.post("/performance/memory/snapshots")
+def take_memory_snapshot(
+    label: Optional[str] = None,
+    limit: int = Query(25, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """Takes a snapshot and returns its id together with the top allocation sites."""
+    _require_admin(current_user)
+    try:
+        snapshot_id = memory_diagnostics.take_snapshot(label)
+    except MemoryTracingNotStartedError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"id": snapshot_id, "label": label, "top": memory_diagnostics.top(snapshot_id, limit)}
+
+@router.get("/performance/memory/snapshots/{snapshot_id}")
+def get_memory_snapshot(
+    snapshot_id: int,
+    limit: int = Query(25, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    current_user: User = Depends(get_current_user)
+):
+    _require_admin(current_user)
+    try:
+        return memory_diagnostics.top(snapshot_id, limit, group_by)
+    except MemorySnapshotNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@router.get("/performance/memory/diff")
+def diff_memory_snapshots(
+    base: int,
+    target: int,
+    limit: int = Query(25, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    current_user: User = Depends(get_current_user)
+):
+    """Allocation sites sorted by how much their memory changed from base to target."""
+    _require_admin(current_user)
+    try:
+        return memory_diagnostics.diff(base, target, limit, group_by)
+    except MemorySnapshotNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@router.get("/performance/memory/routes")
+def get_memory_route_peaks(current_user: User = Depends(get_current_user)):
+    """Peak traced memory per route for the requests served while tracing."""
+    _require_admin(current_user)
+    return memory_diagnostics.route_peaks()
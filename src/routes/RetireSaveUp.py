@@ -1,30 +1,70 @@
-from fastapi import APIRouter, Depends
-import math
-from typing import List
-from typing import Set
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
 from config import settings
-from src.connection.session import get_db
+from src.connection.session import get_db, get_read_db
 from src.models.userModel import User
 from src.models.history import CalculationHistory, CalculationHistoryResponse
 from src.schema.transactions import (
     TransactionParsed,
     ExpenseInput, 
-    InvalidTransaction, 
     ValidatorInput, 
     ValidatorResponse,
-    FilteredTransaction,
+    CompactValidatorResponse,
     FilterResponse,
-    FilterInput,
-    InvalidFilteredTransaction
+    FilterInput
 )
 from src.schema.returnCalcSchema import (
+    ProjectedReturnsResponse,
     ReturnsResponse,
     ReturnsInput
 )
-from src.services.returnCalcServices import process_returns
+from src.schema.taxSchema import TaxBatchInput, TaxBatchResponse
+from src.services.streamServices import (
+    SSE_HEADERS,
+    SSE_MEDIA_TYPE,
+    stream_filter_events,
+    stream_returns_events
+)
+from src.services.idempotencyServices import (
+    IdempotencyKeyMismatchError,
+    calculate_once
+)
+from src.services.executionPolicy import execution_policy
+from src.services.admissionControl import AdmissionRejected, admission_controller
+from src.services.stageTimer import begin_stage, stage
+from src.services.transactionServices import (
+    parse_expenses,
+    validate_parsed_transactions,
+    apply_period_rules
+)
+from src.services.batchServices import (
+    NDJSON_MEDIA_TYPE,
+    BatchTooLargeError,
+    read_batch_items,
+    stream_batch_results
+)
+from src.services.analyticsServices import (
+    totals_by_type,
+    totals_by_month,
+    totals_by_window
+)
+from src.schema.analyticsSchema import (
+    HistoryTotals,
+    MonthlyHistoryTotals,
+    WindowHistoryTotals
+)
+from src.services.summaryServices import get_summary
+from src.models.summary import UserSavingsSummaryResponse
+from src.services.exportServices import (
+    EXPORT_MEDIA_TYPES,
+    export_history,
+    parquet_available
+)
 from src.utils import get_current_user
 
 router = APIRouter(
@@ -32,81 +72,42 @@ router = APIRouter(
     tags=['retireSaveUP']
 )
 
+def _admission_error(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=exc.detail,
+        headers={"Retry-After": exc.retry_after_header}
+    )
+
 @router.post("/transactions:parse", 
     response_model=List[TransactionParsed]
 )
 async def parse_transactions(expenses: List[ExpenseInput]):
-    
-    parsed_transactions = []
-    
-    for expense in expenses:
-        ceiling_val = math.ceil(expense.amount / 100.0) * 100.0
-        remanent_val = ceiling_val - expense.amount
-        
-        parsed_transactions.append(
-            TransactionParsed(
-                date=expense.date,
-                amount=expense.amount,
-                ceiling=ceiling_val,
-                remanent=remanent_val
-            )
-        )
-        
-    return parsed_transactions
+    return await execution_policy.run(parse_expenses, expenses, size=len(expenses))
 
 @router.post(
     "/transactions:validator",
-    response_model=ValidatorResponse
+    response_model=Union[ValidatorResponse, CompactValidatorResponse]
 )
-async def validate_transactions(payload: ValidatorInput):
-    valid_transactions: List[TransactionParsed] = []
-    invalid_transactions: List[InvalidTransaction] = []
-    
-    # Use a set for O(1) time complexity when checking for duplicate dates
-    seen_dates: Set[str] = set()
-    
-    for tx in payload.transactions:
-        is_valid = True
-        error_message = ""
-        
-        # Rule 1: No negative amounts or negative remanents
-        if tx.amount < 0 or tx.remanent < 0 or tx.ceiling < tx.amount:
-            is_valid = False
-            error_message = "Negative amounts are not allowed"
-            
-        # Rule 2: No duplicate timestamps
-        elif tx.date in seen_dates:
-            is_valid = False
-            error_message = "Duplicate transaction"
-            
-        # Rule 3: Hard constraint from the mathematical limits (x < 500,000)
-        elif tx.amount >= 500000:
-            is_valid = False
-            error_message = "Amount exceeds maximum allowed limit"
-            
-        # Optional Rule 4: Ensuring transaction doesn't exceed the user's wage logically
-        elif tx.amount > payload.wage:
-             is_valid = False
-             error_message = "Transaction amount exceeds recorded wage"
-
-        # Route the transaction to the correct output list
-        if is_valid:
-            valid_transactions.append(tx)
-            seen_dates.add(tx.date) # Mark this date as seen
-        else:
-            invalid_transactions.append(
-                InvalidTransaction(
-                    date=tx.date,
-                    amount=tx.amount,
-                    ceiling=tx.ceiling,
-                    remanent=tx.remanent,
-                    message=error_message
-                )
-            )
-            
-    return ValidatorResponse(
-        valid=valid_transactions,
-        invalid=invalid_transactions
+async def validate_transactions(
+    payload: ValidatorInput,
+    mode: Literal["full", "compact"] = "full",
+    include_valid_ranges: bool = False
+):
+    """
+    Splits transactions into valid and invalid ones. The compact mode returns
+    invalid row indices grouped by error code (1 negative, 2 duplicate,
+    3 over limit, 4 over wage) instead of echoing every transaction.
+    """
+    if mode == "compact":
+        # The numpy-backed engines are imported on first use to keep them off the startup path
+        from src.services.validationServices import validate_compact
+
+        return await execution_policy.run(
+            validate_compact, payload, include_valid_ranges, size=len(payload.transactions)
+        )
+    return await execution_policy.run(
+        validate_parsed_transactions, payload, size=len(payload.transactions)
     )
 
 @router.post(
@@ -118,145 +119,236 @@ async def filter_transactions(payload: FilterInput):
     Validates transactions against q, p, and k period rules to determine 
     the final modified remanent to be invested.
     """
-    valid_txs: List[FilteredTransaction] = []
-    invalid_txs: List[InvalidFilteredTransaction] = []
-    seen_dates: Set[str] = set()
-    
-    for tx in payload.transactions:
-        # --- Base Validations ---
-        if tx.amount < 0:
-            invalid_txs.append(
-                InvalidFilteredTransaction(date=tx.date, amount=tx.amount, message="Negative amounts are not allowed")
-            )
-            continue
-            
-        if tx.date in seen_dates:
-            invalid_txs.append(
-                InvalidFilteredTransaction(date=tx.date, amount=tx.amount, message="Duplicate transaction")
-            )
-            continue
-            
-        seen_dates.add(tx.date)
-        
-        # Step 1: Calculate initial ceiling and remanent
-        current_ceiling = math.ceil(tx.amount / 100.0) * 100.0
-        current_remanent = current_ceiling - tx.amount
-        
-        # Step 2: Apply Q Rules (Fixed Amount Override)
-        applicable_qs = []
-        for index, q in enumerate(payload.q):
-            if q.start <= tx.date <= q.end:
-                applicable_qs.append((index, q))
-                
-        if applicable_qs:
-            # Find the Q period with the latest start date. 
-            # On a tie, the lower original index (first in list) wins.
-            best_q = None
-            best_start = ""
-            best_idx = float('inf')
-            
-            for idx, q in applicable_qs:
-                if q.start > best_start:
-                    best_q = q
-                    best_start = q.start
-                    best_idx = idx
-                elif q.start == best_start and idx < best_idx:
-                    best_q = q
-                    best_idx = idx
-            
-            # Override remanent with the fixed amount
-            current_remanent = best_q.fixed
-            
-        # Step 3: Apply P Rules (Extra Amount Addition)
-        extra_sum = sum(
-            p.extra for p in payload.p 
-            if p.start <= tx.date <= p.end
-        )
-        current_remanent += extra_sum
-        
-        # Step 4: Group by K Periods
-        in_k_period = any(
-            k.start <= tx.date <= k.end 
-            for k in payload.k
+    result = await execution_policy.run(
+        apply_period_rules, payload, size=len(payload.transactions)
+    )
+    # Closed by the stage timing middleware once the response starts
+    begin_stage("serialization")
+    return result
+
+@router.post(
+    "/tax:batch",
+    response_model=TaxBatchResponse
+)
+async def calculate_tax_for_batch(payload: TaxBatchInput):
+    """
+    Annual income tax, NPS deduction and NPS tax benefit for a whole vector
+    of monthly wages, computed with the vectorized slab engine.
+    """
+    if len(payload.wages) > settings.TAX_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"A tax batch may contain at most {settings.TAX_BATCH_MAX_ROWS} wages"
         )
-        
-        # Build the final valid transaction
-        final_tx = FilteredTransaction(
-            date=tx.date,
-            amount=tx.amount,
-            ceiling=current_ceiling,
-            remanent=current_remanent
+    from src.services.taxServices import calculate_tax_batch
+
+    return await execution_policy.run(calculate_tax_batch, payload, size=len(payload.wages))
+
+async def _admitted_event_stream(events, current_user: User, rows: int) -> StreamingResponse:
+    """
+    The streaming engines run on the event loop slice by slice, so they go
+    through the same admission control as every other calculation.
+    """
+    try:
+        admitted_at = await admission_controller.acquire(current_user.id, rows)
+    except AdmissionRejected as exc:
+        raise _admission_error(exc)
+
+    # The admission slot is released once the stream ends, even when the client goes away early
+    return StreamingResponse(
+        admission_controller.release_after(events, admitted_at),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS
+    )
+
+@router.post("/transactions:filter:stream")
+async def filter_transactions_stream(
+    payload: FilterInput,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events version of transactions:filter: progress events with
+    the current stage and rows processed, then a result event.
+    """
+    return await _admitted_event_stream(
+        stream_filter_events(payload), current_user, len(payload.transactions)
+    )
+
+async def _calculate_returns(
+    payload: ReturnsInput,
+    investment_type: str,
+    current_user: User,
+    db: AsyncSession,
+    idempotency_key: Optional[str],
+    response: Response,
+    projection: bool = False
+) -> Union[ReturnsResponse, ProjectedReturnsResponse]:
+    from src.services.projectionServices import project_returns
+    from src.services.returnCalcServices import process_returns
+
+    # 1. Perform the calculation (only once per key / identical in-flight request),
+    #    replays and coalesced duplicates never pass through admission control
+    async def compute():
+        rows = len(payload.transactions)
+        try:
+            async with admission_controller.admit(current_user.id, rows):
+                with stage("engine"):
+                    return await execution_policy.run(process_returns, payload, investment_type, size=rows)
+        except AdmissionRejected as exc:
+            raise _admission_error(exc)
+
+    # 2. The history record is saved as part of calculate_once
+    try:
+        result, replayed = await calculate_once(
+            db, current_user.id, investment_type, payload, idempotency_key, compute
         )
-        
-        # The PDF example only attaches 'inkPeriod' if it is true
-        if in_k_period:
-            final_tx.inkPeriod = True
-            
-        valid_txs.append(final_tx)
+    except IdempotencyKeyMismatchError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+
+    # 3. Yearly curves are derived from the stored result, replays get them too
+    if projection and result._invested_amounts is not None:
+        with stage("projection"):
+            result = await execution_policy.run(
+                project_returns, result, payload, investment_type, size=len(result.savingsByDates)
+            )
+    elif projection:
+        # Replays stored without the unrounded amounts rerun the engine, which is
+        # a full calculation and goes through admission control like one
+        rows = len(payload.transactions)
+        try:
+            async with admission_controller.admit(current_user.id, rows):
+                with stage("projection"):
+                    result = await execution_policy.run(project_returns, result, payload, investment_type, size=rows)
+        except AdmissionRejected as exc:
+            raise _admission_error(exc)
 
-    return FilterResponse(valid=valid_txs, invalid=invalid_txs)
+    begin_stage("serialization")
+    return result
 
 @router.post(
     "/returns:nps", 
-    response_model=ReturnsResponse
+    response_model=Union[ProjectedReturnsResponse, ReturnsResponse]
 )
 async def calculate_nps_returns(
     payload: ReturnsInput, 
+    response: Response,
+    projection: bool = False,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # 1. Perform the calculation
-    result = process_returns(payload, investment_type="nps")
-    
-    # 2. Create the history record
-    history_record = CalculationHistory(
-        user_id=current_user.id,
-        investment_type="nps",
-        # Convert Pydantic models to dictionaries for JSONB storage
-        payload=payload.model_dump(), 
-        result=result.model_dump()
-    )
-    
-    # 3. Save to database
-    db.add(history_record)
-    await db.commit()
-    
-    return result
+    """
+    With projection=true every K period also carries its nominal and
+    inflation adjusted balance for each year until retirement.
+    """
+    return await _calculate_returns(payload, "nps", current_user, db, idempotency_key, response, projection)
 
 @router.post(
     "/returns:index", 
-    response_model=ReturnsResponse
+    response_model=Union[ProjectedReturnsResponse, ReturnsResponse]
 )
 async def calculate_index_returns(
     payload: ReturnsInput, 
+    response: Response,
+    projection: bool = False,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # 1. Perform the calculation
-    result = process_returns(payload, investment_type="index")
-    
-    # 2. Create the history record
-    history_record = CalculationHistory(
-        user_id=current_user.id,
-        investment_type="index",
-        # Convert Pydantic models to dictionaries for JSONB storage
-        payload=payload.model_dump(), 
-        result=result.model_dump()
+    """
+    With projection=true every K period also carries its nominal and
+    inflation adjusted balance for each year until retirement.
+    """
+    return await _calculate_returns(payload, "index", current_user, db, idempotency_key, response, projection)
+
+async def _stream_batch(request: Request, current_user: User, investment_type: str):
+    # Items are parsed and validated while the body streams in, it is never buffered whole
+    try:
+        items = await read_batch_items(
+            request.stream(), request.headers.get("content-type", ""), settings.BATCH_MAX_ITEMS
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BatchTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(exc))
+
+    rows = sum(len(payload.transactions) for _, payload, _ in items if payload is not None)
+    try:
+        admitted_at = await admission_controller.acquire(current_user.id, rows)
+    except AdmissionRejected as exc:
+        raise _admission_error(exc)
+
+    # The admission slot is released once the stream ends, even on a disconnect or an error
+    return StreamingResponse(
+        admission_controller.release_after(
+            stream_batch_results(current_user.id, investment_type, items), admitted_at
+        ),
+        media_type=NDJSON_MEDIA_TYPE
     )
-    
-    # 3. Save to database
-    db.add(history_record)
-    await db.commit()
-    
-    return result
+
+async def _stream_returns(payload: ReturnsInput, current_user: User, investment_type: str):
+    return await _admitted_event_stream(
+        stream_returns_events(current_user.id, investment_type, payload),
+        current_user,
+        len(payload.transactions)
+    )
+
+@router.post("/returns:nps:stream")
+async def calculate_nps_returns_stream(
+    payload: ReturnsInput,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events version of returns:nps: progress events, a savings
+    event per completed K period and the final result event.
+    """
+    return await _stream_returns(payload, current_user, "nps")
+
+@router.post("/returns:index:stream")
+async def calculate_index_returns_stream(
+    payload: ReturnsInput,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events version of returns:index: progress events, a savings
+    event per completed K period and the final result event.
+    """
+    return await _stream_returns(payload, current_user, "index")
+
+@router.post("/returns:nps:batch")
+async def calculate_nps_returns_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Calculates NPS returns for a JSON array (or NDJSON stream) of inputs and
+    streams one NDJSON result line per item as soon as it is ready.
+    """
+    return await _stream_batch(request, current_user, "nps")
+
+@router.post("/returns:index:batch")
+async def calculate_index_returns_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Calculates Index fund returns for a JSON array (or NDJSON stream) of inputs
+    and streams one NDJSON result line per item as soon as it is ready.
+    """
+    return await _stream_batch(request, current_user, "index")
 
 @router.get(
     "/history", 
     response_model=List[CalculationHistoryResponse]
 )
 async def get_user_history(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # 1. Build the query to filter by the authenticated user's ID
     statement = (
@@ -264,10 +356,81 @@ async def get_user_history(
         .where(CalculationHistory.user_id == current_user.id)
         .order_by(CalculationHistory.created_at.desc())
     )
+    # A created_at range lets Postgres skip the monthly partitions outside it
+    if since is not None:
+        statement = statement.where(CalculationHistory.created_at >= since)
+    if until is not None:
+        statement = statement.where(CalculationHistory.created_at < until)
     
     # 2. Execute the query
     result = await db.exec(statement)
     history_records = result.all()
     
     # 3. Return the list of records
-    return history_records
\ No newline at end of file
+    return history_records
+
+@router.get("/history/export")
+async def export_user_history(
+    format: Literal["csv", "parquet"] = "csv",
+    all_users: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streams the calculation history as CSV or Parquet with one row per
+    savingsByDates entry. Admins may export the history of all users.
+    """
+    if all_users and current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Only admins can export the history of all users")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires the pyarrow package")
+
+    filename = f"calculation_history.{format}"
+    return StreamingResponse(
+        export_history(None if all_users else current_user.id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get(
+    "/history/analytics/by-type",
+    response_model=List[HistoryTotals]
+)
+async def get_history_totals_by_type(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Totals invested, profit and tax benefit per investment type, aggregated in the database."""
+    return await totals_by_type(db, current_user.id)
+
+@router.get(
+    "/history/analytics/by-month",
+    response_model=List[MonthlyHistoryTotals]
+)
+async def get_history_totals_by_month(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Totals per calendar month of the calculation and investment type."""
+    return await totals_by_month(db, current_user.id)
+
+@router.get(
+    "/history/analytics/by-window",
+    response_model=List[WindowHistoryTotals]
+)
+async def get_history_totals_by_window(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Invested amount, profit and tax benefit per K window and investment type."""
+    return await totals_by_window(db, current_user.id)
+
+@router.get(
+    "/summary",
+    response_model=UserSavingsSummaryResponse
+)
+async def get_user_summary(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Lifetime invested amount, projected profit and tax benefit, maintained on every history insert."""
+    return await get_summary(db, current_user.id)
@@ -0,0 +1,16 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class HistoryTotals(BaseModel):
+    investment_type: str
+    calculations: int
+    total_invested: float
+    total_profit: float
+    total_tax_benefit: float
+
+class MonthlyHistoryTotals(HistoryTotals):
+    month: datetime
+
+class WindowHistoryTotals(HistoryTotals):
+    start: str
+    end: str
@@ -0,0 +1,19 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+class JobSubmitResponse(BaseModel):
+    job_id: uuid.UUID
+    status: str
+
+class JobStatusResponse(BaseModel):
+    job_id: uuid.UUID
+    status: str
+    investment_type: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    persist_error: Optional[str] = None
+    history_id: Optional[uuid.UUID] = None
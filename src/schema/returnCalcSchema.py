@@ -1,5 +1,11 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Upper bound of the K periods a kSpec may expand to
+MAX_K_SPEC_PERIODS = 10000
 
 class QPeriod(BaseModel):
     fixed: float
@@ -15,6 +21,45 @@ class KPeriod(BaseModel):
     start: str
     end: str
 
+def count_k_spec_periods(granularity: str, start: datetime, end: datetime) -> int:
+    """Number of calendar buckets of the granularity touched by [start, end]."""
+    if granularity == "day":
+        return (end.date() - start.date()).days + 1
+    if granularity == "week":
+        first_monday = start.date() - timedelta(days=start.weekday())
+        return (end.date() - first_monday).days // 7 + 1
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if granularity == "month":
+        return months + 1
+    if granularity == "quarter":
+        return (end.year - start.year) * 4 + (end.month - 1) // 3 - (start.month - 1) // 3 + 1
+    return end.year - start.year + 1
+
+class KSpec(BaseModel):
+    """
+    Compact K periods expanded on the server: one period per calendar day,
+    ISO week, month, quarter or year between `from` and `to`, with the first
+    and last period clipped to that range.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    granularity: Literal["day", "week", "month", "quarter", "year"]
+    start: str = Field(alias="from")
+    end: str = Field(alias="to")
+
+    @model_validator(mode="after")
+    def validate_range(self) -> "KSpec":
+        try:
+            start = datetime.strptime(self.start, DATE_FORMAT)
+            end = datetime.strptime(self.end, DATE_FORMAT)
+        except ValueError:
+            raise ValueError("Incorrect date format, should be YYYY-MM-DD HH:mm:ss")
+        if end < start:
+            raise ValueError("'to' must not be before 'from'")
+        if count_k_spec_periods(self.granularity, start, end) > MAX_K_SPEC_PERIODS:
+            raise ValueError(f"kSpec may expand to at most {MAX_K_SPEC_PERIODS} periods")
+        return self
+
 class TransactionInput(BaseModel):
     date: str
     amount: float
@@ -28,6 +73,8 @@ class ReturnsInput(BaseModel):
     q: List[QPeriod] = []
     p: List[PPeriod] = []
     k: List[KPeriod] = []
+    # Generated K periods, reported after the explicit ones in savingsByDates
+    kSpec: Optional[KSpec] = None
     transactions: List[TransactionInput]
 
 class SavingsByDate(BaseModel):
@@ -37,7 +84,33 @@ class SavingsByDate(BaseModel):
     profit: float
     taxBenefit: float
 
+class CalculationTotals(BaseModel):
+    """
+    Totals of one calculation. Every remanent inside at least one K period
+    counts once, however many (possibly overlapping) periods contain it.
+    """
+    total_invested: float
+    total_profit: float
+    total_tax_benefit: float
+
 class ReturnsResponse(BaseModel):
     totalTransactionAmount: float
     totalCeiling: float
-    savingsByDates: List[SavingsByDate]
\ No newline at end of file
+    savingsByDates: List[SavingsByDate]
+    # Unrounded invested amount per K period, set by the engine and never serialized,
+    # so results replayed from storage do not carry it
+    _invested_amounts: Optional[List[float]] = PrivateAttr(default=None)
+    # Stored with the history record, also set by the engine only
+    _totals: Optional[CalculationTotals] = PrivateAttr(default=None)
+
+class SavingsProjection(BaseModel):
+    """Balance at the end of every year from now (year 0) until retirement."""
+    years: List[int]
+    nominal: List[float]
+    real: List[float]
+
+class ProjectedSavingsByDate(SavingsByDate):
+    projection: SavingsProjection
+
+class ProjectedReturnsResponse(ReturnsResponse):
+    savingsByDates: List[ProjectedSavingsByDate]
\ No newline at end of file
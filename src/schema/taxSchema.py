@@ -0,0 +1,21 @@
+from typing import List, Optional
+from pydantic import BaseModel, model_validator
+
+class TaxBatchInput(BaseModel):
+    # Monthly wages, like ReturnsInput.wage
+    wages: List[float]
+    # Yearly NPS investment per wage, no investment when omitted
+    investments: Optional[List[float]] = None
+
+    @model_validator(mode="after")
+    def validate_lengths(self) -> "TaxBatchInput":
+        if self.investments is not None and len(self.investments) != len(self.wages):
+            raise ValueError("investments must have one entry per wage")
+        return self
+
+class TaxBatchResponse(BaseModel):
+    """Column arrays aligned with the input wages."""
+    annualIncome: List[float]
+    tax: List[float]
+    npsDeduction: List[float]
+    taxBenefit: List[float]
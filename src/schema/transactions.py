@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import List, Optional
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
 
 class ExpenseInput(BaseModel):
     date: str 
@@ -40,6 +41,20 @@ class ValidatorResponse(BaseModel):
     valid: List[TransactionParsed]
     invalid: List[InvalidTransaction]
 
+class ValidationErrorCode(IntEnum):
+    NEGATIVE = 1
+    DUPLICATE = 2
+    OVER_LIMIT = 3
+    OVER_WAGE = 4
+
+class CompactValidatorResponse(BaseModel):
+    """Row indices instead of echoed transactions, invalid rows grouped by ValidationErrorCode."""
+    total: int
+    validCount: int
+    invalid: Dict[int, List[int]]
+    # Inclusive [start, end] index ranges of valid rows, only when requested
+    validRanges: Optional[List[Tuple[int, int]]] = None
+
 class QPeriod(BaseModel):
     fixed: float
     start: str
@@ -1,4 +1,3 @@
-import bcrypt
 import jwt
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
@@ -14,13 +13,17 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/blackrock/challenge/{settings.VERSION}/login")
 
 def get_password_hash(password: str) -> str:
-    # Hash the password using bcrypt directly
+    # Hash the password using bcrypt directly (imported lazily, only auth routes need it)
+    import bcrypt
+
     salt = bcrypt.gensalt()
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password.decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # Verify using bcrypt directly
+    import bcrypt
+
     return bcrypt.checkpw(
         plain_password.encode('utf-8'), 
         hashed_password.encode('utf-8')
@@ -0,0 +1,207 @@
+import asyncio
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+from config import settings
+from src.services.stageTimer import stage
+
+class AdmissionRejected(Exception):
+    """Raised when a calculation is shed instead of admitted."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+@dataclass
+class TokenBucket:
+    capacity: float
+    refill_per_second: float
+    tokens: float
+    updated_at: float
+
+    def refill(self, now: float) -> None:
+        elapsed = max(now - self.updated_at, 0.0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Takes cost tokens and returns 0, or returns the seconds until it could."""
+        self.refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.refill_per_second
+
+    def refund(self, cost: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+class AdmissionController:
+    """
+    In-process admission control for the calculation routes. Every user has a
+    token bucket charged by payload size, and a global concurrency limit caps
+    how many calculations run at once. Requests that would wait longer than the
+    latency budget for a free slot are shed right away.
+    """
+
+    MAX_TRACKED_USERS = 10000
+
+    def __init__(
+        self,
+        user_burst: float,
+        user_refill_per_second: float,
+        rows_per_token: int,
+        max_concurrency: int,
+        latency_budget_seconds: float
+    ):
+        self.user_burst = user_burst
+        self.user_refill_per_second = user_refill_per_second
+        self.rows_per_token = rows_per_token
+        self.max_concurrency = max_concurrency
+        self.latency_budget_seconds = latency_budget_seconds
+
+        self._buckets: Dict[uuid.UUID, TokenBucket] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.queued = 0
+        # Exponentially weighted average of how long an admitted calculation runs
+        self.avg_service_seconds = 0.0
+
+        self.admitted = 0
+        self.rejected_rate_limited = 0
+        self.rejected_overloaded = 0
+
+    def cost(self, rows: int) -> float:
+        """One token per request plus one per rows_per_token transactions, capped at the burst size."""
+        return min(1.0 + rows / self.rows_per_token, self.user_burst)
+
+    def _bucket(self, user_id: uuid.UUID, now: float) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_TRACKED_USERS:
+                self._forget_idle_buckets(now)
+            bucket = TokenBucket(self.user_burst, self.user_refill_per_second, self.user_burst, now)
+            self._buckets[user_id] = bucket
+        return bucket
+
+    def _forget_idle_buckets(self, now: float) -> None:
+        # A bucket that would be full again carries no state worth keeping
+        refill_time = self.user_burst / self.user_refill_per_second
+        for user_id in [u for u, b in self._buckets.items() if now - b.updated_at >= refill_time]:
+            del self._buckets[user_id]
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    def _expected_wait(self) -> float:
+        if self.active < self.max_concurrency:
+            return 0.0
+        return (self.queued + 1) * self.avg_service_seconds / self.max_concurrency
+
+    async def acquire(self, user_id: uuid.UUID, rows: int) -> float:
+        """Admits one calculation or raises AdmissionRejected. Returns the admission time."""
+        now = time.monotonic()
+        cost = self.cost(rows)
+
+        # 1. Per-user rate limit weighted by payload size
+        bucket = self._bucket(user_id, now)
+        wait = bucket.take(cost, now)
+        if wait > 0:
+            self.rejected_rate_limited += 1
+            raise AdmissionRejected(429, "Too many calculation requests, slow down", wait)
+
+        # 2. Global concurrency limit with a latency budget for the queue time
+        expected_wait = self._expected_wait()
+        if expected_wait > self.latency_budget_seconds:
+            bucket.refund(cost)
+            self.rejected_overloaded += 1
+            raise AdmissionRejected(503, "Calculation capacity exhausted, retry later", expected_wait)
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._get_slots().acquire(), timeout=self.latency_budget_seconds)
+        except asyncio.TimeoutError:
+            bucket.refund(cost)
+            self.rejected_overloaded += 1
+            raise AdmissionRejected(
+                503, "Calculation capacity exhausted, retry later", self.avg_service_seconds or 1.0
+            )
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    def release(self, admitted_at: float) -> None:
+        service_seconds = time.monotonic() - admitted_at
+        self.avg_service_seconds = (
+            service_seconds if self.avg_service_seconds == 0.0
+            else 0.8 * self.avg_service_seconds + 0.2 * service_seconds
+        )
+        self.active -= 1
+        self._get_slots().release()
+
+    async def release_after(self, stream: AsyncIterator[bytes], admitted_at: float) -> AsyncIterator[bytes]:
+        """
+        Relays a response body and frees the slot however the stream ends. A
+        StreamingResponse background task is skipped when the client
+        disconnects or the body raises, which would leak the slot.
+        """
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self.release(admitted_at)
+
+    @asynccontextmanager
+    async def admit(self, user_id: uuid.UUID, rows: int):
+        with stage("admission"):
+            admitted_at = await self.acquire(user_id, rows)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "maxConcurrency": self.max_concurrency,
+            "latencyBudgetMs": round(self.latency_budget_seconds * 1000),
+            "avgServiceMs": round(self.avg_service_seconds * 1000, 2),
+            "admitted": self.admitted,
+            "rejectedRateLimited": self.rejected_rate_limited,
+            "rejectedOverloaded": self.rejected_overloaded,
+            "trackedUsers": len(self._buckets)
+        }
+
+    def user_snapshot(self, user_id: uuid.UUID) -> dict:
+        now = time.monotonic()
+        bucket = self._bucket(user_id, now)
+        bucket.refill(now)
+        return {
+            "tokens": round(bucket.tokens, 2),
+            "capacity": bucket.capacity,
+            "refillPerSecond": bucket.refill_per_second,
+            "rowsPerToken": self.rows_per_token
+        }
+
+admission_controller = AdmissionController(
+    user_burst=settings.ADMISSION_USER_BURST,
+    user_refill_per_second=settings.ADMISSION_USER_REFILL_PER_SECOND,
+    rows_per_token=settings.ADMISSION_ROWS_PER_TOKEN,
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    latency_budget_seconds=settings.ADMISSION_LATENCY_BUDGET_MS / 1000.0
+)
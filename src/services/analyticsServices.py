@@ -0,0 +1,87 @@
+import uuid
+from typing import List
+
+from sqlalchemy import Float, cast, column, func, true
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models.history import CalculationHistory
+from src.schema.analyticsSchema import (
+    HistoryTotals,
+    MonthlyHistoryTotals,
+    WindowHistoryTotals
+)
+
+# Every history row is expanded into its savingsByDates entries inside Postgres,
+# so aggregates never have to ship raw JSONB rows to Python.
+savings_entries = (
+    func.jsonb_array_elements(CalculationHistory.result["savingsByDates"])
+    .table_valued(column("value", JSONB))
+    .lateral("savings")
+)
+
+def savings_field(name: str):
+    return cast(savings_entries.c.value[name].astext, Float)
+
+def _calculation_columns():
+    # K windows may overlap, so the totals come from the per-calculation columns
+    # (every remanent counted once) instead of adding up the window amounts
+    return (
+        func.count(CalculationHistory.id).label("calculations"),
+        func.coalesce(func.sum(CalculationHistory.total_invested), 0.0).label("total_invested"),
+        func.coalesce(func.sum(CalculationHistory.total_profit), 0.0).label("total_profit"),
+        func.coalesce(func.sum(CalculationHistory.total_tax_benefit), 0.0).label("total_tax_benefit")
+    )
+
+def _window_columns():
+    return (
+        func.count(func.distinct(CalculationHistory.id)).label("calculations"),
+        func.coalesce(func.sum(savings_field("amount")), 0.0).label("total_invested"),
+        func.coalesce(func.sum(savings_field("profit")), 0.0).label("total_profit"),
+        func.coalesce(func.sum(savings_field("taxBenefit")), 0.0).label("total_tax_benefit")
+    )
+
+def totals_by_type_statement(user_id: uuid.UUID):
+    return (
+        select(CalculationHistory.investment_type, *_calculation_columns())
+        .where(CalculationHistory.user_id == user_id)
+        .group_by(CalculationHistory.investment_type)
+        .order_by(CalculationHistory.investment_type)
+    )
+
+def totals_by_month_statement(user_id: uuid.UUID):
+    month = func.date_trunc("month", CalculationHistory.created_at).label("month")
+    return (
+        select(month, CalculationHistory.investment_type, *_calculation_columns())
+        .where(CalculationHistory.user_id == user_id)
+        .group_by(month, CalculationHistory.investment_type)
+        .order_by(month, CalculationHistory.investment_type)
+    )
+
+def totals_by_window_statement(user_id: uuid.UUID):
+    start = savings_entries.c.value["start"].astext.label("start")
+    end = savings_entries.c.value["end"].astext.label("end")
+    return (
+        select(start, end, CalculationHistory.investment_type, *_window_columns())
+        .select_from(CalculationHistory)
+        .join(savings_entries, true())
+        .where(CalculationHistory.user_id == user_id)
+        .group_by(start, end, CalculationHistory.investment_type)
+        .order_by(start, end, CalculationHistory.investment_type)
+    )
+
+async def totals_by_type(db: AsyncSession, user_id: uuid.UUID) -> List[HistoryTotals]:
+    """Counts the calculations and sums invested amount, profit and tax benefit per investment type."""
+    result = await db.exec(totals_by_type_statement(user_id))
+    return [HistoryTotals(**row._mapping) for row in result.all()]
+
+async def totals_by_month(db: AsyncSession, user_id: uuid.UUID) -> List[MonthlyHistoryTotals]:
+    """Same totals per calendar month of the calculation and investment type."""
+    result = await db.exec(totals_by_month_statement(user_id))
+    return [MonthlyHistoryTotals(**row._mapping) for row in result.all()]
+
+async def totals_by_window(db: AsyncSession, user_id: uuid.UUID) -> List[WindowHistoryTotals]:
+    """Sums invested amount, profit and tax benefit per K window (start, end) and investment type."""
+    result = await db.exec(totals_by_window_statement(user_id))
+    return [WindowHistoryTotals(**row._mapping) for row in result.all()]
@@ -0,0 +1,332 @@
+import asyncio
+import codecs
+import json
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from config import settings
+from src.connection.session import AsyncSessionLocal
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.services.historyServices import save_calculations
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# (index in the request, validated payload or None, validation errors or None)
+BatchItem = Tuple[int, Optional[ReturnsInput], Optional[list]]
+# (index in the request, result or None, error message or None)
+BatchOutcome = Tuple[int, Optional[ReturnsResponse], Optional[str]]
+
+def _validate_item(index: int, raw) -> BatchItem:
+    try:
+        return index, ReturnsInput.model_validate(raw), None
+    except ValidationError as exc:
+        return index, None, exc.errors(include_url=False, include_context=False)
+
+class BatchTooLargeError(Exception):
+    """Raised as soon as a batch holds more items than allowed."""
+
+# Characters that change the nesting of a JSON value, and those that end a string run
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_STRING_END = re.compile(r'["\\]')
+# A number or literal ends at the next separator
+_SCALAR_END = re.compile(r'[\s,\]]')
+_NON_SPACE = re.compile(r'\S')
+
+class BatchItemParser:
+    """
+    Incremental parser for a JSON array or an NDJSON body. Every item is
+    validated as soon as its closing bracket or line end arrives, so the raw
+    body is never held in full and one malformed entry never fails the batch.
+
+    Bracket depth and string/escape state are carried across chunks, so each
+    character is scanned once and an item split over many chunks is joined
+    and decoded only once it is complete.
+    """
+
+    def __init__(self, content_type: str):
+        self.ndjson = content_type.split(";")[0].strip() == NDJSON_MEDIA_TYPE
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        # Pieces of the current incomplete item (or NDJSON line)
+        self._pending: List[str] = []
+        self._index = 0
+        # JSON array state: "start", "value_or_end", "value", "comma_or_end" or "end"
+        self._expect = "start"
+        # Scan state of the array item in progress, if any
+        self._in_value = False
+        self._scalar = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: bytes) -> List[BatchItem]:
+        return self._drain(chunk, final=False)
+
+    def close(self) -> List[BatchItem]:
+        items = self._drain(b"", final=True)
+        if not self.ndjson and self._expect != "end":
+            raise ValueError("Request body is not valid JSON: the array is not terminated")
+        return items
+
+    def _next_item(self, raw) -> BatchItem:
+        item = _validate_item(self._index, raw)
+        self._index += 1
+        return item
+
+    def _drain(self, chunk: bytes, final: bool) -> List[BatchItem]:
+        try:
+            text = self._text.decode(chunk, final=final)
+        except UnicodeDecodeError as exc:
+            raise ValueError(f"Request body is not valid UTF-8: {exc}")
+        return self._drain_lines(text, final) if self.ndjson else self._drain_array(text, final)
+
+    def _drain_lines(self, text: str, final: bool) -> List[BatchItem]:
+        pieces = text.split("\n")
+        self._pending.append(pieces[0])
+        lines = []
+        if len(pieces) > 1:
+            lines = ["".join(self._pending)] + pieces[1:-1]
+            # The last line may still be incomplete
+            self._pending = [pieces[-1]]
+        if final:
+            lines.append("".join(self._pending))
+            self._pending = []
+
+        items = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as exc:
+                items.append((self._index, None, [{"type": "json_invalid", "msg": str(exc)}]))
+                self._index += 1
+                continue
+            items.append(self._next_item(raw))
+        return items
+
+    def _begin_value(self, char: str) -> None:
+        self._in_value = True
+        self._scalar = char not in '{["'
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _scan_value(self, text: str, position: int, final: bool) -> Optional[int]:
+        """End of the array item in progress within text, None if it continues past it."""
+        if self._scalar:
+            match = _SCALAR_END.search(text, position)
+            if match:
+                return match.start()
+            return len(text) if final else None
+
+        if self._escape:
+            if position == len(text):
+                return None
+            self._escape, position = False, position + 1
+        while True:
+            if self._in_string:
+                match = _STRING_END.search(text, position)
+                if not match:
+                    return None
+                position = match.end()
+                if match.group() == "\\":
+                    # The escaped character may be the first one of the next chunk
+                    if position == len(text):
+                        self._escape = True
+                        return None
+                    position += 1
+                    continue
+                self._in_string = False
+                if self._depth == 0:
+                    return position
+            else:
+                match = _STRUCTURE.search(text, position)
+                if not match:
+                    return None
+                position = match.end()
+                char = match.group()
+                if char == '"':
+                    self._in_string = True
+                elif char in "[{":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        return position
+
+    def _drain_array(self, text: str, final: bool) -> List[BatchItem]:
+        position, items = 0, []
+        while True:
+            if self._in_value:
+                end = self._scan_value(text, position, final)
+                if end is None:
+                    if final:
+                        raise ValueError(f"Request body is not valid JSON: item {self._index} is not terminated")
+                    self._pending.append(text[position:])
+                    break
+                self._pending.append(text[position:end])
+                raw_item, self._pending, self._in_value = "".join(self._pending), [], False
+                try:
+                    raw = json.loads(raw_item)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Request body is not valid JSON: {exc}")
+                items.append(self._next_item(raw))
+                self._expect, position = "comma_or_end", end
+                continue
+
+            match = _NON_SPACE.search(text, position)
+            if not match:
+                break
+            position = match.start()
+
+            char = text[position]
+            if self._expect == "end":
+                raise ValueError("Request body is not valid JSON: extra data after the array")
+            if self._expect == "start":
+                if char != "[":
+                    raise ValueError("Request body must be a JSON array of returns inputs")
+                self._expect, position = "value_or_end", position + 1
+            elif self._expect == "comma_or_end":
+                if char not in ",]":
+                    raise ValueError(f"Request body is not valid JSON: expected ',' or ']' at item {self._index}")
+                self._expect, position = ("value" if char == "," else "end"), position + 1
+            elif char == "]" and self._expect == "value_or_end":
+                self._expect, position = "end", position + 1
+            else:
+                self._begin_value(char)
+
+        return items
+
+def parse_batch_items(body: bytes, content_type: str) -> List[BatchItem]:
+    """Parses a complete JSON array or NDJSON body into individually validated items."""
+    parser = BatchItemParser(content_type)
+    return parser.feed(body) + parser.close()
+
+async def read_batch_items(chunks: AsyncIterator[bytes], content_type: str, max_items: int) -> List[BatchItem]:
+    """
+    Parses the body while it streams in. Only the current incomplete item is
+    buffered, and validation work is interleaved with reading the next chunk.
+    """
+    parser = BatchItemParser(content_type)
+    items: List[BatchItem] = []
+    async for chunk in chunks:
+        items.extend(parser.feed(chunk))
+        if len(items) > max_items:
+            raise BatchTooLargeError(f"A batch may contain at most {max_items} items")
+    items.extend(parser.close())
+    if len(items) > max_items:
+        raise BatchTooLargeError(f"A batch may contain at most {max_items} items")
+    return items
+
+def _process_chunk(chunk: List[Tuple[int, ReturnsInput]], investment_type: str) -> List[BatchOutcome]:
+    """Worker entry point, runs a chunk of calculations inside a pool process."""
+    from src.services.returnCalcServices import process_returns
+
+    outcomes = []
+    for index, payload in chunk:
+        try:
+            outcomes.append((index, process_returns(payload, investment_type), None))
+        except Exception as exc:
+            outcomes.append((index, None, str(exc) or exc.__class__.__name__))
+    return outcomes
+
+class BatchRunner:
+    """Fans batch items out over a process pool in fixed-size chunks."""
+
+    def __init__(self, max_workers: int, chunk_size: int):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(
+        self,
+        items: List[Tuple[int, ReturnsInput]],
+        investment_type: str
+    ) -> AsyncIterator[List[BatchOutcome]]:
+        """Yields the outcomes of every chunk as soon as that chunk completes."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        futures = [
+            loop.run_in_executor(
+                executor, _process_chunk, items[start:start + self.chunk_size], investment_type
+            )
+            for start in range(0, len(items), self.chunk_size)
+        ]
+        for finished in asyncio.as_completed(futures):
+            yield await finished
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+batch_runner = BatchRunner(
+    max_workers=settings.BATCH_WORKERS,
+    chunk_size=settings.BATCH_CHUNK_SIZE
+)
+
+PersistBatchFn = Callable[[uuid.UUID, str, List[Tuple[ReturnsInput, ReturnsResponse]]], Awaitable[int]]
+
+async def persist_batch(
+    user_id: uuid.UUID,
+    investment_type: str,
+    calculations: List[Tuple[ReturnsInput, ReturnsResponse]]
+) -> int:
+    async with AsyncSessionLocal() as db:
+        return await save_calculations(db, user_id, investment_type, calculations)
+
+def _ndjson_line(data: dict) -> bytes:
+    return (json.dumps(data, default=str) + "\n").encode("utf-8")
+
+async def stream_batch_results(
+    user_id: uuid.UUID,
+    investment_type: str,
+    items: List[BatchItem],
+    runner: BatchRunner = batch_runner,
+    persist: PersistBatchFn = persist_batch
+) -> AsyncIterator[bytes]:
+    """
+    Streams one NDJSON line per item in completion order, followed by a summary
+    line once every successful result has been written with one bulk insert.
+    """
+    payloads = {}
+    succeeded: List[Tuple[ReturnsInput, ReturnsResponse]] = []
+    failed = 0
+
+    # 1. Items that failed validation are reported right away
+    for index, payload, errors in items:
+        if payload is None:
+            failed += 1
+            yield _ndjson_line({"index": index, "status": "error", "errors": errors})
+        else:
+            payloads[index] = payload
+
+    # 2. Valid items are calculated in the pool and streamed as chunks finish
+    if payloads:
+        async for outcomes in runner.run(list(payloads.items()), investment_type):
+            for index, result, error in outcomes:
+                if result is None:
+                    failed += 1
+                    yield _ndjson_line({"index": index, "status": "error", "errors": [{"msg": error}]})
+                else:
+                    succeeded.append((payloads[index], result))
+                    yield _ndjson_line({"index": index, "status": "ok", "result": result.model_dump()})
+
+    # 3. Save all successful calculations to the history in one go
+    summary = {"total": len(items), "succeeded": len(succeeded), "failed": failed, "saved": 0}
+    if succeeded:
+        try:
+            summary["saved"] = await persist(user_id, investment_type, succeeded)
+        except Exception as exc:
+            summary["saveError"] = str(exc) or exc.__class__.__name__
+
+    yield _ndjson_line({"summary": summary})
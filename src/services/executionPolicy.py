@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import settings
+from src.services.stageTimer import current_timings, run_with_stage_timings
+
+# Set while a request is profiled, cProfile only sees the event loop thread
+_run_inline: ContextVar[bool] = ContextVar("run_inline", default=False)
+
+@contextmanager
+def inline_execution():
+    """Keeps every engine call of the current request on the event loop."""
+    token = _run_inline.set(True)
+    try:
+        yield
+    finally:
+        _run_inline.reset(token)
+
+class ExecutionPolicy:
+    """
+    Decides where CPU-bound engine work runs. Payloads with fewer rows than
+    the inline threshold run directly on the event loop, larger ones are
+    dispatched to a thread or process pool so small requests are not blocked.
+    """
+
+    def __init__(self, inline_threshold: int, mode: str, max_workers: int):
+        if mode not in ("thread", "process"):
+            raise ValueError("Execution pool mode must be 'thread' or 'process'")
+
+        self.inline_threshold = inline_threshold
+        self.mode = mode
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+
+        # Counters reported through the /performance router
+        self.inline_calls = 0
+        self.offloaded_calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated_calls = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="engine"
+                )
+        return self._executor
+
+    def should_offload(self, size: int) -> bool:
+        return size >= self.inline_threshold
+
+    async def run(self, func: Callable[..., Any], *args: Any, size: int) -> Any:
+        """Runs func(*args) inline or in the pool depending on the payload size."""
+        if not self.should_offload(size) or _run_inline.get():
+            self.inline_calls += 1
+            return func(*args)
+
+        self.offloaded_calls += 1
+        # Every offloaded call beyond the worker count has to wait for a free worker
+        if self.in_flight >= self.max_workers:
+            self.saturated_calls += 1
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            timings = current_timings()
+            if timings is None:
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+
+            # Workers do not share the request context, their stage timings come back with the result
+            result, stages = await loop.run_in_executor(
+                self._get_executor(), run_with_stage_timings, func, *args
+            )
+            timings.merge(stages)
+            return result
+        finally:
+            self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "inlineThreshold": self.inline_threshold,
+            "inlineCalls": self.inline_calls,
+            "offloadedCalls": self.offloaded_calls,
+            "inFlight": self.in_flight,
+            "queued": max(self.in_flight - self.max_workers, 0),
+            "peakInFlight": self.peak_in_flight,
+            "saturatedCalls": self.saturated_calls
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+execution_policy = ExecutionPolicy(
+    inline_threshold=settings.EXECUTION_INLINE_THRESHOLD,
+    mode=settings.EXECUTION_POOL,
+    max_workers=settings.EXECUTION_WORKERS
+)
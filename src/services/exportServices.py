@@ -0,0 +1,184 @@
+import csv
+import io
+import uuid
+from typing import AsyncIterator, Iterable, List, Optional
+
+from sqlalchemy import tuple_
+from sqlmodel import select
+
+from config import settings
+from src.connection.session import REPLICA_ERRORS, ReadSessionRouter, read_sessions
+from src.models.history import CalculationHistory
+
+EXPORT_COLUMNS = [
+    "history_id",
+    "user_id",
+    "investment_type",
+    "created_at",
+    "total_transaction_amount",
+    "total_ceiling",
+    "window_start",
+    "window_end",
+    "amount",
+    "profit",
+    "tax_benefit"
+]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+def flatten_history_row(history_id, user_id, investment_type, created_at, result: Optional[dict]) -> List[list]:
+    """Turns one history row into one export row per savingsByDates entry."""
+    result = result or {}
+    base = [
+        str(history_id),
+        str(user_id),
+        investment_type,
+        created_at.isoformat(),
+        result.get("totalTransactionAmount"),
+        result.get("totalCeiling")
+    ]
+
+    savings = result.get("savingsByDates") or []
+    if not savings:
+        return [base + [None, None, None, None, None]]
+
+    return [
+        base + [
+            entry.get("start"),
+            entry.get("end"),
+            entry.get("amount"),
+            entry.get("profit"),
+            entry.get("taxBenefit")
+        ]
+        for entry in savings
+    ]
+
+async def _stream_history_rows(
+    user_id: Optional[uuid.UUID],
+    chunk_size: int,
+    sessions: ReadSessionRouter = read_sessions
+) -> AsyncIterator[List[list]]:
+    """
+    Yields flattened export rows chunk by chunk through a server-side cursor.
+    A replica failing while the cursor is read cannot be retried by the
+    session, so the export resumes on the primary after the last row it sent.
+    """
+    last_key = None
+    while True:
+        statement = (
+            select(
+                CalculationHistory.id,
+                CalculationHistory.user_id,
+                CalculationHistory.investment_type,
+                CalculationHistory.created_at,
+                CalculationHistory.result
+            )
+            # Unique order, so a resumed cursor neither repeats nor skips rows
+            .order_by(CalculationHistory.created_at, CalculationHistory.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if user_id is not None:
+            statement = statement.where(CalculationHistory.user_id == user_id)
+        if last_key is not None:
+            statement = statement.where(tuple_(CalculationHistory.created_at, CalculationHistory.id) > last_key)
+
+        async with sessions.session() as db:
+            try:
+                result = await db.stream(statement)
+                async for partition in result.partitions():
+                    rows = []
+                    for row in partition:
+                        rows.extend(flatten_history_row(*row))
+                    last_key = (partition[-1].created_at, partition[-1].id)
+                    yield rows
+                return
+            except REPLICA_ERRORS:
+                if not getattr(db, "on_replica", False):
+                    raise
+                # Skips the replica for the retry window, so the next session is the primary
+                sessions.replica_failed()
+
+def _csv_chunk(rows: Iterable[list]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+async def stream_csv(chunks: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    yield _csv_chunk([EXPORT_COLUMNS])
+    async for rows in chunks:
+        yield _csv_chunk(rows)
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes can be taken out after every row group."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+async def stream_parquet(chunks: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    """Writes every chunk as its own Parquet row group, so memory stays bounded by the chunk size."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("history_id", pa.string()),
+        ("user_id", pa.string()),
+        ("investment_type", pa.string()),
+        ("created_at", pa.string()),
+        ("total_transaction_amount", pa.float64()),
+        ("total_ceiling", pa.float64()),
+        ("window_start", pa.string()),
+        ("window_end", pa.string()),
+        ("amount", pa.float64()),
+        ("profit", pa.float64()),
+        ("tax_benefit", pa.float64())
+    ])
+
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in chunks:
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def export_history(user_id: Optional[uuid.UUID], export_format: str) -> AsyncIterator[bytes]:
+    """Streams the history of one user (or of everybody when user_id is None)."""
+    chunks = _stream_history_rows(user_id, settings.EXPORT_CHUNK_SIZE)
+    if export_format == "parquet":
+        return stream_parquet(chunks)
+    return stream_csv(chunks)
@@ -0,0 +1,88 @@
+import uuid
+from typing import List, Tuple
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models.history import CalculationHistory
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.services.summaryServices import add_to_summary
+
+def history_record(
+    user_id: uuid.UUID,
+    investment_type: str,
+    payload: ReturnsInput,
+    result: ReturnsResponse
+) -> CalculationHistory:
+    """Builds the history row of a calculation, including its engine totals."""
+    return CalculationHistory(
+        user_id=user_id,
+        investment_type=investment_type,
+        # Convert Pydantic models to dictionaries for JSONB storage
+        payload=payload.model_dump(),
+        result=result.model_dump(),
+        **result._totals.model_dump()
+    )
+
+async def save_calculation(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    investment_type: str,
+    payload: ReturnsInput,
+    result: ReturnsResponse
+) -> CalculationHistory:
+    """
+    Stores a finished returns calculation in the user's calculation history and
+    updates the user's savings summary in the same transaction.
+    """
+    record = history_record(user_id, investment_type, payload, result)
+
+    db.add(record)
+    await add_to_summary(db, user_id, [result])
+    await db.commit()
+
+    return record
+
+async def save_calculations(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    investment_type: str,
+    calculations: List[Tuple[ReturnsInput, ReturnsResponse]]
+) -> int:
+    """Stores many finished calculations of one user with a single bulk insert."""
+    history_records = [
+        history_record(user_id, investment_type, payload, result)
+        for payload, result in calculations
+    ]
+
+    db.add_all(history_records)
+    await add_to_summary(db, user_id, [result for _, result in calculations])
+    await db.commit()
+
+    return len(history_records)
+
+async def backfill_totals(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Computes the engine totals of history rows stored before the columns
+    existed. Every batch is committed on its own, so an interrupted run
+    resumes where it stopped.
+    """
+    from src.services.returnCalcServices import process_returns
+
+    backfilled = 0
+    while True:
+        result = await db.exec(
+            select(CalculationHistory)
+            .where(CalculationHistory.total_invested.is_(None))
+            .order_by(CalculationHistory.created_at, CalculationHistory.id)
+            .limit(batch_size)
+        )
+        records = result.all()
+        if not records:
+            return backfilled
+
+        for record in records:
+            calculation = process_returns(ReturnsInput.model_validate(record.payload), record.investment_type)
+            for name, value in calculation._totals.model_dump().items():
+                setattr(record, name, value)
+        await db.commit()
+        backfilled += len(records)
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from config import settings
+from src.models.idempotency import IdempotencyRecord
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.services.historyServices import save_calculation
+from src.services.stageTimer import stage
+
+T = TypeVar("T")
+
+class IdempotencyKeyMismatchError(Exception):
+    """Raised when an Idempotency-Key is reused with a different request."""
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    work, every caller arriving while it is in flight awaits the same result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Returns the result and whether it was shared from another caller."""
+        call = self._calls.get(key)
+        if call is not None:
+            return await asyncio.shield(call), True
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as exc:
+            call.set_exception(exc)
+            # Mark the exception as retrieved in case nobody else was waiting
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(key, None)
+
+single_flight = SingleFlight()
+
+def request_fingerprint(investment_type: str, payload: ReturnsInput) -> str:
+    body = json.dumps(
+        {"investment_type": investment_type, "payload": payload.model_dump()},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+async def _load_record(db: AsyncSession, user_id: uuid.UUID, key: str) -> Optional[IdempotencyRecord]:
+    result = await db.exec(
+        select(IdempotencyRecord).where(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.expires_at > datetime.utcnow()
+        )
+    )
+    return result.first()
+
+def _replay(record: IdempotencyRecord, request_hash: str) -> ReturnsResponse:
+    if record.request_hash != request_hash:
+        raise IdempotencyKeyMismatchError(
+            "Idempotency-Key was already used with a different request payload"
+        )
+    result = ReturnsResponse.model_validate(record.response)
+    result._invested_amounts = record.invested_amounts
+    return result
+
+async def calculate_once(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    investment_type: str,
+    payload: ReturnsInput,
+    idempotency_key: Optional[str],
+    compute: Callable[[], Awaitable[ReturnsResponse]]
+) -> Tuple[ReturnsResponse, bool]:
+    """
+    Runs and stores a returns calculation at most once per Idempotency-Key and
+    once per set of identical in-flight requests. Returns the result and
+    whether it was replayed instead of freshly computed.
+    """
+    request_hash = request_fingerprint(investment_type, payload)
+
+    # 1. A stored response for this key is replayed without any computation
+    if idempotency_key:
+        with stage("idempotency"):
+            record = await _load_record(db, user_id, idempotency_key)
+        if record is not None:
+            return _replay(record, request_hash), True
+
+    async def compute_and_store() -> Tuple[ReturnsResponse, bool]:
+        result = await compute()
+
+        if idempotency_key:
+            now = datetime.utcnow()
+            await db.exec(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.user_id == user_id,
+                    IdempotencyRecord.expires_at <= now
+                )
+            )
+            # Committed together with the history record below
+            db.add(IdempotencyRecord(
+                user_id=user_id,
+                key=idempotency_key,
+                investment_type=investment_type,
+                request_hash=request_hash,
+                response=result.model_dump(),
+                invested_amounts=result._invested_amounts,
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+            ))
+
+        try:
+            with stage("history"):
+                await save_calculation(db, user_id, investment_type, payload, result)
+        except IntegrityError:
+            # Another worker process stored the same key first, use its response
+            if not idempotency_key:
+                raise
+            await db.rollback()
+            record = await _load_record(db, user_id, idempotency_key)
+            if record is None:
+                raise
+            return _replay(record, request_hash), True
+
+        return result, False
+
+    # 2. Identical concurrent requests share a single computation and write
+    flight_key = (user_id, investment_type, request_hash, idempotency_key)
+    (result, replayed), shared = await single_flight.do(flight_key, compute_and_store)
+    return result, replayed or shared
@@ -0,0 +1,171 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional
+
+from config import settings
+from src.connection.session import AsyncSessionLocal
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.services.historyServices import save_calculation
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobQueueFullError(Exception):
+    """Raised when the global job queue has no free slots left."""
+
+class UserJobLimitError(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+@dataclass
+class Job:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    investment_type: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ReturnsResponse] = None
+    error: Optional[str] = None
+    persist_error: Optional[str] = None
+    history_id: Optional[uuid.UUID] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+PersistFn = Callable[[uuid.UUID, str, ReturnsInput, ReturnsResponse], Awaitable[Optional[uuid.UUID]]]
+
+async def persist_to_history(
+    user_id: uuid.UUID,
+    investment_type: str,
+    payload: ReturnsInput,
+    result: ReturnsResponse
+) -> uuid.UUID:
+    """Writes a completed job into calculation_history using its own session."""
+    async with AsyncSessionLocal() as db:
+        record = await save_calculation(db, user_id, investment_type, payload, result)
+        return record.id
+
+class JobManager:
+    """
+    Runs returns calculations in a process pool so the event loop stays free.
+    The queue is bounded globally and every user can only have a limited number
+    of queued or running jobs at the same time.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_size: int,
+        max_per_user: int,
+        result_ttl_seconds: int,
+        persist: PersistFn = persist_to_history
+    ):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.max_per_user = max_per_user
+        self.result_ttl_seconds = result_ttl_seconds
+        self._persist = persist
+        self._jobs: Dict[uuid.UUID, Job] = {}
+        self._tasks: Dict[uuid.UUID, asyncio.Task] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # The pool is created lazily so importing the app never forks workers
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def _prune_finished(self) -> None:
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if not job.is_active and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def active_count(self, user_id: Optional[uuid.UUID] = None) -> int:
+        return sum(
+            1 for job in self._jobs.values()
+            if job.is_active and (user_id is None or job.user_id == user_id)
+        )
+
+    async def submit(self, user_id: uuid.UUID, investment_type: str, payload: ReturnsInput) -> Job:
+        self._prune_finished()
+
+        if self.active_count() >= self.queue_size:
+            raise JobQueueFullError("Job queue is full, please retry later")
+        if self.active_count(user_id) >= self.max_per_user:
+            raise UserJobLimitError(
+                f"A maximum of {self.max_per_user} concurrent jobs is allowed per user"
+            )
+
+        job = Job(id=uuid.uuid4(), user_id=user_id, investment_type=investment_type)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, payload))
+        return job
+
+    async def _run(self, job: Job, payload: ReturnsInput) -> None:
+        # The numpy-backed engine is imported on first use to keep it off the startup path
+        from src.services.returnCalcServices import process_returns
+
+        try:
+            async with self._get_slots():
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self._get_executor(), process_returns, payload, job.investment_type
+                )
+
+                job.result = result
+
+            # A failed history write is reported on its own, the result stays fetchable
+            try:
+                job.history_id = await self._persist(job.user_id, job.investment_type, payload, result)
+            except Exception as exc:
+                job.persist_error = str(exc) or exc.__class__.__name__
+            job.status = JobStatus.COMPLETED
+        except Exception as exc:
+            job.error = str(exc) or exc.__class__.__name__
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+
+    def get(self, job_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Job]:
+        """Returns the job only if it belongs to the given user."""
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+job_manager = JobManager(
+    max_workers=settings.JOB_WORKERS,
+    queue_size=settings.JOB_QUEUE_SIZE,
+    max_per_user=settings.JOB_MAX_PER_USER,
+    result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS
+)
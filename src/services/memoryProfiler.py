@@ -0,0 +1,217 @@
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import tracemalloc
+
+def _snapshot_filters() -> list:
+    import tracemalloc
+
+    # Allocations made by tracemalloc itself would otherwise dominate every snapshot
+    return [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")
+    ]
+
+class MemoryTracingNotStartedError(Exception):
+    """Raised when a snapshot is requested while tracemalloc is not tracing."""
+
+class MemorySnapshotNotFoundError(Exception):
+    """Raised when a snapshot id is unknown or was evicted."""
+
+def _stat_entry(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "sizeBytes": stat.size,
+        "count": stat.count,
+        "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback] if len(stat.traceback) > 1 else None
+    }
+
+def _diff_entry(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "sizeBytes": stat.size,
+        "sizeDiffBytes": stat.size_diff,
+        "count": stat.count,
+        "countDiff": stat.count_diff
+    }
+
+@dataclass
+class RoutePeak:
+    requests: int = 0
+    total_peak_bytes: int = 0
+    max_peak_bytes: int = 0
+    last_peak_bytes: int = 0
+
+    def observe(self, peak_bytes: int) -> None:
+        self.requests += 1
+        self.total_peak_bytes += peak_bytes
+        self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+        self.last_peak_bytes = peak_bytes
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "avgPeakBytes": self.total_peak_bytes // self.requests if self.requests else 0,
+            "maxPeakBytes": self.max_peak_bytes,
+            "lastPeakBytes": self.last_peak_bytes
+        }
+
+class MemoryDiagnostics:
+    """
+    On-demand tracemalloc diagnostics. While tracing, named snapshots can be
+    taken and compared, and the middleware records the peak traced memory of
+    every request per route. Tracing slows allocations down noticeably, so it
+    is off until started through the /performance router, which is also
+    when tracemalloc is imported: it stays off the startup path.
+    """
+
+    MAX_SNAPSHOTS = 10
+
+    def __init__(self):
+        self._snapshots: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 1
+        self._routes: Dict[str, RoutePeak] = {}
+        self.in_flight = 0
+        self.overlapped_requests = 0
+        self._overlap = False
+
+    @property
+    def tracing(self) -> bool:
+        # Nothing can have started tracing before tracemalloc was imported
+        tracemalloc = sys.modules.get("tracemalloc")
+        return tracemalloc is not None and tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> dict:
+        import tracemalloc
+
+        if not self.tracing:
+            tracemalloc.start(frames)
+            self._routes.clear()
+        return self.status()
+
+    def stop(self) -> dict:
+        import tracemalloc
+
+        # Snapshots stay readable after tracing stops
+        tracemalloc.stop()
+        return self.status()
+
+    def status(self) -> dict:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory() if self.tracing else (0, 0)
+        return {
+            "tracing": self.tracing,
+            "frames": tracemalloc.get_traceback_limit() if self.tracing else 0,
+            "currentBytes": current,
+            "peakBytes": peak,
+            "overheadBytes": tracemalloc.get_tracemalloc_memory() if self.tracing else 0,
+            "snapshots": [
+                {"id": snapshot_id, "label": label, "takenAt": taken_at}
+                for snapshot_id, (label, taken_at, _) in self._snapshots.items()
+            ]
+        }
+
+    def take_snapshot(self, label: Optional[str] = None) -> int:
+        if not self.tracing:
+            raise MemoryTracingNotStartedError("Memory tracing is not started")
+
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_snapshot_filters())
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self._snapshots[snapshot_id] = (label, time.time(), snapshot)
+        while len(self._snapshots) > self.MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def _snapshot(self, snapshot_id: int) -> "tracemalloc.Snapshot":
+        entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise MemorySnapshotNotFoundError(f"Memory snapshot {snapshot_id} not found")
+        return entry[2]
+
+    def top(self, snapshot_id: int, limit: int = 25, group_by: str = "lineno") -> List[dict]:
+        """The allocation sites holding the most memory in one snapshot."""
+        stats = self._snapshot(snapshot_id).statistics(group_by)
+        return [_stat_entry(stat) for stat in stats[:limit]]
+
+    def diff(self, base_id: int, target_id: int, limit: int = 25, group_by: str = "lineno") -> List[dict]:
+        """The allocation sites that grew (or shrank) the most between two snapshots."""
+        stats = self._snapshot(target_id).compare_to(self._snapshot(base_id), group_by)
+        return [_diff_entry(stat) for stat in stats[:limit]]
+
+    def request_started(self) -> int:
+        """Resets the peak for a new request and returns the memory traced before it."""
+        import tracemalloc
+
+        self.in_flight += 1
+        if self.in_flight > 1:
+            self._overlap = True
+        else:
+            self._overlap = False
+            tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def request_finished(self, route: str, baseline: int) -> None:
+        self.in_flight -= 1
+        if not self.tracing:
+            return
+        if self._overlap:
+            # The peak of overlapping requests cannot be attributed to one route
+            self.overlapped_requests += 1
+            if self.in_flight == 0:
+                self._overlap = False
+            return
+
+        import tracemalloc
+
+        peak = tracemalloc.get_traced_memory()[1]
+        route_peak = self._routes.get(route)
+        if route_peak is None:
+            route_peak = self._routes[route] = RoutePeak()
+        route_peak.observe(max(peak - baseline, 0))
+
+    def route_peaks(self) -> dict:
+        return {
+            "overlappedRequests": self.overlapped_requests,
+            "routes": {route: peak.snapshot() for route, peak in sorted(self._routes.items())}
+        }
+
+memory_diagnostics = MemoryDiagnostics()
+
+class MemoryTracingMiddleware:
+    """
+    Pure ASGI middleware recording the peak traced memory of every request
+    per route while tracemalloc is tracing. Requests that overlap with
+    another one are counted but not attributed.
+    """
+
+    def __init__(self, app, diagnostics: MemoryDiagnostics = memory_diagnostics):
+        self.app = app
+        self.diagnostics = diagnostics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.diagnostics.tracing:
+            await self.app(scope, receive, send)
+            return
+
+        baseline = self.diagnostics.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope["path"]
+            self.diagnostics.request_finished(f"{scope['method']} {path}", baseline)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "calculation_history"
+ARCHIVE_PREFIX = f"{PARENT_TABLE}_archive"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+# Serializes maintenance across app workers, an arbitrary but fixed advisory lock key
+MAINTENANCE_LOCK_KEY = 7_203_815_466
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+def partitions_to_create(today: date, months_ahead: int) -> List[Tuple[str, date, date]]:
+    """Monthly partitions (name, from, to) for the current month and the months ahead."""
+    first = month_start(today)
+    return [
+        (partition_name(add_months(first, offset)), add_months(first, offset), add_months(first, offset + 1))
+        for offset in range(months_ahead + 1)
+    ]
+
+def partitions_to_prune(names: List[str], today: date, retention_months: int) -> List[str]:
+    """Partitions whose whole month lies before the retention window."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(today), -retention_months)
+    return sorted(
+        name for name in names
+        if partition_month(name) is not None and partition_month(name) < cutoff
+    )
+
+async def list_partitions(connection: AsyncConnection) -> List[str]:
+    result = await connection.execute(text(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+        """
+    ), {"parent": PARENT_TABLE})
+    return [row[0] for row in result]
+
+async def _default_holds_rows(connection: AsyncConnection, start: date, end: date) -> bool:
+    result = await connection.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), {"start": start, "end": end})
+    return bool(result.scalar())
+
+async def ensure_partitions(connection: AsyncConnection, today: date, months_ahead: int) -> List[str]:
+    """Creates the missing monthly partitions ahead of time, returns the created names."""
+    existing = set(await list_partitions(connection))
+    created = []
+    for name, start, end in partitions_to_create(today, months_ahead):
+        if name in existing:
+            continue
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        if DEFAULT_PARTITION in existing and await _default_holds_rows(connection, start, end):
+            # Rows that landed in the default partition while the month was missing
+            # have to move out first, Postgres refuses a partition they would belong to
+            await connection.execute(text(
+                f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            await connection.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                f"WHERE created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}' RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ))
+            await connection.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+        else:
+            await connection.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        created.append(name)
+    return created
+
+async def prune_partitions(
+    connection: AsyncConnection,
+    today: date,
+    retention_months: int,
+    mode: str
+) -> List[str]:
+    """Drops, or detaches into an archive table, every partition older than the retention."""
+    if mode not in ("drop", "archive"):
+        raise ValueError("Retention mode must be 'drop' or 'archive'")
+
+    pruned = partitions_to_prune(await list_partitions(connection), today, retention_months)
+    for name in pruned:
+        if mode == "drop":
+            await connection.execute(text(f"DROP TABLE {name}"))
+        else:
+            archive_name = name.replace(PARENT_TABLE, ARCHIVE_PREFIX, 1)
+            await connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            await connection.execute(text(f"ALTER TABLE {name} RENAME TO {archive_name}"))
+    return pruned
+
+async def maintain_partitions(db_engine: AsyncEngine, today: Optional[date] = None) -> dict:
+    """
+    Runs partition creation and the retention job in one transaction. Every
+    worker runs the loop, the advisory lock makes them take turns instead of
+    racing on the same CREATE and DROP statements.
+    """
+    today = today or datetime.utcnow().date()
+    async with db_engine.begin() as connection:
+        await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        created = await ensure_partitions(connection, today, settings.HISTORY_PARTITIONS_AHEAD)
+        pruned = await prune_partitions(
+            connection, today, settings.HISTORY_RETENTION_MONTHS, settings.HISTORY_RETENTION_MODE
+        )
+    return {"created": created, "pruned": pruned}
+
+async def run_partition_maintenance(db_engine: AsyncEngine, interval_seconds: int) -> None:
+    """Background loop keeping partitions ahead of time for the lifetime of the app."""
+    while True:
+        try:
+            outcome = await maintain_partitions(db_engine)
+            if outcome["created"] or outcome["pruned"]:
+                logger.info("Partition maintenance: %s", outcome)
+        except Exception as exc:
+            logger.warning("Partition maintenance failed: %s", exc)
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+import numpy as np
+
+from src.schema.returnCalcSchema import DATE_FORMAT, KPeriod, KSpec
+
+def _bucket_start(moment: datetime, granularity: str) -> datetime:
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day.replace(month=1, day=1)
+
+def _next_bucket_start(start: datetime, granularity: str) -> datetime:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    months = {"month": 1, "quarter": 3, "year": 12}[granularity]
+    index = start.year * 12 + (start.month - 1) + months
+    return start.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+def expand_k_spec(spec: KSpec) -> List[KPeriod]:
+    """
+    Contiguous, non-overlapping calendar periods covering [from, to]. Each
+    period ends one second before the next one starts, matching the
+    inclusive second-resolution bounds of explicit K periods.
+    """
+    first = datetime.strptime(spec.start, DATE_FORMAT)
+    last = datetime.strptime(spec.end, DATE_FORMAT)
+
+    periods = []
+    bucket = _bucket_start(first, spec.granularity)
+    while bucket <= last:
+        following = _next_bucket_start(bucket, spec.granularity)
+        periods.append(KPeriod(
+            start=max(bucket, first).strftime(DATE_FORMAT),
+            end=min(following - timedelta(seconds=1), last).strftime(DATE_FORMAT)
+        ))
+        bucket = following
+    return periods
+
+def merge_periods(periods: List[KPeriod]) -> List[KPeriod]:
+    """Sorted, non-overlapping periods covering the same dates as the given ones."""
+    merged: List[KPeriod] = []
+    for period in sorted(periods, key=lambda period: period.start):
+        if merged and period.start <= merged[-1].end:
+            if period.end > merged[-1].end:
+                merged[-1] = KPeriod(start=merged[-1].start, end=period.end)
+        else:
+            merged.append(period)
+    return merged
+
+class PeriodTotals:
+    """
+    Running sums of the amounts falling into each of the sorted,
+    non-overlapping periods, fed chunk by chunk. One binary search per
+    transaction replaces one scan of all transactions per period, and the
+    amounts are added in arrival order, so the totals do not depend on
+    how the rows were chunked.
+    """
+
+    def __init__(self, periods: List[KPeriod]):
+        self.starts = np.array([period.start for period in periods])
+        self.ends = np.array([period.end for period in periods])
+        self.totals = np.zeros(len(periods), dtype=np.float64)
+
+    def add(self, dates: Sequence[str], amounts: Sequence[float]) -> None:
+        if not len(self.totals) or not dates:
+            return
+
+        moments = np.array(dates)
+        # Dates compare chronologically as strings in the fixed YYYY-MM-DD HH:mm:ss format
+        index = np.searchsorted(self.starts, moments, side="right") - 1
+        inside = index >= 0
+        inside[inside] &= moments[inside] <= self.ends[index[inside]]
+
+        # Unbuffered, in-order adds keep the summation order of one pass over all rows
+        np.add.at(self.totals, index[inside], np.asarray(amounts, dtype=np.float64)[inside])
+
+    def tolist(self) -> List[float]:
+        return self.totals.tolist()
+
+def group_by_periods(dates: Sequence[str], amounts: Sequence[float], periods: List[KPeriod]) -> List[float]:
+    """Sums the amounts falling into each of the sorted, non-overlapping periods."""
+    totals = PeriodTotals(periods)
+    totals.add(dates, amounts)
+    return totals.tolist()
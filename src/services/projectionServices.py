@@ -0,0 +1,74 @@
+import math
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from src.schema.returnCalcSchema import (
+    ProjectedReturnsResponse,
+    ProjectedSavingsByDate,
+    ReturnsInput,
+    ReturnsResponse,
+    SavingsProjection
+)
+from src.services.returnCalcServices import interest_rate_for, investment_horizon, process_returns
+
+@lru_cache(maxsize=1024)
+def growth_factors(interest_rate: float, inflation_rate: float, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compounding and inflation factors for years 0..horizon. The factors use
+    math.pow like process_returns, so compounding the same amount reaches the same final balance.
+    The cached arrays are read-only because they are shared between requests.
+    """
+    growth = np.array([math.pow(1 + interest_rate, year) for year in range(horizon + 1)])
+    deflators = np.array([math.pow(1 + inflation_rate, year) for year in range(horizon + 1)])
+    growth.flags.writeable = False
+    deflators.flags.writeable = False
+    return growth, deflators
+
+def project_balances(
+    amounts: np.ndarray,
+    interest_rate: float,
+    inflation_rate: float,
+    horizon: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Nominal and inflation adjusted balances, one row per amount and one column per year."""
+    growth, deflators = growth_factors(interest_rate, inflation_rate, horizon)
+    nominal = np.outer(amounts, growth)
+    return nominal, nominal / deflators
+
+def project_returns(
+    result: ReturnsResponse,
+    payload: ReturnsInput,
+    investment_type: str
+) -> ProjectedReturnsResponse:
+    """
+    Attaches the yearly balance curve to every K period of a calculated result.
+    The curves compound the unrounded invested amounts with the same factors
+    as the engine, so the last year is the engine's final balance before
+    rounding. Idempotent replays carry the stored unrounded amounts, any
+    other result without them runs the engine again to get them.
+    """
+    horizon = investment_horizon(payload.age)
+    invested_amounts = result._invested_amounts
+    if invested_amounts is None:
+        invested_amounts = process_returns(payload, investment_type)._invested_amounts
+    amounts = np.array(invested_amounts, dtype=np.float64)
+    nominal, real = project_balances(
+        amounts, interest_rate_for(investment_type), payload.inflation / 100.0, horizon
+    )
+
+    years = list(range(horizon + 1))
+    nominal_rows = np.round(nominal, 2).tolist()
+    real_rows = np.round(real, 2).tolist()
+    return ProjectedReturnsResponse(
+        totalTransactionAmount=result.totalTransactionAmount,
+        totalCeiling=result.totalCeiling,
+        savingsByDates=[
+            ProjectedSavingsByDate(
+                **savings.model_dump(),
+                projection=SavingsProjection(years=years, nominal=nominal_row, real=real_row)
+            )
+            for savings, nominal_row, real_row in zip(result.savingsByDates, nominal_rows, real_rows)
+        ]
+    )
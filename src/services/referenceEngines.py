@@ -0,0 +1,183 @@
+"""
+Frozen copies of the original scalar engines. They are the reference the
+differential harness (src.commands.compareEngines) checks optimized engines
+against, so they must never be optimized or changed themselves.
+"""
+import math
+from typing import List, Set
+
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse, SavingsByDate
+from src.schema.transactions import (
+    FilteredTransaction,
+    FilterResponse,
+    FilterInput,
+    InvalidFilteredTransaction
+)
+
+def reference_calculate_tax(income: float) -> float:
+    """Calculates income tax based on the simplified slabs provided."""
+    tax = 0.0
+    if income > 1500000:
+        tax += (income - 1500000) * 0.30
+        income = 1500000
+    if income > 1200000:
+        tax += (income - 1200000) * 0.20
+        income = 1200000
+    if income > 1000000:
+        tax += (income - 1000000) * 0.15
+        income = 1000000
+    if income > 700000:
+        tax += (income - 700000) * 0.10
+    return tax
+
+def reference_process_returns(payload: ReturnsInput, investment_type: str) -> ReturnsResponse:
+    """Core engine for processing transactions, periods, and calculating financial returns."""
+    annual_income = payload.wage * 12
+    t_years = max(60 - payload.age, 5) 
+    inflation_rate = payload.inflation / 100.0
+    
+    interest_rate = 0.0711 if investment_type == "nps" else 0.1449
+    
+    total_tx_amount = 0.0
+    total_tx_ceiling = 0.0
+    
+    processed_txs = []
+    seen_dates = set()
+    
+    for tx in payload.transactions:
+        if tx.amount < 0 or tx.date in seen_dates:
+            continue
+            
+        seen_dates.add(tx.date)
+        
+        ceiling = math.ceil(tx.amount / 100.0) * 100.0
+        total_tx_amount += tx.amount
+        total_tx_ceiling += ceiling
+        
+        remanent = ceiling - tx.amount
+        
+        applicable_qs = [(i, q) for i, q in enumerate(payload.q) if q.start <= tx.date <= q.end]
+        if applicable_qs:
+            best_q = sorted(applicable_qs, key=lambda x: (x[1].start, -x[0]), reverse=True)[0][1]
+            remanent = best_q.fixed
+            
+        remanent += sum(p.extra for p in payload.p if p.start <= tx.date <= p.end)
+        processed_txs.append({"date": tx.date, "final_remanent": remanent})
+
+    savings_list = []
+    
+    for k_period in payload.k:
+        invested_amount = sum(
+            tx["final_remanent"] for tx in processed_txs 
+            if k_period.start <= tx["date"] <= k_period.end
+        )
+        
+        a_final = invested_amount * math.pow((1 + interest_rate), t_years)
+        a_real = a_final / math.pow((1 + inflation_rate), t_years)
+        profit = a_real - invested_amount
+        
+        tax_benefit = 0.0
+        if investment_type == "nps":
+            nps_deduction = min(invested_amount, annual_income * 0.10, 200000.0)
+            normal_tax = reference_calculate_tax(annual_income)
+            discounted_tax = reference_calculate_tax(annual_income - nps_deduction)
+            tax_benefit = normal_tax - discounted_tax
+
+        savings_list.append(
+            SavingsByDate(
+                start=k_period.start,
+                end=k_period.end,
+                amount=round(invested_amount, 2),
+                profit=round(profit, 2),
+                taxBenefit=round(tax_benefit, 2)
+            )
+        )
+        
+    return ReturnsResponse(
+        totalTransactionAmount=round(total_tx_amount, 2),
+        totalCeiling=round(total_tx_ceiling, 2),
+        savingsByDates=savings_list
+    )
+
+def reference_apply_period_rules(payload: FilterInput) -> FilterResponse:
+    """
+    Validates transactions against q, p, and k period rules to determine 
+    the final modified remanent to be invested.
+    """
+    valid_txs: List[FilteredTransaction] = []
+    invalid_txs: List[InvalidFilteredTransaction] = []
+    seen_dates: Set[str] = set()
+    
+    for tx in payload.transactions:
+        # --- Base Validations ---
+        if tx.amount < 0:
+            invalid_txs.append(
+                InvalidFilteredTransaction(date=tx.date, amount=tx.amount, message="Negative amounts are not allowed")
+            )
+            continue
+            
+        if tx.date in seen_dates:
+            invalid_txs.append(
+                InvalidFilteredTransaction(date=tx.date, amount=tx.amount, message="Duplicate transaction")
+            )
+            continue
+            
+        seen_dates.add(tx.date)
+        
+        # Step 1: Calculate initial ceiling and remanent
+        current_ceiling = math.ceil(tx.amount / 100.0) * 100.0
+        current_remanent = current_ceiling - tx.amount
+        
+        # Step 2: Apply Q Rules (Fixed Amount Override)
+        applicable_qs = []
+        for index, q in enumerate(payload.q):
+            if q.start <= tx.date <= q.end:
+                applicable_qs.append((index, q))
+                
+        if applicable_qs:
+            # Find the Q period with the latest start date. 
+            # On a tie, the lower original index (first in list) wins.
+            best_q = None
+            best_start = ""
+            best_idx = float('inf')
+            
+            for idx, q in applicable_qs:
+                if q.start > best_start:
+                    best_q = q
+                    best_start = q.start
+                    best_idx = idx
+                elif q.start == best_start and idx < best_idx:
+                    best_q = q
+                    best_idx = idx
+            
+            # Override remanent with the fixed amount
+            current_remanent = best_q.fixed
+            
+        # Step 3: Apply P Rules (Extra Amount Addition)
+        extra_sum = sum(
+            p.extra for p in payload.p 
+            if p.start <= tx.date <= p.end
+        )
+        current_remanent += extra_sum
+        
+        # Step 4: Group by K Periods
+        in_k_period = any(
+            k.start <= tx.date <= k.end 
+            for k in payload.k
+        )
+        
+        # Build the final valid transaction
+        final_tx = FilteredTransaction(
+            date=tx.date,
+            amount=tx.amount,
+            ceiling=current_ceiling,
+            remanent=current_remanent
+        )
+        
+        # The PDF example only attaches 'inkPeriod' if it is true
+        if in_k_period:
+            final_tx.inkPeriod = True
+            
+        valid_txs.append(final_tx)
+
+    return FilterResponse(valid=valid_txs, invalid=invalid_txs)
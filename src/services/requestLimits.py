@@ -0,0 +1,163 @@
+import json
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+API_PREFIX = f"/blackrock/challenge/{settings.VERSION}/"
+BODY_METHODS = ("POST", "PUT", "PATCH")
+
+# Every transaction (parsed or not) carries exactly one date key
+ROW_TOKEN = b'"date"'
+
+@dataclass(frozen=True)
+class RouteLimit:
+    max_body_bytes: int
+    # 0 disables the row limit
+    max_rows: int
+
+def parse_route_limits(spec: str) -> Dict[str, RouteLimit]:
+    """
+    Parses "route=bytes:rows,route=bytes:rows" where route is the path
+    below the API prefix, e.g. "returns:nps:batch=268435456:2000000".
+    """
+    limits = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        route, _, values = entry.strip().partition("=")
+        max_body_bytes, _, max_rows = values.partition(":")
+        limits[route.strip()] = RouteLimit(int(max_body_bytes), int(max_rows or 0))
+    return limits
+
+class RequestTooLarge(HTTPException):
+    """Raised from the wrapped receive channel, FastAPI turns it into a 413 response."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=detail)
+
+class RowCounter:
+    """Counts the row tokens of a body that arrives in arbitrary chunks."""
+
+    def __init__(self):
+        self.rows = 0
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> int:
+        data = self._tail + chunk
+        self.rows += data.count(ROW_TOKEN)
+        # Keep just enough bytes to find a token split across two chunks, but
+        # never a complete token, which would be counted twice
+        self._tail = data[-(len(ROW_TOKEN) - 1):]
+        return self.rows
+
+class RequestLimits:
+    def __init__(self, default: RouteLimit, routes: Dict[str, RouteLimit], prefix: str = API_PREFIX):
+        self.default = default
+        self.routes = routes
+        self.prefix = prefix
+        self.rejected = 0
+
+    def for_path(self, path: str) -> RouteLimit:
+        route = path[len(self.prefix):] if path.startswith(self.prefix) else path
+        return self.routes.get(route, self.default)
+
+    def snapshot(self) -> dict:
+        return {
+            "maxBodyBytes": self.default.max_body_bytes,
+            "maxRows": self.default.max_rows,
+            "routes": {
+                route: {"maxBodyBytes": limit.max_body_bytes, "maxRows": limit.max_rows}
+                for route, limit in sorted(self.routes.items())
+            },
+            "rejected": self.rejected
+        }
+
+request_limits = RequestLimits(
+    default=RouteLimit(settings.REQUEST_MAX_BODY_BYTES, settings.REQUEST_MAX_ROWS),
+    routes=parse_route_limits(settings.REQUEST_ROUTE_LIMITS)
+)
+
+class RequestLimitMiddleware:
+    """
+    Pure ASGI middleware enforcing the per-route body size and row count while
+    the body streams in, so an oversized request is rejected with 413 after
+    reading at most the limit instead of being buffered and parsed in full.
+    Rows are estimated from the date keys of the raw JSON; the body size is
+    the hard bound on memory.
+    """
+
+    def __init__(self, app, limits: RequestLimits = request_limits):
+        self.app = app
+        self.limits = limits
+
+    async def _reject(self, send, detail: str) -> None:
+        self.limits.rejected += 1
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_CONTENT_TOO_LARGE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.for_path(scope["path"])
+        too_large = f"Request body exceeds the limit of {limit.max_body_bytes} bytes"
+        too_many_rows = f"Request exceeds the limit of {limit.max_rows} transactions"
+
+        # 1. A declared Content-Length over the limit is rejected before reading anything
+        content_length: Optional[int] = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    content_length = None
+                break
+        if content_length is not None and content_length > limit.max_body_bytes:
+            await self._reject(send, too_large)
+            return
+
+        # 2. Chunked or understated bodies are counted while they stream in
+        received = 0
+        counter = RowCounter()
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if received > limit.max_body_bytes:
+                    raise RequestTooLarge(too_large)
+                if limit.max_rows and counter.feed(chunk) > limit.max_rows:
+                    raise RequestTooLarge(too_many_rows)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if message["status"] == status.HTTP_413_CONTENT_TOO_LARGE:
+                    self.limits.rejected += 1
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge as exc:
+            # Reached when the body is read outside a FastAPI route (e.g. by another middleware)
+            if response_started:
+                raise
+            await self._reject(send, exc.detail)
@@ -0,0 +1,189 @@
+import asyncio
+import hmac
+import io
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import TYPE_CHECKING, List, Optional
+
+from config import settings
+from src.services.executionPolicy import inline_execution
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+_PROFILE_ID = re.compile(r"^\d+-[0-9a-f]{8}$")
+
+class ProfileStore:
+    """
+    Bounded on-disk ring buffer of cProfile dumps. Every profile is stored as
+    <id>.prof next to an <id>.json with the request metadata; ids sort by
+    creation time and the oldest profiles are removed beyond max_files.
+    """
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def _path(self, profile_id: str, extension: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[:-len(".prof")] for name in os.listdir(self.directory)
+            if name.endswith(".prof") and _PROFILE_ID.match(name[:-len(".prof")])
+        )
+
+    def save(self, profile_id: str, profiler: "cProfile.Profile", metadata: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, "prof"))
+        with open(self._path(profile_id, "json"), "w") as handle:
+            json.dump({"id": profile_id, **metadata}, handle)
+
+        for stale_id in self._ids()[:-self.max_files]:
+            for extension in ("prof", "json"):
+                try:
+                    os.remove(self._path(stale_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[dict]:
+        """Metadata of the stored profiles, newest first."""
+        entries = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, "json")) as handle:
+                    entries.append(json.load(handle))
+            except (FileNotFoundError, ValueError):
+                entries.append({"id": profile_id})
+        return entries
+
+    def profile_path(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, "prof")
+        if path is None or not os.path.isfile(path):
+            return None
+        return path
+
+    def render(self, profile_id: str, top: int = 50, sort: str = "cumulative") -> Optional[str]:
+        """The pstats text report of one profile, None if unknown."""
+        path = self.profile_path(profile_id)
+        if path is None:
+            return None
+        import pstats
+
+        buffer = io.StringIO()
+        pstats.Stats(path, stream=buffer).sort_stats(sort).print_stats(top)
+        return buffer.getvalue()
+
+class RequestProfiler:
+    """
+    Decides which requests get profiled: any request carrying the privileged
+    X-Profile token, plus a sampled fraction of the requests whose path
+    matches the sampling pattern. Only one request is profiled at a time
+    because cProfile hooks the whole event loop thread. Profiled requests run
+    their engine calls inline, whatever the payload size, so the profile
+    contains the engine frames.
+    """
+
+    def __init__(
+        self,
+        store: ProfileStore,
+        token: Optional[str],
+        sample_rate: float,
+        path_pattern: str
+    ):
+        self.store = store
+        self.token = token
+        self.sample_rate = sample_rate
+        self.path_pattern = re.compile(path_pattern)
+        self.active = False
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    def requested(self, headers: list) -> bool:
+        if not self.token:
+            return False
+        for name, value in headers:
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.token.encode())
+        return False
+
+    def sampled(self, path: str) -> bool:
+        return (
+            self.sample_rate > 0
+            and self.path_pattern.search(path) is not None
+            and random.random() < self.sample_rate
+        )
+
+    def should_profile(self, scope) -> bool:
+        return self.requested(scope.get("headers", [])) or self.sampled(scope["path"])
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware running cProfile around the selected requests."""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if self.profiler.active:
+            self.profiler.skipped_busy += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER, profile_id.encode())
+                ]
+            await send(message)
+
+        # cProfile is imported on first use to keep it off the startup path
+        import cProfile
+
+        profiler = cProfile.Profile()
+        self.profiler.active = True
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            # Offloaded engine calls would run outside the profiled thread
+            with inline_execution():
+                await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self.profiler.active = False
+
+        self.profiler.profiled += 1
+        metadata = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "durationMs": round((time.perf_counter() - started) * 1000, 3),
+            "createdAt": time.time()
+        }
+        await asyncio.to_thread(self.profiler.store.save, profile_id, profiler, metadata)
+
+request_profiler = RequestProfiler(
+    store=ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES),
+    token=settings.PROFILING_TOKEN,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    path_pattern=settings.PROFILING_PATH_PATTERN
+)
@@ -1,5 +1,17 @@
+import bisect
 import math
-from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse, SavingsByDate
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.schema.returnCalcSchema import (
+    CalculationTotals,
+    KPeriod,
+    ReturnsInput,
+    ReturnsResponse,
+    SavingsByDate
+)
+from src.services.periodServices import PeriodTotals, expand_k_spec, merge_periods
+from src.services.stageTimer import stage
+from src.services.taxServices import nps_tax_benefit_vector
 
 def calculate_tax(income: float) -> float:
     """Calculates income tax based on the simplified slabs provided."""
@@ -17,60 +29,77 @@ def calculate_tax(income: float) -> float:
         tax += (income - 700000) * 0.10
     return tax
 
-def process_returns(payload: ReturnsInput, investment_type: str) -> ReturnsResponse:
-    """Core engine for processing transactions, periods, and calculating financial returns."""
+def interest_rate_for(investment_type: str) -> float:
+    return 0.0711 if investment_type == "nps" else 0.1449
+
+def investment_horizon(age: int) -> int:
+    """Years until retirement at 60, at least 5."""
+    return max(60 - age, 5)
+
+# Rows handled between two progress events of the chunked engine
+DEFAULT_CHUNK_SIZE = 10000
+
+# Below this many K periods the scalar calculate_tax beats the vectorized slab engine
+VECTOR_TAX_MIN_PERIODS = 16
+
+# (event name, data): ("progress", dict), ("savings", SavingsByDate) or ("result", ReturnsResponse)
+EngineEvent = Tuple[str, Any]
+
+def _progress(stage_name: str, processed: int, total: int) -> EngineEvent:
+    return "progress", {"stage": stage_name, "rowsProcessed": processed, "totalRows": total}
+
+def iter_returns(
+    payload: ReturnsInput,
+    investment_type: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[EngineEvent]:
+    """
+    Chunked core engine for processing transactions, periods, and calculating
+    financial returns. Yields a progress event after every chunk of rows, one
+    savings event per completed K period and the full result last, so callers
+    can report progress and hand control back between chunks.
+
+    When the transactions are sorted by date, a K period is complete as soon
+    as the next row lies past its end, so its savings event follows that
+    chunk. Otherwise any later row could still fall into it and every savings
+    event comes after the last chunk.
+    """
     annual_income = payload.wage * 12
-    t_years = max(60 - payload.age, 5) 
+    t_years = investment_horizon(payload.age)
     inflation_rate = payload.inflation / 100.0
     
-    interest_rate = 0.0711 if investment_type == "nps" else 0.1449
+    interest_rate = interest_rate_for(investment_type)
+    growth = math.pow((1 + interest_rate), t_years)
+    deflator = math.pow((1 + inflation_rate), t_years)
     
     total_tx_amount = 0.0
     total_tx_ceiling = 0.0
     
-    processed_txs = []
-    seen_dates = set()
-    
-    for tx in payload.transactions:
-        if tx.amount < 0 or tx.date in seen_dates:
-            continue
-            
-        seen_dates.add(tx.date)
-        
-        ceiling = math.ceil(tx.amount / 100.0) * 100.0
-        total_tx_amount += tx.amount
-        total_tx_ceiling += ceiling
-        
-        remanent = ceiling - tx.amount
-        
-        applicable_qs = [(i, q) for i, q in enumerate(payload.q) if q.start <= tx.date <= q.end]
-        if applicable_qs:
-            best_q = sorted(applicable_qs, key=lambda x: (x[1].start, -x[0]), reverse=True)[0][1]
-            remanent = best_q.fixed
-            
-        remanent += sum(p.extra for p in payload.p if p.start <= tx.date <= p.end)
-        processed_txs.append({"date": tx.date, "final_remanent": remanent})
-
-    savings_list = []
-    
-    for k_period in payload.k:
-        invested_amount = sum(
-            tx["final_remanent"] for tx in processed_txs 
-            if k_period.start <= tx["date"] <= k_period.end
-        )
-        
-        a_final = invested_amount * math.pow((1 + interest_rate), t_years)
-        a_real = a_final / math.pow((1 + inflation_rate), t_years)
-        profit = a_real - invested_amount
-        
-        tax_benefit = 0.0
-        if investment_type == "nps":
-            nps_deduction = min(invested_amount, annual_income * 0.10, 200000.0)
-            normal_tax = calculate_tax(annual_income)
-            discounted_tax = calculate_tax(annual_income - nps_deduction)
-            tax_benefit = normal_tax - discounted_tax
-
-        savings_list.append(
+    def returns_for(invested_amounts: List[float]) -> Tuple[List[float], List[float]]:
+        with stage("compounding"):
+            profits = [
+                (invested_amount * growth) / deflator - invested_amount
+                for invested_amount in invested_amounts
+            ]
+
+        with stage("tax"):
+            tax_benefits = [0.0] * len(invested_amounts)
+            if investment_type == "nps" and len(invested_amounts) >= VECTOR_TAX_MIN_PERIODS:
+                # Same slabs as calculate_tax, evaluated for all given K periods at once
+                _, _, benefits = nps_tax_benefit_vector(annual_income, invested_amounts)
+                tax_benefits = benefits.tolist()
+            elif investment_type == "nps":
+                # numpy's per-call overhead outweighs the gain for a handful of periods
+                normal_tax = calculate_tax(annual_income)
+                for position, invested_amount in enumerate(invested_amounts):
+                    nps_deduction = min(invested_amount, annual_income * 0.10, 200000.0)
+                    tax_benefits[position] = normal_tax - calculate_tax(annual_income - nps_deduction)
+
+        return profits, tax_benefits
+
+    def savings_for(k_periods: List[KPeriod], invested_amounts: List[float]) -> List[SavingsByDate]:
+        profits, tax_benefits = returns_for(invested_amounts)
+        return [
             SavingsByDate(
                 start=k_period.start,
                 end=k_period.end,
@@ -78,10 +107,123 @@ def process_returns(payload: ReturnsInput, investment_type: str) -> ReturnsRespo
                 profit=round(profit, 2),
                 taxBenefit=round(tax_benefit, 2)
             )
-        )
+            for k_period, invested_amount, profit, tax_benefit
+            in zip(k_periods, invested_amounts, profits, tax_benefits)
+        ]
+
+    # Every chunk is folded into running per-K sums, so beyond the input only
+    # one chunk of remanents is held however many rows there are
+    k_periods = payload.k
+    k_sums = [0.0] * len(k_periods)
+    generated = expand_k_spec(payload.kSpec) if payload.kSpec is not None else []
+    generated_sums = PeriodTotals(generated)
+    # The calculation's own total counts a remanent once even when several K periods
+    # hold it, so it is summed over the union of all periods (a kSpec covers from..to)
+    covered = list(k_periods)
+    if payload.kSpec is not None:
+        covered.append(KPeriod(start=payload.kSpec.start, end=payload.kSpec.end))
+    invested_sums = PeriodTotals(merge_periods(covered))
+
+    # Every rule step runs over a whole chunk at a time, so each one is timed
+    # once per chunk as its own stage instead of with clocks around every row
+    transactions = payload.transactions
+    seen_dates = set()
+    # Highest start first, the lower index first on a tie: the first match wins
+    ordered_q = [
+        q for _, q in sorted(enumerate(payload.q), key=lambda x: (x[1].start, -x[0]), reverse=True)
+    ]
+
+    in_date_order = len(transactions) > chunk_size and all(
+        transactions[position].date <= transactions[position + 1].date
+        for position in range(len(transactions) - 1)
+    )
+    explicit_savings: Dict[int, SavingsByDate] = {}
+    generated_savings: List[SavingsByDate] = []
+    generated_ends = [period.end for period in generated]
+
+    def complete_periods(next_date: Optional[str]) -> Iterator[EngineEvent]:
+        """Savings events of the periods ending before next_date, all remaining ones for None."""
+        for position, k_period in enumerate(k_periods):
+            if position not in explicit_savings and (next_date is None or k_period.end < next_date):
+                explicit_savings[position] = savings_for([k_period], [k_sums[position]])[0]
+                yield "savings", explicit_savings[position]
+
+        # Generated periods are sorted, so the completed ones always extend a prefix
+        done = len(generated_savings)
+        upto = len(generated) if next_date is None else bisect.bisect_left(generated_ends, next_date)
+        if upto > done:
+            for savings in savings_for(generated[done:upto], generated_sums.totals[done:upto].tolist()):
+                generated_savings.append(savings)
+                yield "savings", savings
+    
+    for offset in range(0, len(transactions), chunk_size):
+        with stage("dedup"):
+            dates = []
+            remanents = []
+            for tx in transactions[offset:offset + chunk_size]:
+                if tx.amount < 0 or tx.date in seen_dates:
+                    continue
+                seen_dates.add(tx.date)
+
+                ceiling = math.ceil(tx.amount / 100.0) * 100.0
+                total_tx_amount += tx.amount
+                total_tx_ceiling += ceiling
+                dates.append(tx.date)
+                remanents.append(ceiling - tx.amount)
+
+        with stage("q"):
+            if ordered_q:
+                for position, date in enumerate(dates):
+                    for q in ordered_q:
+                        if q.start <= date <= q.end:
+                            remanents[position] = q.fixed
+                            break
+
+        with stage("p"):
+            if payload.p:
+                remanents = [
+                    remanent + sum(p.extra for p in payload.p if p.start <= date <= p.end)
+                    for date, remanent in zip(dates, remanents)
+                ]
+
+        with stage("k"):
+            # Explicit K periods may overlap, each one is a scan over the chunk
+            for position, k_period in enumerate(k_periods):
+                k_sums[position] = sum(
+                    (remanent for date, remanent in zip(dates, remanents)
+                     if k_period.start <= date <= k_period.end),
+                    k_sums[position]
+                )
+            # Generated periods never overlap, so one group-by replaces the per-period scans
+            generated_sums.add(dates, remanents)
+            invested_sums.add(dates, remanents)
+        yield _progress("rules", min(offset + chunk_size, len(transactions)), len(transactions))
+
+        if in_date_order and offset + chunk_size < len(transactions):
+            yield from complete_periods(transactions[offset + chunk_size].date)
+
+    yield from complete_periods(None)
+    # Reported in request order, whatever order the periods completed in
+    savings_list = [explicit_savings[position] for position in range(len(k_periods))] + generated_savings
         
-    return ReturnsResponse(
+    result = ReturnsResponse(
         totalTransactionAmount=round(total_tx_amount, 2),
         totalCeiling=round(total_tx_ceiling, 2),
         savingsByDates=savings_list
-    )
\ No newline at end of file
+    )
+    result._invested_amounts = k_sums + (generated_sums.tolist() if generated else [])
+
+    total_invested = sum(invested_sums.tolist())
+    [total_profit], [total_tax_benefit] = returns_for([total_invested])
+    result._totals = CalculationTotals(
+        total_invested=round(total_invested, 2),
+        total_profit=round(total_profit, 2),
+        total_tax_benefit=round(total_tax_benefit, 2)
+    )
+    yield "result", result
+
+def process_returns(payload: ReturnsInput, investment_type: str) -> ReturnsResponse:
+    """Core engine for processing transactions, periods, and calculating financial returns."""
+    for event, data in iter_returns(payload, investment_type):
+        if event == "result":
+            return data
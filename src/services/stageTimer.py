@@ -0,0 +1,168 @@
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds in milliseconds of the histogram buckets, the last bucket is unbounded
+HISTOGRAM_BOUNDS_MS = [0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+class StageTimings:
+    """Per-request accumulator of the seconds spent in every named stage."""
+
+    __slots__ = ("stages", "_open")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._open: Optional[Tuple[str, float]] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, stages: Dict[str, float]) -> None:
+        for name, seconds in stages.items():
+            self.add(name, seconds)
+
+    def begin(self, name: str) -> None:
+        """Opens a stage that is closed by finish(), e.g. by the middleware."""
+        self._open = (name, time.perf_counter())
+
+    def finish(self) -> None:
+        if self._open is not None:
+            name, started = self._open
+            self.add(name, time.perf_counter() - started)
+            self._open = None
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+def current_timings() -> Optional[StageTimings]:
+    return _current.get()
+
+@contextmanager
+def stage(name: str):
+    """Times the block as the named stage of the current request, a no-op outside requests."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+def begin_stage(name: str) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.begin(name)
+
+def run_with_stage_timings(func: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, float]]:
+    """
+    Runs func in a worker thread or process with its own collector and returns
+    the stage timings next to the result, so the caller can merge them into
+    the timings of the request.
+    """
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        return func(*args), timings.stages
+    finally:
+        _current.reset(token)
+
+class StageHistogram:
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float) -> None:
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, None for the open bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS + [None], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avgMs": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "maxMs": round(self.max_ms, 3),
+            "p50Ms": self.quantile(0.5),
+            "p95Ms": self.quantile(0.95),
+            "p99Ms": self.quantile(0.99),
+            "buckets": {
+                (f"le{bound}" if bound is not None else "inf"): count
+                for bound, count in zip(HISTOGRAM_BOUNDS_MS + [None], self.counts)
+            }
+        }
+
+class StageMetrics:
+    """Process-wide histograms of every stage, reported through the /performance router."""
+
+    def __init__(self):
+        self._histograms: Dict[str, StageHistogram] = {}
+
+    def observe(self, stages: Dict[str, float]) -> None:
+        for name, seconds in stages.items():
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = StageHistogram()
+            histogram.observe(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        return {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+
+stage_metrics = StageMetrics()
+
+def server_timing_header(stages: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages.items())
+
+class StageTimingMiddleware:
+    """
+    Pure ASGI middleware giving every HTTP request its own stage collector,
+    reporting the stages in a Server-Timing header and recording them in the
+    stage histograms once the response has been sent.
+    """
+
+    def __init__(self, app, metrics: StageMetrics = stage_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = StageTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_server_timing(message):
+            if message["type"] == "http.response.start":
+                # Closes e.g. the serialization stage opened when the handler returned
+                timings.finish()
+                timings.add("total", time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing_header(timings.stages).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            _current.reset(token)
+            self.metrics.observe(timings.stages)
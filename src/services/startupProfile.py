@@ -0,0 +1,85 @@
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+class StartupProfile:
+    """Records how long each startup phase takes and when the first request arrives."""
+
+    def __init__(self):
+        self.created_at = time.time()
+        self.phases: List[Tuple[str, float]] = []
+        self.ready_at: Optional[float] = None
+        self.first_request_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark_ready(self) -> None:
+        if self.ready_at is None:
+            self.ready_at = time.time()
+
+    def mark_first_request(self) -> None:
+        if self.first_request_at is None:
+            self.first_request_at = time.time()
+
+    def report(self, process_started_at: float) -> dict:
+        def since_start(timestamp):
+            return None if timestamp is None else round((timestamp - process_started_at) * 1000, 2)
+
+        return {
+            "phases": [{"name": name, "ms": round(seconds * 1000, 2)} for name, seconds in self.phases],
+            "interpreterToAppImportMs": since_start(self.created_at),
+            "timeToReadyMs": since_start(self.ready_at),
+            "timeToFirstRequestMs": since_start(self.first_request_at)
+        }
+
+startup_profile = StartupProfile()
+
+class FirstRequestMiddleware:
+    """Pure ASGI middleware that stamps the arrival of the first HTTP request."""
+
+    def __init__(self, app, profile: StartupProfile):
+        self.app = app
+        self.profile = profile
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.profile.first_request_at is None:
+            self.profile.mark_first_request()
+        await self.app(scope, receive, send)
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def import_time_breakdown(module: str = "main", top: int = 25) -> List[dict]:
+    """
+    Imports the module in a fresh interpreter with -X importtime and returns
+    the slowest top-level imports by cumulative time.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "depth": len(indent) // 2,
+                "selfMs": int(self_us) / 1000,
+                "cumulativeMs": int(cumulative_us) / 1000
+            })
+
+    entries.sort(key=lambda entry: entry["cumulativeMs"], reverse=True)
+    return entries[:top]
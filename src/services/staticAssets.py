@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Files smaller than this are not worth the compression overhead
+MIN_COMPRESS_SIZE = 256
+
+@dataclass
+class StaticAsset:
+    name: str
+    fingerprinted_name: str
+    content_type: str
+    digest: str
+    # Encoded bodies keyed by content-coding ("identity", "gzip", "br")
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+def _fingerprint(name: str, digest: str) -> str:
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:12]}{ext}"
+
+def _content_type(name: str) -> str:
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+def _compress(asset: StaticAsset) -> None:
+    body = asset.variants["identity"]
+    if len(body) < MIN_COMPRESS_SIZE:
+        return
+
+    candidates = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:  # installed from requirements.txt, without it only gzip variants are built
+        brotli = None
+    if brotli is not None:
+        candidates["br"] = brotli.compress(body, quality=11)
+
+    for encoding, compressed in candidates.items():
+        if len(compressed) < len(body):
+            asset.variants[encoding] = compressed
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class StaticAssetStore:
+    """
+    Loads every file under the static directory once, precompresses it and
+    serves the smallest variant the client accepts. Assets are reachable under
+    their plain name (revalidated through ETags) and under a content
+    fingerprinted name that can be cached forever.
+    """
+
+    def __init__(self, directory: str, rewrite_references_in: tuple = (".html",)):
+        self.directory = directory
+        self.rewrite_references_in = rewrite_references_in
+        self._assets: Dict[str, StaticAsset] = {}
+        self._by_fingerprint: Dict[str, StaticAsset] = {}
+        self.load()
+
+    def load(self) -> None:
+        assets = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                with open(path, "rb") as handle:
+                    body = handle.read()
+                assets[name] = self._build_asset(name, body)
+
+        # Point HTML pages at the fingerprinted URLs so browsers can cache them immutably
+        for name, asset in list(assets.items()):
+            if name.endswith(self.rewrite_references_in):
+                body = asset.variants["identity"]
+                for other in assets.values():
+                    if other is not asset:
+                        body = body.replace(
+                            f"/static/{other.name}".encode(),
+                            f"/static/{other.fingerprinted_name}".encode()
+                        )
+                assets[name] = self._build_asset(name, body)
+
+        for asset in assets.values():
+            _compress(asset)
+
+        self._assets = assets
+        self._by_fingerprint = {asset.fingerprinted_name: asset for asset in assets.values()}
+
+    def _build_asset(self, name: str, body: bytes) -> StaticAsset:
+        digest = hashlib.sha256(body).hexdigest()
+        return StaticAsset(
+            name=name,
+            fingerprinted_name=_fingerprint(name, digest),
+            content_type=_content_type(name),
+            digest=digest,
+            variants={"identity": body}
+        )
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self._assets.get(name)
+
+    def url_for(self, name: str) -> str:
+        return f"/static/{self._assets[name].fingerprinted_name}"
+
+    def _negotiate(self, asset: StaticAsset, accept_encoding: str) -> str:
+        accepted = _accepted_encodings(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted.get(encoding, wildcard) > 0:
+                return encoding
+        return "identity"
+
+    def response(self, request: Request, name: str) -> Optional[Response]:
+        """Builds the response for a plain or fingerprinted asset name, None if unknown."""
+        immutable = False
+        asset = self._assets.get(name)
+        if asset is None:
+            asset = self._by_fingerprint.get(name)
+            immutable = asset is not None
+        if asset is None:
+            return None
+
+        encoding = self._negotiate(asset, request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": asset.etag(encoding),
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        # Only the negotiated variant's ETag counts, a cached gzip body is no use to an identity request
+        if if_none_match and _etag_matches(if_none_match, asset.etag(encoding)):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        body = asset.variants[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(content=body, media_type=asset.content_type, headers=headers)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple, Union
+
+from config import settings
+from src.connection.session import AsyncSessionLocal
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.schema.transactions import FilterInput
+from src.services.historyServices import save_calculation
+from src.services.transactionServices import iter_period_rules
+
+SSE_MEDIA_TYPE = "text/event-stream"
+# Stops proxies such as nginx from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data: Any) -> bytes:
+    if hasattr(data, "model_dump"):
+        data = data.model_dump()
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+async def drive(events: Iterator[Tuple[str, Any]]) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Runs a chunked engine generator on the event loop, handing control back
+    after every event so one large calculation never blocks other requests
+    for longer than a single chunk.
+    """
+    for event in events:
+        yield event
+        await asyncio.sleep(0)
+
+def stream_chunk_rows(payload: Union[ReturnsInput, FilterInput], chunk_size: int = settings.STREAM_CHUNK_SIZE) -> int:
+    """
+    Rows per slice. Every row is checked against every q, p and explicit k
+    period, so the slice shrinks as the rules grow and one slice stays a
+    similar amount of work.
+    """
+    return max(1, chunk_size // (1 + len(payload.q) + len(payload.p) + len(payload.k)))
+
+PersistCalculationFn = Callable[[uuid.UUID, str, ReturnsInput, ReturnsResponse], Awaitable[Any]]
+
+async def persist_calculation(
+    user_id: uuid.UUID,
+    investment_type: str,
+    payload: ReturnsInput,
+    result: ReturnsResponse
+) -> None:
+    # The request scoped session is not available once the response is streaming
+    async with AsyncSessionLocal() as db:
+        await save_calculation(db, user_id, investment_type, payload, result)
+
+async def stream_returns_events(
+    user_id: uuid.UUID,
+    investment_type: str,
+    payload: ReturnsInput,
+    chunk_size: Optional[int] = None,
+    persist: PersistCalculationFn = persist_calculation
+) -> AsyncIterator[bytes]:
+    """
+    Streams progress events, one savings event per completed K period and the
+    final result, which is saved to the history like a regular calculation.
+    Savings arrive as their period completes for date-sorted transactions and
+    all at the end otherwise (see iter_returns).
+    A failed history write follows the result as a persist_error event, so
+    the finished calculation still reaches the client.
+    chunk_size overrides the rows per slice derived from STREAM_CHUNK_SIZE.
+    """
+    from src.services.returnCalcServices import iter_returns
+
+    chunk_size = chunk_size or stream_chunk_rows(payload)
+    saving = None
+    try:
+        async for event, data in drive(iter_returns(payload, investment_type, chunk_size)):
+            if event == "result":
+                # Started before the result is sent, so a client leaving right after it does not cancel the write
+                saving = asyncio.ensure_future(persist(user_id, investment_type, payload, data))
+            yield sse_event(event, data)
+    except Exception as exc:
+        yield sse_event("error", {"detail": str(exc) or exc.__class__.__name__})
+        return
+
+    try:
+        await saving
+    except Exception as exc:
+        yield sse_event("persist_error", {"detail": str(exc) or exc.__class__.__name__})
+
+async def stream_filter_events(
+    payload: FilterInput,
+    chunk_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Streams progress events of the period rules followed by the filter result."""
+    chunk_size = chunk_size or stream_chunk_rows(payload)
+    try:
+        async for event, data in drive(iter_period_rules(payload, chunk_size)):
+            yield sse_event(event, data)
+    except Exception as exc:
+        yield sse_event("error", {"detail": str(exc) or exc.__class__.__name__})
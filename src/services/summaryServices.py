@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models.history import CalculationHistory
+from src.models.summary import UserSavingsSummary, UserSavingsSummaryResponse
+from src.schema.returnCalcSchema import ReturnsResponse
+
+def summarize_results(results: Iterable[ReturnsResponse]) -> dict:
+    """
+    Adds up the per-calculation totals of the given results. Their K windows
+    may overlap, so adding up savingsByDates would count remanents twice.
+    """
+    totals = {"calculations": 0, "total_invested": 0.0, "total_profit": 0.0, "total_tax_benefit": 0.0}
+    for result in results:
+        totals["calculations"] += 1
+        totals["total_invested"] += result._totals.total_invested
+        totals["total_profit"] += result._totals.total_profit
+        totals["total_tax_benefit"] += result._totals.total_tax_benefit
+    return totals
+
+async def add_to_summary(db: AsyncSession, user_id: uuid.UUID, results: Iterable[ReturnsResponse]) -> None:
+    """
+    Upserts the user's summary row with the totals of the new results. It does
+    not commit, so the caller can keep it in the same transaction as the
+    history insert.
+    """
+    totals = summarize_results(results)
+    if totals["calculations"] == 0:
+        return
+
+    statement = pg_insert(UserSavingsSummary).values(
+        user_id=user_id, updated_at=datetime.utcnow(), **totals
+    )
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserSavingsSummary.user_id],
+        set_={
+            "calculations": UserSavingsSummary.calculations + excluded.calculations,
+            "total_invested": UserSavingsSummary.total_invested + excluded.total_invested,
+            "total_profit": UserSavingsSummary.total_profit + excluded.total_profit,
+            "total_tax_benefit": UserSavingsSummary.total_tax_benefit + excluded.total_tax_benefit,
+            "updated_at": excluded.updated_at
+        }
+    )
+    await db.exec(statement)
+
+async def rebuild_summaries(db: AsyncSession) -> int:
+    """
+    Recomputes every summary row from calculation_history in one transaction.
+    Rows whose totals were never backfilled (see backfill_totals) add nothing.
+    """
+    totals = (
+        select(
+            CalculationHistory.user_id,
+            func.count(CalculationHistory.id),
+            func.coalesce(func.sum(CalculationHistory.total_invested), 0.0),
+            func.coalesce(func.sum(CalculationHistory.total_profit), 0.0),
+            func.coalesce(func.sum(CalculationHistory.total_tax_benefit), 0.0),
+            func.now()
+        )
+        .group_by(CalculationHistory.user_id)
+    )
+
+    await db.exec(delete(UserSavingsSummary))
+    result = await db.exec(
+        insert(UserSavingsSummary).from_select(
+            ["user_id", "calculations", "total_invested", "total_profit", "total_tax_benefit", "updated_at"],
+            totals
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+async def get_summary(db: AsyncSession, user_id: uuid.UUID) -> UserSavingsSummaryResponse:
+    """Reads the precomputed summary row, a single primary key lookup."""
+    summary = await db.get(UserSavingsSummary, user_id)
+    if summary is None:
+        return UserSavingsSummaryResponse(
+            calculations=0, total_invested=0.0, total_profit=0.0, total_tax_benefit=0.0
+        )
+    return UserSavingsSummaryResponse.model_validate(summary, from_attributes=True)
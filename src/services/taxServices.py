@@ -0,0 +1,65 @@
+from typing import Tuple
+
+import numpy as np
+
+from src.schema.taxSchema import TaxBatchInput, TaxBatchResponse
+
+# Simplified income tax slabs as (lower bound, marginal rate), ascending
+TAX_SLABS = (
+    (0.0, 0.0),
+    (700000.0, 0.10),
+    (1000000.0, 0.15),
+    (1200000.0, 0.20),
+    (1500000.0, 0.30)
+)
+
+NPS_DEDUCTION_SHARE = 0.10
+NPS_DEDUCTION_CAP = 200000.0
+
+SLAB_BOUNDS = np.array([bound for bound, _ in TAX_SLABS])
+SLAB_RATES = np.array([rate for _, rate in TAX_SLABS])
+# Tax owed on an income exactly at each slab's lower bound
+SLAB_BASE_TAX = np.concatenate(([0.0], np.cumsum(np.diff(SLAB_BOUNDS) * SLAB_RATES[:-1])))
+
+def tax_vector(incomes) -> np.ndarray:
+    """Vectorized calculate_tax: one binary search into the slab table per income."""
+    incomes = np.asarray(incomes, dtype=np.float64)
+    slab = np.searchsorted(SLAB_BOUNDS, incomes, side="right") - 1
+    # Incomes below the first bound owe nothing
+    slab = np.maximum(slab, 0)
+    taxable = np.maximum(incomes - SLAB_BOUNDS[slab], 0.0)
+    return SLAB_BASE_TAX[slab] + taxable * SLAB_RATES[slab]
+
+def nps_deduction_vector(annual_incomes, invested) -> np.ndarray:
+    return np.minimum(
+        np.minimum(invested, np.asarray(annual_incomes) * NPS_DEDUCTION_SHARE),
+        NPS_DEDUCTION_CAP
+    )
+
+def nps_tax_benefit_vector(annual_incomes, invested) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tax, NPS deduction and tax benefit for whole income / investment vectors,
+    broadcast against each other like numpy operands.
+    """
+    annual_incomes = np.asarray(annual_incomes, dtype=np.float64)
+    invested = np.asarray(invested, dtype=np.float64)
+    deduction = nps_deduction_vector(annual_incomes, invested)
+    tax = tax_vector(annual_incomes)
+    benefit = tax - tax_vector(annual_incomes - deduction)
+    return np.broadcast_to(tax, deduction.shape), deduction, benefit
+
+def calculate_tax_batch(payload: TaxBatchInput) -> TaxBatchResponse:
+    """Annual tax and NPS tax benefit for every monthly wage of a payroll batch."""
+    annual_incomes = np.asarray(payload.wages, dtype=np.float64) * 12
+    invested = (
+        np.asarray(payload.investments, dtype=np.float64)
+        if payload.investments is not None
+        else np.zeros_like(annual_incomes)
+    )
+    tax, deduction, benefit = nps_tax_benefit_vector(annual_incomes, invested)
+    return TaxBatchResponse(
+        annualIncome=np.round(annual_incomes, 2).tolist(),
+        tax=np.round(tax, 2).tolist(),
+        npsDeduction=np.round(deduction, 2).tolist(),
+        taxBenefit=np.round(benefit, 2).tolist()
+    )
@@ -0,0 +1,178 @@
+import math
+from typing import Any, Iterator, List, Set, Tuple
+
+from src.schema.transactions import (
+    TransactionParsed,
+    ExpenseInput,
+    InvalidTransaction,
+    ValidatorInput,
+    ValidatorResponse,
+    FilteredTransaction,
+    FilterResponse,
+    FilterInput,
+    InvalidFilteredTransaction
+)
+from src.services.stageTimer import stage
+
+def parse_expenses(expenses: List[ExpenseInput]) -> List[TransactionParsed]:
+    """Calculates the ceiling and remanent of every expense."""
+    parsed_transactions = []
+    
+    for expense in expenses:
+        ceiling_val = math.ceil(expense.amount / 100.0) * 100.0
+        remanent_val = ceiling_val - expense.amount
+        
+        parsed_transactions.append(
+            TransactionParsed(
+                date=expense.date,
+                amount=expense.amount,
+                ceiling=ceiling_val,
+                remanent=remanent_val
+            )
+        )
+        
+    return parsed_transactions
+
+def validate_parsed_transactions(payload: ValidatorInput) -> ValidatorResponse:
+    """Splits parsed transactions into valid and invalid ones."""
+    valid_transactions: List[TransactionParsed] = []
+    invalid_transactions: List[InvalidTransaction] = []
+    
+    # Use a set for O(1) time complexity when checking for duplicate dates
+    seen_dates: Set[str] = set()
+    
+    for tx in payload.transactions:
+        is_valid = True
+        error_message = ""
+        
+        # Rule 1: No negative amounts or negative remanents
+        if tx.amount < 0 or tx.remanent < 0 or tx.ceiling < tx.amount:
+            is_valid = False
+            error_message = "Negative amounts are not allowed"
+            
+        # Rule 2: No duplicate timestamps
+        elif tx.date in seen_dates:
+            is_valid = False
+            error_message = "Duplicate transaction"
+            
+        # Rule 3: Hard constraint from the mathematical limits (x < 500,000)
+        elif tx.amount >= 500000:
+            is_valid = False
+            error_message = "Amount exceeds maximum allowed limit"
+            
+        # Optional Rule 4: Ensuring transaction doesn't exceed the user's wage logically
+        elif tx.amount > payload.wage:
+             is_valid = False
+             error_message = "Transaction amount exceeds recorded wage"
+
+        # Route the transaction to the correct output list
+        if is_valid:
+            valid_transactions.append(tx)
+            seen_dates.add(tx.date) # Mark this date as seen
+        else:
+            invalid_transactions.append(
+                InvalidTransaction(
+                    date=tx.date,
+                    amount=tx.amount,
+                    ceiling=tx.ceiling,
+                    remanent=tx.remanent,
+                    message=error_message
+                )
+            )
+            
+    return ValidatorResponse(
+        valid=valid_transactions,
+        invalid=invalid_transactions
+    )
+
+# Rows handled between two progress events of the chunked filter
+DEFAULT_CHUNK_SIZE = 10000
+
+def _progress(stage_name: str, processed: int, total: int) -> Tuple[str, Any]:
+    return "progress", {"stage": stage_name, "rowsProcessed": processed, "totalRows": total}
+
+def iter_period_rules(payload: FilterInput, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """
+    Chunked version of apply_period_rules. Yields a ("progress", dict) event
+    after every chunk of rows and ("result", FilterResponse) last.
+    """
+    transactions = payload.transactions
+    valid_txs: List[FilteredTransaction] = []
+    invalid_txs: List[InvalidFilteredTransaction] = []
+    seen_dates: Set[str] = set()
+    
+    # Every rule step runs over a whole chunk at a time, so each one is timed
+    # once per chunk as its own stage instead of with clocks around every row.
+    # Q periods are ordered by latest start date, the lower original index
+    # (first in list) first on a tie, so the first one that applies wins
+    ordered_q = [
+        q for _, q in sorted(enumerate(payload.q), key=lambda x: (x[1].start, -x[0]), reverse=True)
+    ]
+    for offset in range(0, len(transactions), chunk_size):
+        with stage("dedup"):
+            kept = []
+            for tx in transactions[offset:offset + chunk_size]:
+                # --- Base Validations ---
+                if tx.amount < 0:
+                    invalid_txs.append(
+                        InvalidFilteredTransaction(date=tx.date, amount=tx.amount, message="Negative amounts are not allowed")
+                    )
+                    continue
+
+                if tx.date in seen_dates:
+                    invalid_txs.append(
+                        InvalidFilteredTransaction(date=tx.date, amount=tx.amount, message="Duplicate transaction")
+                    )
+                    continue
+
+                seen_dates.add(tx.date)
+                kept.append(tx)
+
+            # Step 1: Calculate initial ceiling and remanent
+            ceilings = [math.ceil(tx.amount / 100.0) * 100.0 for tx in kept]
+            remanents = [ceiling - tx.amount for tx, ceiling in zip(kept, ceilings)]
+
+        # Step 2: Apply Q Rules (Fixed Amount Override)
+        with stage("q"):
+            if ordered_q:
+                for position, tx in enumerate(kept):
+                    for q in ordered_q:
+                        if q.start <= tx.date <= q.end:
+                            remanents[position] = q.fixed
+                            break
+
+        # Step 3: Apply P Rules (Extra Amount Addition)
+        with stage("p"):
+            if payload.p:
+                remanents = [
+                    remanent + sum(p.extra for p in payload.p if p.start <= tx.date <= p.end)
+                    for tx, remanent in zip(kept, remanents)
+                ]
+
+        # Step 4: Group by K Periods and build the final valid transactions
+        with stage("k"):
+            for tx, ceiling, remanent in zip(kept, ceilings, remanents):
+                final_tx = FilteredTransaction(
+                    date=tx.date,
+                    amount=tx.amount,
+                    ceiling=ceiling,
+                    remanent=remanent
+                )
+
+                # The PDF example only attaches 'inkPeriod' if it is true
+                if any(k.start <= tx.date <= k.end for k in payload.k):
+                    final_tx.inkPeriod = True
+
+                valid_txs.append(final_tx)
+        yield _progress("rules", min(offset + chunk_size, len(transactions)), len(transactions))
+
+    yield "result", FilterResponse(valid=valid_txs, invalid=invalid_txs)
+
+def apply_period_rules(payload: FilterInput) -> FilterResponse:
+    """
+    Validates transactions against q, p, and k period rules to determine 
+    the final modified remanent to be invested.
+    """
+    for event, data in iter_period_rules(payload):
+        if event == "result":
+            return data
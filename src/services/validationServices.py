@@ -0,0 +1,67 @@
+from typing import List
+
+import numpy as np
+
+from src.schema.transactions import (
+    CompactValidatorResponse,
+    TransactionParsed,
+    ValidationErrorCode,
+    ValidatorInput
+)
+
+MAX_AMOUNT = 500000
+
+def classify_transactions(transactions: List[TransactionParsed], wage: float) -> np.ndarray:
+    """
+    Vectorized version of the four validator rules. Returns one error code per
+    row (0 for valid) with the same precedence as the row-by-row validator:
+    negative, duplicate, over-limit, over-wage.
+    """
+    count = len(transactions)
+    amount = np.fromiter((tx.amount for tx in transactions), dtype=np.float64, count=count)
+    ceiling = np.fromiter((tx.ceiling for tx in transactions), dtype=np.float64, count=count)
+    remanent = np.fromiter((tx.remanent for tx in transactions), dtype=np.float64, count=count)
+    dates = np.array([tx.date for tx in transactions], dtype=str)
+
+    negative = (amount < 0) | (remanent < 0) | (ceiling < amount)
+    over_limit = amount >= MAX_AMOUNT
+    over_wage = amount > wage
+
+    # A row is a duplicate when an earlier *valid* row has the same date. The
+    # other rules don't depend on order, so the earliest row of a date passing
+    # all of them is always valid and is the one later rows collide with.
+    candidates = np.flatnonzero(~negative & ~over_limit & ~over_wage)
+    _, date_ids = np.unique(dates, return_inverse=True)
+    first_valid = np.full(date_ids.max(initial=-1) + 1, count, dtype=np.int64)
+    candidate_dates, first_positions = np.unique(date_ids[candidates], return_index=True)
+    first_valid[candidate_dates] = candidates[first_positions]
+    duplicate = ~negative & (first_valid[date_ids] < np.arange(count))
+
+    codes = np.zeros(count, dtype=np.int8)
+    codes[over_wage] = ValidationErrorCode.OVER_WAGE
+    codes[over_limit] = ValidationErrorCode.OVER_LIMIT
+    codes[duplicate] = ValidationErrorCode.DUPLICATE
+    codes[negative] = ValidationErrorCode.NEGATIVE
+    return codes
+
+def _index_ranges(mask: np.ndarray) -> List[List[int]]:
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return np.column_stack((starts, ends)).tolist()
+
+def validate_compact(payload: ValidatorInput, include_valid_ranges: bool = False) -> CompactValidatorResponse:
+    """Validates the transactions and reports invalid row indices grouped by error code."""
+    codes = classify_transactions(payload.transactions, payload.wage)
+    valid = codes == 0
+
+    return CompactValidatorResponse(
+        total=len(codes),
+        validCount=int(valid.sum()),
+        invalid={
+            int(code): np.flatnonzero(codes == code).tolist()
+            for code in ValidationErrorCode
+            if (codes == code).any()
+        },
+        validRanges=_index_ranges(valid) if include_valid_ranges else None
+    )
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+from src.connection.session import engine
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.schema.transactions import ExpenseInput, FilterInput, ValidatorInput
+from src.security.auth import get_password_hash
+from src.services.startupProfile import startup_profile
+from src.services.transactionServices import (
+    apply_period_rules,
+    parse_expenses,
+    validate_parsed_transactions
+)
+
+logger = logging.getLogger(__name__)
+
+# A tiny representative request touching Q, P and K rules
+_SAMPLE = {
+    "age": 29,
+    "wage": 50000,
+    "inflation": 5.5,
+    "q": [{"fixed": 0, "start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59"}],
+    "p": [{"extra": 25, "start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59"}],
+    "k": [{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+    "transactions": [
+        {"date": "2023-02-28 15:49:20", "amount": 375},
+        {"date": "2023-07-01 21:59:00", "amount": 620},
+        {"date": "2023-10-12 20:15:30", "amount": 250}
+    ]
+}
+
+class Readiness:
+    """Tracks the warm-up stages; the worker is ready once all of them succeeded."""
+
+    def __init__(self):
+        self.ready = False
+        self.stages: Dict[str, float] = {}
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "stagesMs": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "attempts": self.attempts,
+            "lastError": self.last_error
+        }
+
+readiness = Readiness()
+
+async def warm_up_pool(db_engine: AsyncEngine, connections: int) -> None:
+    """Opens the connections at the same time so they all stay in the pool afterwards."""
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            connection = await stack.enter_async_context(db_engine.connect())
+            await connection.execute(text("SELECT 1"))
+
+def warm_up_engine() -> None:
+    """Runs the calculation code paths once so validators and serializers are built."""
+    # Also loads the numpy-backed engine, which the app does not import at startup
+    from src.services.returnCalcServices import process_returns
+
+    payload = ReturnsInput.model_validate(_SAMPLE)
+    for investment_type in ("nps", "index"):
+        ReturnsResponse.model_validate_json(process_returns(payload, investment_type).model_dump_json())
+
+    parsed = parse_expenses([ExpenseInput(**tx) for tx in _SAMPLE["transactions"]])
+    validate_parsed_transactions(ValidatorInput(wage=_SAMPLE["wage"], transactions=parsed)).model_dump_json()
+    apply_period_rules(FilterInput.model_validate(_SAMPLE)).model_dump_json()
+
+def warm_up_auth() -> None:
+    get_password_hash("warm-up")
+
+async def _timed(state: Readiness, name: str, coroutine) -> None:
+    started = time.perf_counter()
+    await coroutine
+    state.stages[name] = time.perf_counter() - started
+
+async def warm_up(
+    state: Readiness = readiness,
+    db_engine: AsyncEngine = engine,
+    connections: int = settings.DB_WARMUP_CONNECTIONS,
+    retry_seconds: float = settings.WARMUP_RETRY_SECONDS
+) -> None:
+    """Runs every warm-up stage, retrying until the database is reachable."""
+    while not state.ready:
+        state.attempts += 1
+        try:
+            await _timed(state, "engine", asyncio.to_thread(warm_up_engine))
+            await _timed(state, "auth", asyncio.to_thread(warm_up_auth))
+            await _timed(state, "database", warm_up_pool(db_engine, connections))
+        except Exception as exc:
+            state.last_error = str(exc) or exc.__class__.__name__
+            logger.warning("Warm-up attempt %s failed: %s", state.attempts, state.last_error)
+            await asyncio.sleep(retry_seconds)
+            continue
+
+        state.last_error = None
+        state.ready = True
+        startup_profile.mark_ready()
@@ -1,4 +1,4 @@
-from src.connection.session import get_db
+from src.connection.session import AsyncSessionLocal, get_read_db
 from src.models.userModel import User
 from src.security.auth import (
     verify_token, oauth2_scheme
@@ -6,13 +6,23 @@ from src.security.auth import (
 from fastapi import Depends, HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from src.services.stageTimer import stage
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    payload = verify_token(token, "access")
-    email: str = payload.get("sub")
-    
+async def _find_user(db: AsyncSession, email: str):
     result = await db.exec(select(User).where(User.email == email))
-    user = result.first()
+    return result.first()
+
+# Auth is a read-only lookup and uses the replica when one is configured
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)):
+    with stage("auth"):
+        payload = verify_token(token, "access")
+        email: str = payload.get("sub")
+        
+        user = await _find_user(db, email)
+        # A user who registered moments ago may not have reached the replica yet
+        if user is None and getattr(db, "on_replica", False):
+            async with AsyncSessionLocal() as primary:
+                user = await _find_user(primary, email)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,85 @@
+import sys
+import os
+import asyncio
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.services.admissionControl import AdmissionController, AdmissionRejected
+
+def _controller(**overrides):
+    options = dict(
+        user_burst=10,
+        user_refill_per_second=1,
+        rows_per_token=100,
+        max_concurrency=1,
+        latency_budget_seconds=0.05
+    )
+    options.update(overrides)
+    return AdmissionController(**options)
+
+def test_token_bucket_is_weighted_by_payload_size():
+    """Tests that large payloads drain the user's bucket and yield a 429 with Retry-After."""
+    controller = _controller(max_concurrency=10)
+    user_id = uuid.uuid4()
+
+    async def scenario():
+        # 1 + 800 / 100 = 9 tokens out of 10
+        async with controller.admit(user_id, 800):
+            pass
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(user_id, 800)
+        # Other users keep their own budget
+        async with controller.admit(uuid.uuid4(), 800):
+            pass
+        return rejected.value
+
+    rejection = asyncio.run(scenario())
+
+    assert rejection.status_code == 429
+    assert rejection.retry_after_header == "8"
+    assert controller.snapshot()["rejectedRateLimited"] == 1
+
+def test_global_limit_sheds_requests_beyond_latency_budget():
+    """Tests that a request waiting longer than the budget for a slot gets a 503."""
+    controller = _controller()
+
+    async def scenario():
+        admitted_at = await controller.acquire(uuid.uuid4(), 1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(uuid.uuid4(), 1)
+        controller.release(admitted_at)
+
+        # Once the slot is free the next request is admitted again
+        async with controller.admit(uuid.uuid4(), 1):
+            pass
+        return rejected.value
+
+    rejection = asyncio.run(scenario())
+
+    assert rejection.status_code == 503
+    snapshot = controller.snapshot()
+    assert snapshot["rejectedOverloaded"] == 1
+    assert snapshot["admitted"] == 2
+    assert snapshot["active"] == 0 and snapshot["queued"] == 0
+
+def test_streamed_response_releases_its_slot_when_abandoned():
+    """Tests that a stream closed early, e.g. by a client disconnect, gives its slot back."""
+    controller = _controller()
+
+    async def events():
+        for index in range(10):
+            yield f"event {index}".encode()
+
+    async def scenario():
+        admitted_at = await controller.acquire(uuid.uuid4(), 1)
+        stream = controller.release_after(events(), admitted_at)
+        assert await stream.__anext__() == b"event 0"
+        assert controller.snapshot()["active"] == 1
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+    assert controller.snapshot()["active"] == 0
@@ -0,0 +1,139 @@
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.services.analyticsServices import (
+    totals_by_month_statement,
+    totals_by_type_statement,
+    totals_by_window_statement
+)
+from src.services.historyServices import history_record
+from src.services.returnCalcServices import process_returns
+
+USER_ID = uuid.UUID("6f1c1a52-3c5e-4f61-9a0e-0a4f0d7b2c11")
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def test_type_and_month_totals_do_not_expand_the_windows():
+    for statement in (totals_by_type_statement(USER_ID), totals_by_month_statement(USER_ID)):
+        sql = _sql(statement)
+        assert "jsonb_array_elements" not in sql
+        assert "coalesce(sum(calculation_history.total_invested), 0.0) AS total_invested" in sql
+        assert "coalesce(sum(calculation_history.total_profit), 0.0) AS total_profit" in sql
+        assert "coalesce(sum(calculation_history.total_tax_benefit), 0.0) AS total_tax_benefit" in sql
+        assert f"calculation_history.user_id = '{USER_ID}'" in sql
+
+    assert "date_trunc('month', calculation_history.created_at)" in _sql(totals_by_month_statement(USER_ID))
+
+def test_window_totals_expand_every_calculation_laterally():
+    sql = _sql(totals_by_window_statement(USER_ID))
+
+    # Postgres 14+ jsonb subscripting, the compose file runs 15
+    assert "JOIN LATERAL jsonb_array_elements(calculation_history.result['savingsByDates']) AS savings ON true" in sql
+    assert "count(distinct(calculation_history.id)) AS calculations" in sql
+    assert "GROUP BY savings.value ->> 'start', savings.value ->> 'end', calculation_history.investment_type" in sql
+
+YEAR = ("2023-01-01 00:00:00", "2023-12-31 23:59:59")
+SPRING = ("2023-03-01 00:00:00", "2023-11-30 23:59:59")
+WINTER = ("2023-01-01 00:00:00", "2023-02-28 23:59:59")
+
+def _calculation(investment_type, windows, transactions=None):
+    # The Q and P periods make the invested amount differ from ceiling - amount
+    payload = ReturnsInput.model_validate({
+        "age": 29,
+        "wage": 100000,
+        "inflation": 5.5,
+        "q": [{"fixed": 0, "start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59"}],
+        "p": [{"extra": 25, "start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59"}],
+        "k": [{"start": start, "end": end} for start, end in windows],
+        "transactions": transactions or [
+            {"date": "2023-02-28 15:49:20", "amount": 375},
+            {"date": "2023-07-01 21:59:00", "amount": 620},
+            {"date": "2023-10-12 20:15:30", "amount": 250},
+            {"date": "2023-12-17 08:09:45", "amount": 480}
+        ]
+    })
+    return payload, process_returns(payload, investment_type)
+
+# The spring window lies inside the yearly one, both hold the same remanents
+OVERLAPPING = _calculation("nps", [YEAR, SPRING])
+ONE_ROW = _calculation("nps", [YEAR], [{"date": "2023-10-12 20:15:30", "amount": 250}])
+# Only the first row falls into a window
+PARTLY_COVERED = _calculation("index", [WINTER])
+
+def test_history_rows_carry_totals_that_count_every_remanent_once():
+    expected = [(145.0, 175.0), (75.0, 50.0), (25.0, 175.0)]
+    for (payload, result), (invested, rounded_up) in zip((OVERLAPPING, ONE_ROW, PARTLY_COVERED), expected):
+        record = history_record(USER_ID, "nps", payload, result)
+
+        assert record.total_invested == invested
+        assert result.totalCeiling - result.totalTransactionAmount == rounded_up
+        assert (record.total_profit, record.total_tax_benefit) == (
+            result._totals.total_profit, result._totals.total_tax_benefit
+        )
+
+    assert OVERLAPPING[1]._totals.total_tax_benefit > 0
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="needs a migrated Postgres in TEST_DATABASE_URL")
+def test_totals_on_overlapping_windows():
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from src.models.userModel import User
+    from src.services.analyticsServices import totals_by_month, totals_by_type, totals_by_window
+
+    async def scenario():
+        engine = create_async_engine(os.environ["TEST_DATABASE_URL"])
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            db = AsyncSession(bind=connection)
+            try:
+                user = User(email=f"{uuid.uuid4()}@example.com", hashed_password="x")
+                db.add(user)
+                db.add_all([
+                    history_record(user.id, "nps", *OVERLAPPING),
+                    history_record(user.id, "nps", *ONE_ROW),
+                    history_record(user.id, "index", *PARTLY_COVERED)
+                ])
+                await db.flush()
+
+                empty = await totals_by_type(db, uuid.uuid4())
+                by_type = await totals_by_type(db, user.id)
+                by_month = await totals_by_month(db, user.id)
+                by_window = await totals_by_window(db, user.id)
+            finally:
+                await db.close()
+                await transaction.rollback()
+        await engine.dispose()
+        return empty, by_type, by_month, by_window
+
+    empty, by_type, by_month, by_window = asyncio.run(scenario())
+
+    nps_profit = OVERLAPPING[1]._totals.total_profit + ONE_ROW[1]._totals.total_profit
+    nps_tax_benefit = OVERLAPPING[1]._totals.total_tax_benefit + ONE_ROW[1]._totals.total_tax_benefit
+    expected = [
+        ("index", 1, 25.0, PARTLY_COVERED[1]._totals.total_profit, 0.0),
+        ("nps", 2, 220.0, nps_profit, nps_tax_benefit)
+    ]
+
+    assert empty == []
+    for totals in (by_type, by_month):
+        assert [
+            (t.investment_type, t.calculations, t.total_invested, round(t.total_profit, 2), round(t.total_tax_benefit, 2))
+            for t in totals
+        ] == [(kind, count, invested, round(profit, 2), round(tax, 2)) for kind, count, invested, profit, tax in expected]
+    assert by_month[0].month == datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    assert [(w.start, w.end, w.investment_type, w.calculations, w.total_invested) for w in by_window] == [
+        (*WINTER, "index", 1, 25.0),
+        (*YEAR, "nps", 2, 220.0),
+        (*SPRING, "nps", 1, 75.0)
+    ]
@@ -0,0 +1,227 @@
+import sys
+import os
+import asyncio
+import json
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from types import SimpleNamespace
+from starlette.requests import ClientDisconnect
+
+from config import settings
+from main import app
+from src.routes import RetireSaveUp
+from src.services.admissionControl import admission_controller
+from src.services.batchServices import (
+    NDJSON_MEDIA_TYPE,
+    BatchItemParser,
+    BatchRunner,
+    BatchTooLargeError,
+    parse_batch_items,
+    read_batch_items,
+    stream_batch_results
+)
+from src.utils import get_current_user
+
+ITEM = {
+    "age": 29,
+    "wage": 50000,
+    "inflation": 5.5,
+    "k": [{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+    "transactions": [{"date": "2023-10-12 20:15:30", "amount": 250.0}]
+}
+
+def _collect(items, persist):
+    async def scenario():
+        runner = BatchRunner(max_workers=2, chunk_size=2)
+        lines = [
+            json.loads(line)
+            async for line in stream_batch_results(uuid.uuid4(), "index", items, runner=runner, persist=persist)
+        ]
+        runner.shutdown()
+        return lines
+
+    return asyncio.run(scenario())
+
+def test_parse_batch_items_accepts_json_array_and_ndjson():
+    body = json.dumps([ITEM, {"age": "old"}]).encode()
+    items = parse_batch_items(body, "application/json")
+    assert [index for index, _, _ in items] == [0, 1]
+    assert items[0][1] is not None and items[0][2] is None
+    assert items[1][1] is None and items[1][2]
+
+    ndjson = (json.dumps(ITEM) + "\n{not json}\n").encode()
+    items = parse_batch_items(ndjson, "application/x-ndjson; charset=utf-8")
+    assert items[0][1] is not None
+    assert items[1][2][0]["type"] == "json_invalid"
+
+    with pytest.raises(ValueError):
+        parse_batch_items(json.dumps(ITEM).encode(), "application/json")
+
+def _fed_in_chunks(body: bytes, content_type: str, size: int):
+    parser = BatchItemParser(content_type)
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(parser.feed(body[start:start + size]))
+    return items + parser.close()
+
+def _summary(items):
+    return [(index, payload.model_dump() if payload else None, bool(errors)) for index, payload, errors in items]
+
+@pytest.mark.parametrize("size", [1, 3, 17, 4096])
+def test_items_split_across_chunks_parse_like_the_whole_body(size):
+    # A multi-byte character and a number item exercise the chunk boundaries
+    named = {**ITEM, "k": [{**ITEM["k"][0], "label": "épargne"}]}
+    raw = [ITEM, {"age": "old"}, named, 12345, ITEM]
+    body = (" [\n" + ",\n ".join(json.dumps(item, ensure_ascii=False) for item in raw) + "\n] ").encode()
+    assert _summary(_fed_in_chunks(body, "application/json", size)) == _summary(parse_batch_items(body, "application/json"))
+    assert [bool(payload) for _, payload, _ in parse_batch_items(body, "application/json")] == [True, False, True, False, True]
+
+    ndjson = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in raw).encode()
+    assert _summary(_fed_in_chunks(ndjson, NDJSON_MEDIA_TYPE, size)) == _summary(parse_batch_items(body, "application/json"))
+
+def test_a_large_item_split_over_many_chunks_parses_in_linear_time():
+    # About 4MB in one item, the size where rescanning it on every chunk took seconds
+    transactions = [
+        {"date": f"2023-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}", "amount": 250.5, "label": 'a\\"b'}
+        for i in range(60000)
+    ]
+    body = json.dumps([{**ITEM, "transactions": transactions}]).encode()
+
+    started = time.perf_counter()
+    whole = parse_batch_items(body, "application/json")
+    whole_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    chunked = _fed_in_chunks(body, "application/json", 64 * 1024)
+    chunked_seconds = time.perf_counter() - started
+
+    assert len(chunked[0][1].transactions) == len(whole[0][1].transactions) == 60000
+    assert chunked_seconds < 3 * whole_seconds + 0.5
+
+@pytest.mark.parametrize("body", [b"[", b'[{"age": 1},]', b'[{"age": 1}] []', b'[{"age": 1} {"age": 2}]'])
+def test_malformed_arrays_are_rejected(body):
+    with pytest.raises(ValueError):
+        _fed_in_chunks(body, "application/json", 2)
+
+def test_read_batch_items_stops_at_the_item_limit():
+    read = []
+
+    async def chunks():
+        for _ in range(100):
+            chunk = (json.dumps(ITEM) + "\n").encode()
+            read.append(chunk)
+            yield chunk
+
+    with pytest.raises(BatchTooLargeError):
+        asyncio.run(read_batch_items(chunks(), NDJSON_MEDIA_TYPE, max_items=3))
+    # Reading stops right after the limit is crossed
+    assert len(read) == 4
+
+def test_stream_batch_isolates_errors_and_saves_once():
+    """Tests that invalid items do not break the batch and results are bulk saved."""
+    saves = []
+
+    async def fake_persist(user_id, investment_type, calculations):
+        saves.append(len(calculations))
+        return len(calculations)
+
+    raw = [ITEM, {"age": 30}, ITEM, ITEM, ITEM]
+    items = parse_batch_items(json.dumps(raw).encode(), "application/json")
+    lines = _collect(items, fake_persist)
+
+    results = {line["index"]: line for line in lines if "index" in line}
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert results[1]["status"] == "error"
+    assert all(results[i]["status"] == "ok" for i in (0, 2, 3, 4))
+    assert results[0]["result"]["savingsByDates"][0]["amount"] == 50.0
+
+    assert lines[-1] == {"summary": {"total": 5, "succeeded": 4, "failed": 1, "saved": 4}}
+    assert saves == [4]
+
+def _drive_batch_route(body: bytes, spec_version: str = "2.3"):
+    """
+    Calls the batch route as a server would and disconnects the client right
+    after the first result line. Before ASGI 2.4 the server reports it through
+    receive(), from 2.4 on the next send() raises. Returns the lines sent.
+    """
+    sent = []
+
+    async def scenario():
+        first_line = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await first_line.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                if first_line.is_set() and spec_version >= "2.4":
+                    raise OSError("client disconnected")
+                sent.append(message["body"])
+                first_line.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": spec_version},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": f"/blackrock/challenge/{settings.VERSION}/returns:nps:batch",
+            "raw_path": f"/blackrock/challenge/{settings.VERSION}/returns:nps:batch".encode(),
+            "query_string": b"",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80)
+        }
+        try:
+            await app(scope, receive, send)
+        except ClientDisconnect:
+            pass
+
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=uuid.uuid4())
+    try:
+        asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+    return sent
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])
+def test_batch_disconnect_mid_stream_releases_admission_slot(monkeypatch, spec_version):
+    """Tests that a client leaving mid-stream does not leak its admission slot."""
+    closed = []
+
+    async def slow_results(user_id, investment_type, items):
+        try:
+            for index in range(1000):
+                yield f'{{"index": {index}}}\n'.encode()
+                await asyncio.sleep(0.01)
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(RetireSaveUp, "stream_batch_results", slow_results)
+    sent = _drive_batch_route(json.dumps([ITEM]).encode(), spec_version)
+
+    assert sent == [b'{"index": 0}\n']
+    assert closed == [True]
+    assert admission_controller.snapshot()["active"] == 0
+
+def test_batch_failing_stream_releases_admission_slot(monkeypatch):
+    """Tests that a stream raising mid-way (e.g. a broken worker pool) frees its slot."""
+    async def failing_results(user_id, investment_type, items):
+        yield b'{"index": 0}\n'
+        raise RuntimeError("worker pool broke")
+
+    monkeypatch.setattr(RetireSaveUp, "stream_batch_results", failing_results)
+    with pytest.raises(RuntimeError):
+        _drive_batch_route(json.dumps([ITEM]).encode())
+
+    assert admission_controller.snapshot()["active"] == 0
@@ -0,0 +1,43 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.commands.compareEngines import ENGINES, run_differential
+from src.services.returnCalcServices import iter_returns
+from src.services.transactionServices import apply_period_rules
+
+@pytest.mark.parametrize("engine_name", sorted(ENGINES))
+def test_current_engines_match_the_reference(engine_name):
+    report = run_differential(engine_name, cases=150, seed=2024, max_rows=120, repeat=1)
+
+    assert report.mismatch is None
+    assert report.summary()["cases"] == 150
+    assert all(result.reference_ms > 0 and result.candidate_ms > 0 for result in report.results)
+
+@pytest.mark.parametrize("engine_name", ["returns:nps", "returns:index"])
+def test_folding_small_chunks_matches_the_reference(engine_name):
+    # Chunks of 7 rows fold every payload into the running K sums many times over
+    def in_small_chunks(payload):
+        events = list(iter_returns(payload, engine_name.split(":")[1], chunk_size=7))
+        return events[-1][1]
+
+    report = run_differential(engine_name, in_small_chunks, cases=100, seed=48, max_rows=120, repeat=1)
+
+    assert report.mismatch is None
+
+def test_a_broken_tie_break_is_caught_and_shrunk():
+    # Reversing the Q periods makes ties go to the highest index instead of the lowest
+    def highest_index_wins(payload):
+        return apply_period_rules(payload.model_copy(update={"q": payload.q[::-1]}))
+
+    report = run_differential("transactions:filter", highest_index_wins, cases=300, seed=7, repeat=1)
+
+    assert not report.passed
+    smallest = report.mismatch["payload"]
+    assert len(smallest["transactions"]) == 1
+    assert len(smallest["q"]) == 2
+    assert smallest["q"][0]["start"] == smallest["q"][1]["start"]
+    assert report.mismatch["expected"] != report.mismatch["actual"]
@@ -0,0 +1,56 @@
+import sys
+import os
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.services.executionPolicy import ExecutionPolicy
+
+def _current_thread_name():
+    return threading.current_thread().name
+
+def test_small_payloads_run_inline_and_large_ones_are_offloaded():
+    """Tests that the size threshold decides between the event loop and the pool."""
+    policy = ExecutionPolicy(inline_threshold=10, mode="thread", max_workers=1)
+
+    async def scenario():
+        inline_thread = await policy.run(_current_thread_name, size=9)
+        pooled_thread = await policy.run(_current_thread_name, size=10)
+        return inline_thread, pooled_thread
+
+    inline_thread, pooled_thread = asyncio.run(scenario())
+    policy.shutdown()
+
+    assert inline_thread == threading.main_thread().name
+    assert pooled_thread.startswith("engine")
+
+    snapshot = policy.snapshot()
+    assert snapshot["inlineCalls"] == 1
+    assert snapshot["offloadedCalls"] == 1
+    assert snapshot["inFlight"] == 0
+
+def test_saturation_is_reported_when_calls_exceed_workers():
+    policy = ExecutionPolicy(inline_threshold=0, mode="thread", max_workers=1)
+    release = threading.Event()
+
+    async def scenario():
+        calls = [asyncio.create_task(policy.run(release.wait, size=1)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        snapshot = policy.snapshot()
+        release.set()
+        await asyncio.gather(*calls)
+        return snapshot
+
+    snapshot = asyncio.run(scenario())
+    policy.shutdown()
+
+    assert snapshot["inFlight"] == 3
+    assert snapshot["queued"] == 2
+    assert snapshot["saturatedCalls"] == 2
+
+def test_unknown_pool_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ExecutionPolicy(inline_threshold=1, mode="fiber", max_workers=1)
@@ -0,0 +1,59 @@
+import sys
+import os
+import asyncio
+import csv
+import io
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow.parquet as pq
+
+from src.services.exportServices import EXPORT_COLUMNS, flatten_history_row, stream_csv, stream_parquet
+
+RESULT = {
+    "totalTransactionAmount": 1725.0,
+    "totalCeiling": 1900.0,
+    "savingsByDates": [
+        {"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59", "amount": 145.0, "profit": 86.88, "taxBenefit": 0.0},
+        {"start": "2023-03-01 00:00:00", "end": "2023-11-30 23:59:59", "amount": 75.0, "profit": 44.94, "taxBenefit": 0.0}
+    ]
+}
+
+def _chunks(*row_lists):
+    async def generate():
+        for rows in row_lists:
+            yield rows
+    return generate()
+
+async def _collect(stream):
+    return b"".join([part async for part in stream])
+
+def test_flatten_history_row_emits_one_row_per_window():
+    history_id, user_id = uuid.uuid4(), uuid.uuid4()
+    created_at = datetime(2026, 1, 2, 3, 4, 5)
+
+    rows = flatten_history_row(history_id, user_id, "nps", created_at, RESULT)
+    assert len(rows) == 2
+    assert rows[1][:6] == [str(history_id), str(user_id), "nps", created_at.isoformat(), 1725.0, 1900.0]
+    assert rows[1][6:] == ["2023-03-01 00:00:00", "2023-11-30 23:59:59", 75.0, 44.94, 0.0]
+
+    empty = flatten_history_row(history_id, user_id, "index", created_at, {"savingsByDates": []})
+    assert len(empty) == 1 and empty[0][6:] == [None] * 5
+
+def test_stream_csv_writes_header_and_every_chunk():
+    rows = flatten_history_row(uuid.uuid4(), uuid.uuid4(), "nps", datetime(2026, 1, 1), RESULT)
+    data = asyncio.run(_collect(stream_csv(_chunks(rows[:1], rows[1:]))))
+
+    parsed = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+    assert parsed[0] == EXPORT_COLUMNS
+    assert len(parsed) == 3
+
+def test_stream_parquet_writes_one_row_group_per_chunk():
+    rows = flatten_history_row(uuid.uuid4(), uuid.uuid4(), "nps", datetime(2026, 1, 1), RESULT)
+    data = asyncio.run(_collect(stream_parquet(_chunks(rows[:1], rows[1:]))))
+
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+    assert parquet_file.num_row_groups == 2
+    assert parquet_file.read().column("amount").to_pylist() == [145.0, 75.0]
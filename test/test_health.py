@@ -0,0 +1,59 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+from src.services import warmup
+from src.services.warmup import Readiness, warm_up
+
+client = TestClient(app)
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def __aenter__(self):
+        self.engine.open += 1
+        self.engine.peak = max(self.engine.peak, self.engine.open)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.engine.open -= 1
+
+    async def execute(self, statement):
+        if self.engine.failures:
+            self.engine.failures -= 1
+            raise ConnectionError("database is starting up")
+
+class FakeEngine:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.open = 0
+        self.peak = 0
+
+    def connect(self):
+        return FakeConnection(self)
+
+def test_liveness_does_not_wait_for_warm_up(monkeypatch):
+    monkeypatch.setattr(warmup.readiness, "ready", False)
+
+    assert client.get("/blackrock/challenge/v1/health/live").status_code == 200
+    response = client.get("/blackrock/challenge/v1/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+
+def test_warm_up_opens_pool_connections_and_retries_until_ready():
+    """Tests that warm-up holds N connections at once and only then reports ready."""
+    state = Readiness()
+    engine = FakeEngine(failures=1)
+
+    asyncio.run(warm_up(state=state, db_engine=engine, connections=3, retry_seconds=0))
+
+    assert state.ready
+    assert state.attempts == 2
+    assert engine.peak == 3 and engine.open == 0
+    assert set(state.stages) == {"engine", "auth", "database"}
+    assert state.snapshot()["status"] == "ready"
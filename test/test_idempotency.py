@@ -0,0 +1,102 @@
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.idempotency import IdempotencyRecord
+from src.schema.returnCalcSchema import ReturnsInput
+from src.services import idempotencyServices
+from src.services.idempotencyServices import SingleFlight, _replay, calculate_once, request_fingerprint
+from src.services.returnCalcServices import process_returns
+
+PAYLOAD = ReturnsInput(
+    age=29,
+    wage=50000,
+    inflation=5.5,
+    k=[{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+    transactions=[{"date": "2023-10-12 20:15:30", "amount": 250.0}]
+)
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        flight = SingleFlight()
+        outcomes = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return outcomes, flight.in_flight()
+
+    outcomes, remaining = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert [result for result, _ in outcomes] == ["done"] * 5
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True, True]
+    assert remaining == 0
+
+def test_single_flight_propagates_errors_to_every_caller():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in asyncio.run(scenario()))
+
+def test_identical_concurrent_returns_requests_compute_and_save_once(monkeypatch):
+    """Tests that N duplicate in-flight requests cost one computation and one history write."""
+    computations, saves = [], []
+
+    async def fake_save(db, user_id, investment_type, payload, result):
+        saves.append(result)
+
+    monkeypatch.setattr(idempotencyServices, "save_calculation", fake_save)
+
+    async def compute():
+        computations.append(1)
+        await asyncio.sleep(0.01)
+        return process_returns(PAYLOAD, "nps")
+
+    async def scenario():
+        user_id = uuid.uuid4()
+        return await asyncio.gather(*(
+            calculate_once(None, user_id, "nps", PAYLOAD, None, compute) for _ in range(4)
+        ))
+
+    outcomes = asyncio.run(scenario())
+
+    assert len(computations) == 1
+    assert len(saves) == 1
+    assert all(result == saves[0] for result, _ in outcomes)
+    assert sum(replayed for _, replayed in outcomes) == 3
+
+def test_request_fingerprint_depends_on_payload_and_type():
+    other = PAYLOAD.model_copy(update={"age": 30})
+    assert request_fingerprint("nps", PAYLOAD) == request_fingerprint("nps", PAYLOAD.model_copy())
+    assert request_fingerprint("nps", PAYLOAD) != request_fingerprint("index", PAYLOAD)
+    assert request_fingerprint("nps", PAYLOAD) != request_fingerprint("nps", other)
+
+def test_replays_carry_the_stored_unrounded_amounts():
+    result = process_returns(PAYLOAD, "nps")
+    record = IdempotencyRecord(
+        user_id=uuid.uuid4(),
+        key="key",
+        investment_type="nps",
+        request_hash=request_fingerprint("nps", PAYLOAD),
+        response=result.model_dump(),
+        invested_amounts=result._invested_amounts,
+        expires_at=datetime.utcnow()
+    )
+
+    replayed = _replay(record, request_fingerprint("nps", PAYLOAD))
+
+    assert replayed.model_dump() == result.model_dump()
+    assert replayed._invested_amounts == result._invested_amounts
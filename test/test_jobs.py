@@ -0,0 +1,101 @@
+import sys
+import os
+import asyncio
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.services.jobServices import JobManager, JobStatus, UserJobLimitError, JobQueueFullError
+from src.services.returnCalcServices import process_returns
+
+PAYLOAD = ReturnsInput(
+    age=29,
+    wage=50000,
+    inflation=5.5,
+    k=[{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+    transactions=[
+        {"date": "2023-02-28 15:49:20", "amount": 375},
+        {"date": "2023-10-12 20:15:30", "amount": 250}
+    ]
+)
+
+def _manager(**overrides):
+    persisted = []
+
+    async def fake_persist(user_id, investment_type, payload, result):
+        persisted.append((user_id, investment_type, result))
+        return uuid.uuid4()
+
+    options = dict(max_workers=1, queue_size=10, max_per_user=2, result_ttl_seconds=60, persist=fake_persist)
+    options.update(overrides)
+    return JobManager(**options), persisted
+
+def test_job_runs_in_pool_and_persists_result():
+    """Tests that a submitted job completes with the same result as the inline engine."""
+    async def scenario():
+        manager, persisted = _manager()
+        user_id = uuid.uuid4()
+        job = await manager.submit(user_id, "nps", PAYLOAD)
+        while job.is_active:
+            await asyncio.sleep(0.01)
+        await manager.shutdown()
+        return job, persisted, user_id
+
+    job, persisted, user_id = asyncio.run(scenario())
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.result == process_returns(PAYLOAD, "nps")
+    assert job.history_id is not None
+    assert persisted == [(user_id, "nps", job.result)]
+
+def test_job_limits_per_user_and_queue():
+    """Tests that the per-user cap and the global queue bound reject extra jobs."""
+    async def scenario():
+        manager, _ = _manager(max_per_user=1, queue_size=2)
+        user_a, user_b, user_c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+        await manager.submit(user_a, "index", PAYLOAD)
+        with pytest.raises(UserJobLimitError):
+            await manager.submit(user_a, "index", PAYLOAD)
+
+        await manager.submit(user_b, "index", PAYLOAD)
+        with pytest.raises(JobQueueFullError):
+            await manager.submit(user_c, "index", PAYLOAD)
+
+        await manager.shutdown()
+
+    asyncio.run(scenario())
+
+def test_job_is_only_visible_to_its_owner():
+    async def scenario():
+        manager, _ = _manager()
+        job = await manager.submit(uuid.uuid4(), "nps", PAYLOAD)
+        visible_to_other = manager.get(job.id, uuid.uuid4())
+        await manager.shutdown()
+        return visible_to_other
+
+    assert asyncio.run(scenario()) is None
+
+def test_job_keeps_its_result_when_persisting_fails():
+    """Tests that a history write failure is reported without dropping the result."""
+    async def failing_persist(user_id, investment_type, payload, result):
+        raise ConnectionError("history database unavailable")
+
+    async def scenario():
+        manager, _ = _manager(persist=failing_persist)
+        job = await manager.submit(uuid.uuid4(), "nps", PAYLOAD)
+        while job.is_active:
+            await asyncio.sleep(0.01)
+        await manager.shutdown()
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.result == process_returns(PAYLOAD, "nps")
+    assert job.error is None
+    assert job.persist_error == "history database unavailable"
+    assert job.history_id is None
@@ -0,0 +1,66 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from pydantic import ValidationError
+
+from src.schema.returnCalcSchema import KSpec, ReturnsInput
+from src.services.periodServices import expand_k_spec
+from src.services.returnCalcServices import process_returns
+
+def test_months_are_clipped_to_the_requested_range():
+    periods = expand_k_spec(KSpec.model_validate(
+        {"granularity": "month", "from": "2023-01-15 00:00:00", "to": "2023-03-10 12:00:00"}
+    ))
+
+    assert [(period.start, period.end) for period in periods] == [
+        ("2023-01-15 00:00:00", "2023-01-31 23:59:59"),
+        ("2023-02-01 00:00:00", "2023-02-28 23:59:59"),
+        ("2023-03-01 00:00:00", "2023-03-10 12:00:00")
+    ]
+
+@pytest.mark.parametrize("granularity, expected", [
+    ("day", 366), ("week", 53), ("month", 12), ("quarter", 4), ("year", 1)
+])
+def test_periods_cover_the_range_without_gaps(granularity, expected):
+    periods = expand_k_spec(KSpec(granularity=granularity, start="2024-01-01 00:00:00", end="2024-12-31 23:59:59"))
+
+    assert len(periods) == expected
+    assert periods[0].start == "2024-01-01 00:00:00"
+    assert periods[-1].end == "2024-12-31 23:59:59"
+    assert all(a.end < b.start for a, b in zip(periods, periods[1:]))
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(ValidationError):
+        KSpec.model_validate({"granularity": "month", "from": "2023-05-01 00:00:00", "to": "2023-01-01 00:00:00"})
+    with pytest.raises(ValidationError):
+        KSpec.model_validate({"granularity": "day", "from": "1900-01-01 00:00:00", "to": "2023-01-01 00:00:00"})
+
+@pytest.mark.parametrize("investment_type", ["nps", "index"])
+def test_k_spec_matches_the_explicit_periods(investment_type):
+    rng = random.Random(3)
+    transactions = [
+        {
+            "date": f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00",
+            "amount": round(rng.uniform(-10, 900), 2)
+        }
+        for _ in range(300)
+    ]
+    spec = {"granularity": "month", "from": "2023-02-10 00:00:00", "to": "2023-11-20 23:59:59"}
+    base = {
+        "age": 35,
+        "wage": 60000,
+        "inflation": 5.0,
+        "q": [{"fixed": 0, "start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59"}],
+        "p": [{"extra": 25, "start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59"}],
+        "transactions": transactions
+    }
+    explicit = [period.model_dump() for period in expand_k_spec(KSpec.model_validate(spec))]
+
+    generated = process_returns(ReturnsInput(**base, kSpec=spec), investment_type)
+    scanned = process_returns(ReturnsInput(**base, k=explicit), investment_type)
+
+    assert generated == scanned
@@ -0,0 +1,94 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import json
+
+from src.commands.benchmarkMemory import measure, measure_engine_chunks
+from src.schema.transactions import ValidatorInput
+from src.services.memoryProfiler import (
+    MemoryDiagnostics,
+    MemorySnapshotNotFoundError,
+    MemoryTracingMiddleware,
+    MemoryTracingNotStartedError
+)
+from src.services.transactionServices import validate_parsed_transactions
+
+def test_snapshots_require_tracing_and_report_growth():
+    diagnostics = MemoryDiagnostics()
+    with pytest.raises(MemoryTracingNotStartedError):
+        diagnostics.take_snapshot()
+
+    diagnostics.start()
+    try:
+        base = diagnostics.take_snapshot("before")
+        retained = [bytearray(1024) for _ in range(200)]
+        target = diagnostics.take_snapshot("after")
+
+        diff = diagnostics.diff(base, target)
+        assert diff[0]["file"] == __file__
+        assert diff[0]["sizeDiffBytes"] >= 200 * 1024
+        assert diagnostics.top(target, limit=5)
+        assert [entry["label"] for entry in diagnostics.status()["snapshots"]] == ["before", "after"]
+    finally:
+        diagnostics.stop()
+        del retained
+
+    with pytest.raises(MemorySnapshotNotFoundError):
+        diagnostics.top(999)
+
+def test_route_peaks_are_recorded_while_tracing():
+    diagnostics = MemoryDiagnostics()
+    app = FastAPI()
+    app.add_middleware(MemoryTracingMiddleware, diagnostics=diagnostics)
+
+    @app.get("/items/{item_id}")
+    async def allocate(item_id: int):
+        buffer = bytearray(512 * 1024)
+        return {"size": len(buffer)}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    assert diagnostics.route_peaks()["routes"] == {}
+
+    diagnostics.start()
+    try:
+        client.get("/items/2")
+    finally:
+        diagnostics.stop()
+
+    peak = diagnostics.route_peaks()["routes"]["GET /items/{item_id}"]
+    assert peak["requests"] == 1
+    assert peak["maxPeakBytes"] >= 512 * 1024
+
+def test_benchmark_measures_every_phase():
+    body = b'{"wage": 50000, "transactions": [{"date": "2023-01-01 10:00:00", "amount": 250, "ceiling": 300, "remanent": 50}]}'
+
+    peaks = measure(body, ValidatorInput, validate_parsed_transactions)
+
+    assert 0 < peaks["validation"] <= peaks["total"]
+    assert 0 < peaks["engine"] <= peaks["total"]
+
+def test_engine_memory_is_bounded_by_the_chunk_size():
+    transactions = [
+        {"date": f"2023-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:00", "amount": 100 + minute}
+        for month in range(1, 13) for day in range(1, 29) for hour in range(6) for minute in range(10)
+    ]
+    body = json.dumps({
+        "age": 29, "wage": 50000, "inflation": 5.5,
+        "k": [{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+        "kSpec": {"granularity": "month", "from": "2023-01-01 00:00:00", "to": "2023-12-31 23:59:59"},
+        "transactions": transactions
+    }).encode()
+
+    chunked = measure_engine_chunks(body, "nps", 500)["engine"]
+    whole = measure_engine_chunks(body, "nps", len(transactions))["engine"]
+
+    # Only one chunk of remanents is alive at a time, the rest is the duplicate date set
+    assert chunked < whole
+    assert whole - chunked > 20 * len(transactions)
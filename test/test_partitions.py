@@ -0,0 +1,144 @@
+import sys
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from src.services.partitionServices import (
+    MAINTENANCE_LOCK_KEY,
+    add_months,
+    maintain_partitions,
+    partition_month,
+    partition_name,
+    partitions_to_create,
+    partitions_to_prune
+)
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+def test_partition_names_round_trip():
+    name = partition_name(date(2026, 10, 1))
+    assert name == "calculation_history_y2026m10"
+    assert partition_month(name) == date(2026, 10, 1)
+    assert partition_month("calculation_history_default") is None
+
+def test_partitions_are_created_for_the_current_month_and_ahead():
+    planned = partitions_to_create(date(2026, 11, 18), months_ahead=2)
+
+    assert planned == [
+        ("calculation_history_y2026m11", date(2026, 11, 1), date(2026, 12, 1)),
+        ("calculation_history_y2026m12", date(2026, 12, 1), date(2027, 1, 1)),
+        ("calculation_history_y2027m01", date(2027, 1, 1), date(2027, 2, 1))
+    ]
+
+def test_only_months_before_the_retention_window_are_pruned():
+    names = [
+        "calculation_history_y2026m06",
+        "calculation_history_y2026m07",
+        "calculation_history_y2026m08",
+        "calculation_history_default"
+    ]
+
+    assert partitions_to_prune(names, date(2026, 10, 18), retention_months=3) == ["calculation_history_y2026m06"]
+    assert partitions_to_prune(names, date(2026, 10, 18), retention_months=0) == []
+
+class FakeResult:
+    def __init__(self, rows=(), scalar=None):
+        self.rows = list(rows)
+        self._scalar = scalar
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def scalar(self):
+        return self._scalar
+
+class FakeConnection:
+    """Records the executed SQL and answers the catalog and default partition lookups."""
+
+    def __init__(self, partitions, default_months=()):
+        self.partitions = partitions
+        self.default_months = set(default_months)
+        self.statements = []
+        self.params = []
+
+    async def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        self.params.append(params)
+        if "FROM pg_inherits" in sql:
+            return FakeResult(rows=[(name,) for name in self.partitions])
+        if sql.startswith("SELECT EXISTS"):
+            return FakeResult(scalar=params["start"] in self.default_months)
+        return FakeResult()
+
+class FakeEngine:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self.connection
+
+def _maintain(connection, monkeypatch, retention_months=0, mode="archive"):
+    monkeypatch.setattr(settings, "HISTORY_PARTITIONS_AHEAD", 1)
+    monkeypatch.setattr(settings, "HISTORY_RETENTION_MONTHS", retention_months)
+    monkeypatch.setattr(settings, "HISTORY_RETENTION_MODE", mode)
+    return asyncio.run(maintain_partitions(FakeEngine(connection), date(2026, 10, 18)))
+
+def _ddl(connection):
+    return [sql for sql in connection.statements if not sql.startswith("SELECT")]
+
+def test_maintenance_holds_the_advisory_lock_and_creates_missing_months(monkeypatch):
+    connection = FakeConnection(["calculation_history_default", "calculation_history_y2026m10"])
+
+    outcome = _maintain(connection, monkeypatch)
+
+    assert connection.statements[0] == "SELECT pg_advisory_xact_lock(:key)"
+    assert connection.params[0] == {"key": MAINTENANCE_LOCK_KEY}
+    assert outcome == {"created": ["calculation_history_y2026m11"], "pruned": []}
+    assert _ddl(connection) == [
+        "CREATE TABLE calculation_history_y2026m11 PARTITION OF calculation_history "
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')"
+    ]
+
+def test_rows_in_the_default_partition_move_into_the_new_month(monkeypatch):
+    connection = FakeConnection(["calculation_history_default"], default_months=[date(2026, 10, 1)])
+
+    outcome = _maintain(connection, monkeypatch)
+
+    assert outcome["created"] == ["calculation_history_y2026m10", "calculation_history_y2026m11"]
+    assert _ddl(connection) == [
+        "CREATE TABLE calculation_history_y2026m10 (LIKE calculation_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        "WITH moved AS (DELETE FROM calculation_history_default "
+        "WHERE created_at >= '2026-10-01' AND created_at < '2026-11-01' RETURNING *) "
+        "INSERT INTO calculation_history_y2026m10 SELECT * FROM moved",
+        "ALTER TABLE calculation_history ATTACH PARTITION calculation_history_y2026m10 "
+        "FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')",
+        "CREATE TABLE calculation_history_y2026m11 PARTITION OF calculation_history "
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')"
+    ]
+
+def test_retention_drops_or_archives_old_months_but_never_the_default(monkeypatch):
+    partitions = [
+        "calculation_history_default",
+        "calculation_history_y2026m06",
+        "calculation_history_y2026m10",
+        "calculation_history_y2026m11"
+    ]
+
+    dropped = FakeConnection(partitions)
+    assert _maintain(dropped, monkeypatch, retention_months=3, mode="drop")["pruned"] == ["calculation_history_y2026m06"]
+    assert _ddl(dropped) == ["DROP TABLE calculation_history_y2026m06"]
+
+    archived = FakeConnection(partitions)
+    _maintain(archived, monkeypatch, retention_months=3, mode="archive")
+    assert _ddl(archived) == [
+        "ALTER TABLE calculation_history DETACH PARTITION calculation_history_y2026m06",
+        "ALTER TABLE calculation_history_y2026m06 RENAME TO calculation_history_archive_y2026m06"
+    ]
@@ -0,0 +1,140 @@
+import sys
+import os
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+
+from main import app
+from src.connection.session import get_db
+from src.routes import RetireSaveUp
+from src.schema.returnCalcSchema import ReturnsInput, ReturnsResponse
+from src.services.admissionControl import AdmissionController
+from src.services.projectionServices import growth_factors, project_balances, project_returns
+from src.services.returnCalcServices import interest_rate_for, process_returns
+from src.utils import get_current_user
+
+PAYLOAD = ReturnsInput(
+    age=29,
+    wage=50000,
+    inflation=5.5,
+    q=[{"start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59", "fixed": 0}],
+    p=[{"start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59", "extra": 25}],
+    k=[
+        {"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"},
+        {"start": "2023-03-01 00:00:00", "end": "2023-11-30 23:59:59"}
+    ],
+    transactions=[
+        {"date": "2023-10-12 20:15:30", "amount": 250},
+        {"date": "2023-02-28 15:49:20", "amount": 375},
+        {"date": "2023-07-01 21:59:00", "amount": 620},
+        {"date": "2023-12-17 08:09:45", "amount": 480}
+    ]
+)
+
+def test_growth_factors_are_cached_and_read_only():
+    growth_factors.cache_clear()
+    growth, deflators = growth_factors(0.0711, 0.055, 31)
+    assert growth_factors(0.0711, 0.055, 31)[0] is growth
+    assert growth_factors.cache_info().hits == 1
+
+    assert growth.shape == deflators.shape == (32,)
+    assert growth[0] == deflators[0] == 1.0
+    with pytest.raises(ValueError):
+        growth[0] = 2.0
+
+def test_balances_are_an_outer_product_per_year():
+    nominal, real = project_balances(np.array([100.0, 200.0]), 0.10, 0.0, 2)
+
+    assert np.allclose(nominal, [[100.0, 110.0, 121.0], [200.0, 220.0, 242.0]])
+    assert np.allclose(real, nominal)
+
+@pytest.mark.parametrize("investment_type", ["nps", "index"])
+def test_projection_ends_at_the_calculated_profit(investment_type):
+    result = process_returns(PAYLOAD, investment_type)
+
+    projected = project_returns(result, PAYLOAD, investment_type)
+
+    assert len(projected.savingsByDates) == len(result.savingsByDates)
+    for savings in projected.savingsByDates:
+        curve = savings.projection
+        assert curve.years == list(range(31 + 1))
+        assert curve.nominal[0] == curve.real[0] == savings.amount
+        assert curve.nominal[-1] >= curve.real[-1]
+
+    # The last year is the engine's unrounded final balance, so its profit is exact
+    invested = np.array(result._invested_amounts)
+    _, real = project_balances(invested, interest_rate_for(investment_type), 0.055, 31)
+    for savings, amount, final in zip(result.savingsByDates, invested, real[:, -1]):
+        assert round(final - amount, 2) == savings.profit
+    assert [savings.projection.real[-1] for savings in projected.savingsByDates] == np.round(real[:, -1], 2).tolist()
+
+def test_replayed_results_are_projected_from_unrounded_amounts():
+    result = process_returns(PAYLOAD, "index")
+    # Results loaded from the idempotency store or history only carry rounded amounts
+    replayed = ReturnsResponse.model_validate(result.model_dump())
+    assert replayed._invested_amounts is None
+
+    assert project_returns(replayed, PAYLOAD, "index") == project_returns(result, PAYLOAD, "index")
+
+def _replay_with_projection(monkeypatch, replayed, controller, user_id=None):
+    async def replay(db, user_id, investment_type, payload, idempotency_key, compute):
+        return replayed, True
+
+    monkeypatch.setattr(RetireSaveUp, "calculate_once", replay)
+    monkeypatch.setattr(RetireSaveUp, "admission_controller", controller)
+    user = SimpleNamespace(id=user_id or uuid.uuid4())
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        return TestClient(app).post(
+            "/blackrock/challenge/v1/returns:index?projection=true",
+            json=PAYLOAD.model_dump(),
+            headers={"Idempotency-Key": "replayed"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+        app.dependency_overrides.pop(get_db)
+
+def _controller():
+    return AdmissionController(
+        user_burst=10, user_refill_per_second=0.001, rows_per_token=100,
+        max_concurrency=1, latency_budget_seconds=0.05
+    )
+
+def test_replay_without_unrounded_amounts_is_admitted_before_projecting(monkeypatch):
+    """Tests that rerunning the engine for a replayed projection goes through admission control."""
+    result = process_returns(PAYLOAD, "index")
+    replayed = ReturnsResponse.model_validate(result.model_dump())
+
+    controller = _controller()
+    response = _replay_with_projection(monkeypatch, replayed, controller)
+    assert response.status_code == 200
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert response.json() == project_returns(result, PAYLOAD, "index").model_dump()
+    assert controller.snapshot()["admitted"] == 1
+    assert controller.snapshot()["active"] == 0
+
+    # A user without budget left is shed instead of getting an unadmitted engine run
+    user_id = uuid.uuid4()
+    controller._bucket(user_id, time.monotonic()).tokens = 0.0
+    response = _replay_with_projection(monkeypatch, replayed, controller, user_id)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+def test_replay_with_stored_unrounded_amounts_skips_the_engine(monkeypatch):
+    result = process_returns(PAYLOAD, "index")
+    replayed = ReturnsResponse.model_validate(result.model_dump())
+    replayed._invested_amounts = result._invested_amounts
+
+    controller = _controller()
+    response = _replay_with_projection(monkeypatch, replayed, controller)
+
+    assert response.status_code == 200
+    assert response.json() == project_returns(result, PAYLOAD, "index").model_dump()
+    assert controller.snapshot()["admitted"] == 0
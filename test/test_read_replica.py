@@ -0,0 +1,184 @@
+import sys
+import os
+import asyncio
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+
+from src import utils
+from src.connection.session import ReadSessionRouter
+from src.security.auth import create_access_token
+from src.services.exportServices import _stream_history_rows
+
+Row = namedtuple("Row", ["id", "user_id", "investment_type", "created_at", "result"])
+
+class FakeSession:
+    def __init__(self, name, reachable=True, failing=False):
+        self.name = name
+        self.reachable = reachable
+        self.failing = failing
+        self.closed = False
+        self.queries = []
+
+    async def connection(self):
+        if not self.reachable:
+            raise OperationalError("SELECT 1", {}, ConnectionRefusedError())
+
+    async def exec(self, statement):
+        if self.failing:
+            raise OperationalError(statement, {}, Exception("canceling statement due to conflict with recovery"))
+        self.queries.append(statement)
+        return self.name
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+class FakeSessionMaker:
+    def __init__(self, name, reachable=True, failing=False):
+        self.name = name
+        self.reachable = reachable
+        self.failing = failing
+        self.opened = []
+
+    def __call__(self):
+        session = FakeSession(self.name, self.reachable, self.failing)
+        self.opened.append(session)
+        return session
+
+async def _session_name(router):
+    async with router.session() as session:
+        return session.name
+
+def test_reads_use_the_replica_when_it_is_reachable():
+    router = ReadSessionRouter(FakeSessionMaker("replica"), FakeSessionMaker("primary"), retry_seconds=30)
+
+    assert asyncio.run(_session_name(router)) == "replica"
+    assert router.read_sessions.opened[0].closed
+
+def test_unreachable_replica_falls_back_to_the_primary_and_is_skipped():
+    replica = FakeSessionMaker("replica", reachable=False)
+    router = ReadSessionRouter(replica, FakeSessionMaker("primary"), retry_seconds=30)
+
+    assert asyncio.run(_session_name(router)) == "primary"
+    assert asyncio.run(_session_name(router)) == "primary"
+    # The second read does not try the replica again within the retry window
+    assert len(replica.opened) == 1
+    assert replica.opened[0].closed
+    assert router.fallbacks == 1
+
+def test_same_session_maker_means_no_replica():
+    primary = FakeSessionMaker("primary")
+    router = ReadSessionRouter(primary, primary, retry_seconds=30)
+
+    assert not router.uses_replica
+    assert asyncio.run(_session_name(router)) == "primary"
+
+def test_failed_replica_query_is_retried_on_the_primary():
+    replica = FakeSessionMaker("replica", failing=True)
+    primary = FakeSessionMaker("primary")
+    router = ReadSessionRouter(replica, primary, retry_seconds=30)
+
+    async def scenario():
+        async with router.session() as session:
+            first = await session.exec("SELECT 1")
+            # Later queries of the same session stay on the primary
+            second = await session.exec("SELECT 2")
+            return first, second
+
+    assert asyncio.run(scenario()) == ("primary", "primary")
+    assert replica.opened[0].closed
+    assert primary.opened[0].queries == ["SELECT 1", "SELECT 2"]
+    assert primary.opened[0].closed
+    assert router.fallbacks == 1
+    # The replica is skipped for the next reads
+    assert asyncio.run(_session_name(router)) == "primary"
+    assert len(replica.opened) == 1
+
+class Rows:
+    def __init__(self, partitions, fail_after=None):
+        self._partitions = partitions
+        self._fail_after = fail_after
+
+    async def partitions(self):
+        for number, partition in enumerate(self._partitions):
+            if number == self._fail_after:
+                raise OperationalError("FETCH", {}, Exception("terminating connection due to conflict with recovery"))
+            yield partition
+
+HISTORY = [
+    Row(uuid.UUID(int=number), uuid.UUID(int=0), "nps", datetime(2026, 1, number + 1), {"savingsByDates": []})
+    for number in range(6)
+]
+
+class StreamingSession(FakeSession):
+    def __init__(self, name, reachable=True, failing=False, fail_after=None):
+        super().__init__(name, reachable, failing)
+        self.fail_after = fail_after
+
+    async def stream(self, statement):
+        self.queries.append(statement)
+        # The resumed query only asks for rows after the last one sent
+        after = [value for value in statement.compile().params.values() if isinstance(value, datetime)]
+        rows = [row for row in HISTORY if not after or row.created_at > after[0]]
+        return Rows([rows[start:start + 2] for start in range(0, len(rows), 2)], self.fail_after)
+
+class StreamingSessionMaker(FakeSessionMaker):
+    def __init__(self, name, fail_after=None):
+        super().__init__(name)
+        self.fail_after = fail_after
+
+    def __call__(self):
+        session = StreamingSession(self.name, fail_after=self.fail_after)
+        self.opened.append(session)
+        return session
+
+def test_export_resumes_on_the_primary_when_the_replica_fails_mid_stream():
+    replica = StreamingSessionMaker("replica", fail_after=2)
+    primary = StreamingSessionMaker("primary")
+    router = ReadSessionRouter(replica, primary, retry_seconds=30)
+
+    async def scenario():
+        return [rows async for rows in _stream_history_rows(None, 2, sessions=router)]
+
+    chunks = asyncio.run(scenario())
+
+    # Every row exactly once, in order, although the replica broke after two chunks
+    assert [row[0] for rows in chunks for row in rows] == [str(row.id) for row in HISTORY]
+    assert len(primary.opened) == 1
+    assert router.fallbacks == 1
+    assert replica.opened[0].closed and primary.opened[0].closed
+
+class UserSession(FakeSession):
+    def __init__(self, name, user=None):
+        super().__init__(name)
+        self.user = user
+        self.on_replica = name == "replica"
+
+    async def exec(self, statement):
+        self.queries.append(statement)
+        return SimpleNamespace(first=lambda: self.user)
+
+def test_auth_reads_the_replica_and_falls_back_for_users_it_has_not_seen(monkeypatch):
+    user = SimpleNamespace(id=uuid.uuid4(), email="new@example.com")
+    token = create_access_token(data={"sub": user.email})
+    primary = UserSession("primary", user)
+    monkeypatch.setattr(utils, "AsyncSessionLocal", lambda: primary)
+
+    # A user the replica already has is served without touching the primary
+    assert asyncio.run(utils.get_current_user(token, UserSession("replica", user))) is user
+    assert primary.queries == []
+
+    # A user registered moments ago is looked up again on the primary
+    assert asyncio.run(utils.get_current_user(token, UserSession("replica"))) is user
+    assert len(primary.queries) == 1 and primary.closed
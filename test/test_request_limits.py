@@ -0,0 +1,106 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.commands.benchmarkMemory import measure_guard
+from src.services.requestLimits import (
+    RequestLimitMiddleware,
+    RequestLimits,
+    RouteLimit,
+    RowCounter,
+    parse_route_limits
+)
+
+class Payload(BaseModel):
+    transactions: list
+
+def _client(limits: RequestLimits) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestLimitMiddleware, limits=limits)
+
+    @app.post("/api/items")
+    def parsed(payload: Payload):
+        return {"rows": len(payload.transactions)}
+
+    @app.post("/api/raw")
+    async def raw(request: Request):
+        return {"bytes": len(await request.body())}
+
+    return TestClient(app)
+
+def _body(rows: int) -> bytes:
+    return json.dumps({"transactions": [{"date": "2023-01-01 00:00:00", "amount": 1.0}] * rows}).encode()
+
+def _chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+def test_parse_route_limits():
+    limits = parse_route_limits(" returns:nps:batch=1000:20, tax:batch=500:0,,jobs/returns:nps=300")
+    assert limits == {
+        "returns:nps:batch": RouteLimit(1000, 20),
+        "tax:batch": RouteLimit(500, 0),
+        "jobs/returns:nps": RouteLimit(300, 0)
+    }
+
+    request_limits = RequestLimits(RouteLimit(10, 1), limits, prefix="/api/")
+    assert request_limits.for_path("/api/tax:batch") == RouteLimit(500, 0)
+    assert request_limits.for_path("/api/returns:nps") == RouteLimit(10, 1)
+
+def test_row_counter_finds_tokens_split_across_chunks():
+    body = _body(50)
+    for size in (1, 3, 5, 7, 64):
+        counter = RowCounter()
+        for chunk in _chunks(body, size):
+            counter.feed(chunk)
+        assert counter.rows == 50
+
+def test_declared_content_length_over_the_limit_is_rejected():
+    limits = RequestLimits(RouteLimit(1000, 0), {}, prefix="/api/")
+    client = _client(limits)
+
+    assert client.post("/api/items", content=_body(5), headers={"content-type": "application/json"}).json() == {"rows": 5}
+
+    response = client.post("/api/items", content=_body(100), headers={"content-type": "application/json"})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body exceeds the limit of 1000 bytes"}
+    assert limits.rejected == 1
+
+def test_streamed_body_over_the_limit_is_rejected():
+    limits = RequestLimits(RouteLimit(1000, 0), {"raw": RouteLimit(100000, 0)}, prefix="/api/")
+    client = _client(limits)
+
+    # Chunked uploads carry no Content-Length, the guard counts the bytes as they arrive
+    response = client.post("/api/items", content=_chunks(_body(100), 128), headers={"content-type": "application/json"})
+    assert response.status_code == 413
+    assert limits.rejected == 1
+
+    # The per-route limit lets the same body through on another route
+    assert client.post("/api/raw", content=_chunks(_body(100), 128)).json() == {"bytes": len(_body(100))}
+
+def test_row_limit_is_enforced_while_streaming():
+    limits = RequestLimits(RouteLimit(100000, 20), {}, prefix="/api/")
+    client = _client(limits)
+
+    assert client.post("/api/items", content=_chunks(_body(20), 5), headers={"content-type": "application/json"}).json() == {"rows": 20}
+
+    response = client.post("/api/items", content=_chunks(_body(21), 5), headers={"content-type": "application/json"})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request exceeds the limit of 20 transactions"}
+    assert limits.snapshot()["rejected"] == 1
+
+def test_rejected_body_memory_is_bounded_by_the_limit():
+    small = measure_guard(_body(100), RouteLimit(64 * 1024, 0), chunk_bytes=4096)
+    large = measure_guard(_body(50000), RouteLimit(64 * 1024, 0), chunk_bytes=4096)
+
+    assert small["status"] == 200
+    assert large["status"] == 413
+    # Reading stops at the limit however large the body is
+    assert large["peak"] < 4 * 64 * 1024
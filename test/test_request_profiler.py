@@ -0,0 +1,95 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.services.executionPolicy import ExecutionPolicy
+from src.services.requestProfiler import ProfileStore, ProfilingMiddleware, RequestProfiler
+from src.services.returnCalcServices import process_returns
+
+def _client(store: ProfileStore, sample_rate: float = 0.0) -> TestClient:
+    app = FastAPI()
+    profiler = RequestProfiler(store, token="secret", sample_rate=sample_rate, path_pattern=r"/returns:")
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.post("/returns:nps")
+    def returns():
+        return {"total": sum(range(1000))}
+
+    return TestClient(app)
+
+def test_privileged_header_stores_a_profile(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=10)
+    client = _client(store)
+
+    response = client.post("/returns:nps", headers={"X-Profile": "secret"})
+
+    profile_id = response.headers["x-profile-id"]
+    assert [entry["id"] for entry in store.list()] == [profile_id]
+    assert store.list()[0]["path"] == "/returns:nps"
+    assert "function calls" in store.render(profile_id)
+
+def test_requests_without_token_or_sampling_are_not_profiled(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=10)
+    client = _client(store)
+
+    assert "x-profile-id" not in client.post("/returns:nps", headers={"X-Profile": "wrong"}).headers
+    assert "x-profile-id" not in client.post("/returns:nps").headers
+    assert store.list() == []
+
+def test_sampling_and_ring_buffer_bound(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=3)
+    client = _client(store, sample_rate=1.0)
+
+    ids = [client.post("/returns:nps").headers["x-profile-id"] for _ in range(5)]
+
+    assert [entry["id"] for entry in store.list()] == ids[:-4:-1]
+    assert len(os.listdir(tmp_path)) == 6
+
+def test_profile_ids_cannot_escape_the_directory(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=3)
+
+    assert store.profile_path("../../etc/passwd") is None
+    assert store.render("../secret") is None
+
+def test_profiles_of_large_payloads_contain_the_engine(tmp_path):
+    """Tests that payloads above the inline threshold are profiled with their engine frames."""
+    store = ProfileStore(str(tmp_path), max_files=10)
+    policy = ExecutionPolicy(inline_threshold=1000, mode="thread", max_workers=1)
+    app = FastAPI()
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=RequestProfiler(store, token="secret", sample_rate=0.0, path_pattern=r"/returns:")
+    )
+
+    @app.post("/returns:nps")
+    async def returns(payload: ReturnsInput):
+        result = await policy.run(process_returns, payload, "nps", size=len(payload.transactions))
+        return {"savings": len(result.savingsByDates)}
+
+    payload = {
+        "age": 29,
+        "wage": 50000,
+        "inflation": 5.5,
+        "k": [{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+        "transactions": [
+            {"date": f"2023-{month:02d}-{day:02d} 10:{minute:02d}:00", "amount": 100 + minute}
+            for month in range(1, 13) for day in range(1, 29) for minute in range(5)
+        ]
+    }
+    client = TestClient(app)
+
+    profiled = client.post("/returns:nps", json=payload, headers={"X-Profile": "secret"})
+    plain = client.post("/returns:nps", json=payload)
+    policy.shutdown()
+
+    assert len(payload["transactions"]) > policy.inline_threshold
+    assert "iter_returns" in store.render(profiled.headers["x-profile-id"], top=200)
+    # Requests that are not profiled still go to the pool
+    assert plain.status_code == 200
+    assert policy.snapshot()["inlineCalls"] == 1
+    assert policy.snapshot()["offloadedCalls"] == 1
@@ -0,0 +1,123 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.schema.transactions import FilterInput
+from src.services.executionPolicy import ExecutionPolicy
+from src.services.returnCalcServices import process_returns
+from src.services.transactionServices import apply_period_rules
+from src.services.stageTimer import (
+    StageMetrics,
+    StageTimingMiddleware,
+    StageTimings,
+    _current,
+    begin_stage,
+    stage
+)
+
+PAYLOAD = ReturnsInput(
+    age=29,
+    wage=50000,
+    inflation=5.5,
+    q=[{"start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59", "fixed": 0}],
+    p=[{"start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59", "extra": 25}],
+    k=[{"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"}],
+    transactions=[
+        {"date": "2023-10-12 20:15:30", "amount": 250},
+        {"date": "2023-02-28 15:49:20", "amount": 375}
+    ]
+)
+
+ENGINE_STAGES = {"dedup", "q", "p", "k", "compounding", "tax"}
+
+def test_stages_are_a_no_op_outside_a_request():
+    with stage("rules"):
+        pass
+    assert _current.get() is None
+
+def test_engine_records_every_stage():
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        process_returns(PAYLOAD, "nps")
+    finally:
+        _current.reset(token)
+
+    assert set(timings.stages) == ENGINE_STAGES
+
+def test_filter_engine_reports_every_rule_step():
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        apply_period_rules(FilterInput(**PAYLOAD.model_dump(include={"wage", "q", "p", "k", "transactions"})))
+    finally:
+        _current.reset(token)
+
+    assert set(timings.stages) == {"dedup", "q", "p", "k"}
+    assert all(seconds > 0 for seconds in timings.stages.values())
+
+def test_rule_steps_read_the_clock_per_chunk_not_per_row(monkeypatch):
+    import src.services.stageTimer as stage_timer
+
+    def clock_reads(rows):
+        reads = []
+        monkeypatch.setattr(stage_timer.time, "perf_counter", lambda: reads.append(None) or 0.0)
+        payload = ReturnsInput.model_validate({**PAYLOAD.model_dump(), "transactions": [
+            {"date": f"2023-03-{day:02d} 10:00:00", "amount": 120 + day} for day in range(1, rows + 1)
+        ]})
+        token = _current.set(StageTimings())
+        try:
+            process_returns(payload, "nps")
+        finally:
+            _current.reset(token)
+        monkeypatch.undo()
+        return len(reads)
+
+    assert clock_reads(2) == clock_reads(28)
+
+def test_offloaded_stage_timings_are_merged_back():
+    policy = ExecutionPolicy(inline_threshold=0, mode="thread", max_workers=1)
+
+    async def run():
+        timings = StageTimings()
+        token = _current.set(timings)
+        try:
+            await policy.run(process_returns, PAYLOAD, "index", size=2)
+        finally:
+            _current.reset(token)
+        return timings
+
+    try:
+        timings = asyncio.run(run())
+    finally:
+        policy.shutdown()
+
+    assert policy.offloaded_calls == 1
+    assert set(timings.stages) == ENGINE_STAGES
+
+def test_server_timing_header_and_histograms():
+    metrics = StageMetrics()
+    app = FastAPI()
+    app.add_middleware(StageTimingMiddleware, metrics=metrics)
+
+    @app.get("/work")
+    def work():
+        with stage("engine"):
+            sum(range(1000))
+        begin_stage("serialization")
+        return {"ok": True}
+
+    response = TestClient(app).get("/work")
+
+    names = [part.split(";")[0] for part in response.headers["server-timing"].split(", ")]
+    assert names == ["engine", "serialization", "total"]
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"engine", "serialization", "total"}
+    assert snapshot["total"]["count"] == 1
+    assert sum(snapshot["total"]["buckets"].values()) == 1
@@ -0,0 +1,55 @@
+import sys
+import os
+import json
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A cold 'import main' measured about 1.15s (median of 8 runs, mostly fastapi and
+# sqlmodel); the budget is that plus half again as a margin for slower machines
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.75"))
+
+LAZY_MODULES = ("psutil", "bcrypt", "pyarrow", "numpy", "brotli", "tracemalloc", "cProfile", "pstats")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "loaded": [name for name in sys.argv[1:] if name in sys.modules]
+}))
+"""
+
+def test_cold_import_stays_within_startup_budget():
+    """Tests that importing the app fits the startup budget and keeps heavy modules lazy."""
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, *LAZY_MODULES],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert probe["seconds"] < STARTUP_BUDGET_SECONDS
+    # numpy comes with the engine, which the routes import on first use
+    assert probe["loaded"] == []
+
+def test_startup_report_lists_phases_and_first_request():
+    client = TestClient(app)
+    client.get("/blackrock/challenge/v1/performance")
+    # The static assets are loaded and precompressed by the first static request
+    client.get("/")
+
+    report = client.get("/blackrock/challenge/v1/performance/startup").json()
+
+    phase_names = [phase["name"] for phase in report["phases"]]
+    assert phase_names[:2] == ["import:framework", "import:routers"]
+    assert "app:static-assets" in phase_names
+    assert report["timeToFirstRequestMs"] is not None
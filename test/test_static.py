@@ -0,0 +1,60 @@
+import sys
+import os
+import re
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+def test_index_is_compressed_and_revalidated_with_etag():
+    """Tests that the index page is served gzip encoded with a strong ETag and 304 support."""
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["vary"] == "Accept-Encoding"
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('-gzip"')
+
+    cached = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # The gzip ETag does not validate another encoding, that body has to be sent
+    identity = client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert identity.status_code == 200
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] == etag.replace("-gzip", "")
+    assert identity.content
+
+def test_brotli_variant_is_preferred_when_accepted():
+    """Tests that brotli, a listed dependency, yields a br variant next to gzip."""
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"].endswith('-br"')
+    assert response.text == client.get("/", headers={"Accept-Encoding": "identity"}).text
+
+def test_index_references_fingerprinted_immutable_script():
+    """Tests that index.html links script.js through a fingerprinted, immutable URL."""
+    html = client.get("/", headers={"Accept-Encoding": "identity"}).text
+    match = re.search(r'/static/(script\.[0-9a-f]{12}\.js)', html)
+    assert match
+
+    script = client.get(f"/static/{match.group(1)}")
+    assert script.status_code == 200
+    assert script.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert script.text == client.get("/static/script.js").text
+
+def test_plain_asset_names_still_work_and_unknown_ones_404():
+    response = client.get("/static/script.js", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "javascript" in response.headers["content-type"]
+
+    assert client.get("/static/missing.js").status_code == 404
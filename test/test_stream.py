@@ -0,0 +1,138 @@
+import sys
+import os
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.schema.returnCalcSchema import ReturnsInput
+from src.services.admissionControl import admission_controller
+from src.services.returnCalcServices import process_returns
+from src.services.streamServices import stream_chunk_rows, stream_returns_events
+from src.utils import get_current_user
+
+client = TestClient(app)
+
+TRANSACTIONS = [
+    {"date": f"2023-{month:02d}-{day:02d} 10:00:00", "amount": 100 + month * 7 + day}
+    for month in range(1, 13)
+    for day in range(1, 29)
+]
+
+PAYLOAD = {
+    "age": 29,
+    "wage": 50000,
+    "inflation": 5.5,
+    "q": [{"fixed": 0, "start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59"}],
+    "p": [{"extra": 25, "start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59"}],
+    "k": [
+        {"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"},
+        {"start": "2023-03-01 00:00:00", "end": "2023-11-30 23:59:59"}
+    ],
+    "kSpec": {"granularity": "quarter", "from": "2023-01-01 00:00:00", "to": "2023-12-31 23:59:59"},
+    "transactions": TRANSACTIONS
+}
+
+def _parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_returns_stream_reports_progress_windows_and_result():
+    payload = ReturnsInput(**PAYLOAD)
+    saved = []
+
+    async def persist(user_id, investment_type, stored_payload, result):
+        saved.append(result)
+
+    async def collect():
+        chunks = []
+        async for chunk in stream_returns_events(uuid.uuid4(), "nps", payload, chunk_size=100, persist=persist):
+            chunks.append(chunk.decode())
+        return "".join(chunks)
+
+    events = _parse_events(asyncio.run(collect()))
+    names = [name for name, _ in events]
+    expected = process_returns(payload, "nps")
+
+    progress = [data for name, data in events if name == "progress"]
+    assert [entry["rowsProcessed"] for entry in progress if entry["stage"] == "rules"] == [100, 200, 300, 336]
+    assert names.count("savings") == len(expected.savingsByDates) == 6
+    assert names[-1] == "result"
+    assert events[-1][1] == expected.model_dump()
+    assert saved == [expected]
+
+    # The rows are sorted by date, so Q1 (ends with row 84) is reported after the first chunk
+    savings = [(index, data) for index, (name, data) in enumerate(events) if name == "savings"]
+    assert savings[0][0] == names.index("progress") + 1
+    assert (savings[0][1]["start"], savings[0][1]["end"]) == ("2023-01-01 00:00:00", "2023-03-31 23:59:59")
+
+def test_unsorted_rows_report_every_window_at_the_end():
+    payload = ReturnsInput(**{**PAYLOAD, "transactions": TRANSACTIONS[::-1]})
+
+    async def persist(user_id, investment_type, stored_payload, result):
+        pass
+
+    async def collect():
+        chunks = stream_returns_events(uuid.uuid4(), "nps", payload, chunk_size=100, persist=persist)
+        return [chunk.decode() async for chunk in chunks]
+
+    events = _parse_events("".join(asyncio.run(collect())))
+    names = [name for name, _ in events]
+
+    assert names[-7:] == ["savings"] * 6 + ["result"]
+    assert events[-1][1] == process_returns(ReturnsInput(**PAYLOAD), "nps").model_dump()
+
+def test_result_is_sent_when_persisting_fails():
+    payload = ReturnsInput(**PAYLOAD)
+
+    async def persist(user_id, investment_type, stored_payload, result):
+        raise ConnectionError("history database unavailable")
+
+    async def collect():
+        chunks = stream_returns_events(uuid.uuid4(), "index", payload, chunk_size=100, persist=persist)
+        return [chunk.decode() async for chunk in chunks]
+
+    events = _parse_events("".join(asyncio.run(collect())))
+    names = [name for name, _ in events]
+
+    # The finished calculation is not lost, the failed write is reported after it
+    assert names[-2:] == ["result", "persist_error"]
+    assert "error" not in names
+    assert events[-2][1] == process_returns(payload, "index").model_dump()
+    assert events[-1][1] == {"detail": "history database unavailable"}
+
+def test_slices_shrink_with_the_number_of_rules():
+    payload = ReturnsInput(**PAYLOAD)
+    # One q, one p and two explicit k periods
+    assert stream_chunk_rows(payload, 900) == 180
+    assert stream_chunk_rows(payload.model_copy(update={"q": [], "p": [], "k": []}), 900) == 900
+    assert stream_chunk_rows(payload, 2) == 1
+
+def test_filter_stream_endpoint():
+    # Unauthenticated requests never reach the engine
+    assert client.post("/blackrock/challenge/v1/transactions:filter:stream", json={}).status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=uuid.uuid4())
+    try:
+        response = client.post(
+            "/blackrock/challenge/v1/transactions:filter:stream",
+            json={"wage": 50000, "q": [], "p": [], "k": PAYLOAD["k"], "transactions": TRANSACTIONS}
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    assert events[0][0] == "progress"
+    assert events[-1][0] == "result"
+    assert len(events[-1][1]["valid"]) == len(TRANSACTIONS)
+    assert admission_controller.snapshot()["active"] == 0
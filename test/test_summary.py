@@ -0,0 +1,89 @@
+import sys
+import os
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.schema.returnCalcSchema import ReturnsInput
+from src.models.history import CalculationHistory
+from src.services.historyServices import backfill_totals
+from src.services.returnCalcServices import process_returns
+from src.services.summaryServices import summarize_results
+
+def _payload(**overrides):
+    payload = {
+        "age": 29,
+        "wage": 50000,
+        "inflation": 5.5,
+        "q": [{"fixed": 0, "start": "2023-07-01 00:00:00", "end": "2023-07-31 23:59:59"}],
+        "p": [{"extra": 25, "start": "2023-10-01 08:00:00", "end": "2023-12-31 19:59:59"}],
+        "k": [
+            {"start": "2023-01-01 00:00:00", "end": "2023-12-31 23:59:59"},
+            {"start": "2023-03-01 00:00:00", "end": "2023-11-30 23:59:59"}
+        ],
+        "transactions": [
+            {"date": "2023-02-28 15:49:20", "amount": 375},
+            {"date": "2023-07-01 21:59:00", "amount": 620},
+            {"date": "2023-10-12 20:15:30", "amount": 250},
+            {"date": "2023-12-17 08:09:45", "amount": 480}
+        ]
+    }
+    payload.update(overrides)
+    return ReturnsInput.model_validate(payload)
+
+def test_summarize_results_counts_overlapping_windows_once():
+    # The spring-to-autumn window (75) lies inside the yearly one (145)
+    example = process_returns(_payload(), "nps")
+    assert [savings.amount for savings in example.savingsByDates] == [145.0, 75.0]
+
+    # Only the first row falls into a window, the others are never invested
+    partly_covered = process_returns(
+        _payload(k=[{"start": "2023-01-01 00:00:00", "end": "2023-02-28 23:59:59"}]), "index"
+    )
+    no_windows = process_returns(_payload(k=[]), "nps")
+
+    totals = summarize_results([example, partly_covered, no_windows])
+
+    assert totals["calculations"] == 3
+    assert totals["total_invested"] == 145.0 + 25.0
+    assert round(totals["total_profit"], 2) == round(86.88 + partly_covered.savingsByDates[0].profit, 2)
+    assert totals["total_tax_benefit"] == 0.0
+
+def test_calculation_totals_derive_profit_and_tax_from_the_invested_amount():
+    # 12L a year puts the NPS deduction in the 15% slab, so the tax benefit is non-zero
+    result = process_returns(_payload(wage=100000), "nps")
+
+    assert result._totals.total_invested == 145.0
+    assert result._totals.total_profit == result.savingsByDates[0].profit
+    assert result._totals.total_tax_benefit == result.savingsByDates[0].taxBenefit == 21.75
+
+class BackfillSession:
+    """Hands out the rows without totals, as the IS NULL query would."""
+
+    def __init__(self, records):
+        self.records = records
+        self.commits = 0
+
+    async def exec(self, statement):
+        pending = [record for record in self.records if record.total_invested is None]
+        return SimpleNamespace(all=lambda: pending[:statement._limit])
+
+    async def commit(self):
+        self.commits += 1
+
+def test_backfill_totals_fills_older_rows_in_batches():
+    payload = _payload(wage=100000)
+    records = [
+        CalculationHistory(user_id=uuid.uuid4(), investment_type="nps", payload=payload.model_dump())
+        for _ in range(3)
+    ]
+    db = BackfillSession(records)
+
+    assert asyncio.run(backfill_totals(db, batch_size=2)) == 3
+    assert db.commits == 2
+
+    expected = process_returns(payload, "nps")._totals
+    assert all(record.total_invested == expected.total_invested == 145.0 for record in records)
+    assert all(record.total_tax_benefit == expected.total_tax_benefit for record in records)
@@ -0,0 +1,59 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app
+from src.services.returnCalcServices import calculate_tax
+from src.services.taxServices import SLAB_BOUNDS, nps_tax_benefit_vector, tax_vector
+
+client = TestClient(app)
+
+def test_tax_vector_matches_calculate_tax():
+    rng = np.random.default_rng(0)
+    incomes = np.concatenate([
+        rng.uniform(-100000, 5000000, 20000),
+        SLAB_BOUNDS,
+        SLAB_BOUNDS + 0.01,
+        SLAB_BOUNDS - 0.01
+    ])
+
+    expected = [calculate_tax(income) for income in incomes.tolist()]
+
+    assert tax_vector(incomes).tolist() == expected
+
+def test_nps_benefit_matches_the_scalar_formula():
+    rng = np.random.default_rng(1)
+    incomes = rng.uniform(0, 4000000, 5000)
+    invested = rng.uniform(0, 300000, 5000)
+
+    _, deduction, benefit = nps_tax_benefit_vector(incomes, invested)
+
+    for income, amount, got_deduction, got_benefit in zip(incomes, invested, deduction, benefit):
+        expected_deduction = min(amount, income * 0.10, 200000.0)
+        assert got_deduction == expected_deduction
+        assert got_benefit == calculate_tax(income) - calculate_tax(income - expected_deduction)
+
+def test_tax_batch_endpoint():
+    response = client.post(
+        "/blackrock/challenge/v1/tax:batch",
+        json={"wages": [50000, 100000, 150000], "investments": [10000, 150000, 500000]}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["annualIncome"] == [600000.0, 1200000.0, 1800000.0]
+    assert body["tax"] == [0.0, 60000.0, 210000.0]
+    assert body["npsDeduction"] == [10000.0, 120000.0, 180000.0]
+    assert body["taxBenefit"] == [0.0, 18000.0, 54000.0]
+
+def test_tax_batch_rejects_misaligned_investments():
+    response = client.post(
+        "/blackrock/challenge/v1/tax:batch",
+        json={"wages": [50000, 100000], "investments": [10000]}
+    )
+
+    assert response.status_code == 422
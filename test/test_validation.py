@@ -0,0 +1,76 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+from src.schema.transactions import TransactionParsed, ValidatorInput
+from src.services.transactionServices import validate_parsed_transactions
+from src.services.validationServices import classify_transactions, validate_compact
+
+client = TestClient(app)
+
+MESSAGE_CODES = {
+    "Negative amounts are not allowed": 1,
+    "Duplicate transaction": 2,
+    "Amount exceeds maximum allowed limit": 3,
+    "Transaction amount exceeds recorded wage": 4
+}
+
+def _random_transactions(rng, count):
+    transactions = []
+    for _ in range(count):
+        amount = rng.choice([-50.0, 0.0, 250.0, 480.0, 1519.0, 60000.0, 499999.0, 500000.0, 750000.0])
+        ceiling = rng.choice([amount - 100.0, amount, amount + 20.0])
+        transactions.append(TransactionParsed(
+            date=f"2023-01-{rng.randint(1, 9):02d} 10:00:00",
+            amount=amount,
+            ceiling=ceiling,
+            remanent=ceiling - amount
+        ))
+    return transactions
+
+def test_vectorized_rules_match_row_by_row_validator():
+    """Tests that every row gets the same verdict as the original validator on random data."""
+    rng = random.Random(37)
+    for _ in range(50):
+        payload = ValidatorInput(wage=50000, transactions=_random_transactions(rng, rng.randint(0, 40)))
+
+        full = validate_parsed_transactions(payload)
+        codes = classify_transactions(payload.transactions, payload.wage)
+
+        expected_invalid = [MESSAGE_CODES[tx.message] for tx in full.invalid]
+        assert [int(code) for code in codes if code] == expected_invalid
+        assert int((codes == 0).sum()) == len(full.valid)
+
+def test_compact_validator_mode_returns_indices_by_error_code():
+    payload = {
+        "wage": 50000,
+        "transactions": [
+            {"date": "2023-01-15 10:30:00", "amount": 2000.0, "ceiling": 2100.0, "remanent": 100.0},
+            {"date": "2023-01-15 10:30:00", "amount": 250.0, "ceiling": 300.0, "remanent": 50.0},
+            {"date": "2023-12-17 08:09:45", "amount": -480.0, "ceiling": -400.0, "remanent": 80.0},
+            {"date": "2023-07-10 09:15:00", "amount": 60000.0, "ceiling": 60000.0, "remanent": 0.0},
+            {"date": "2023-07-11 09:15:00", "amount": 250.0, "ceiling": 300.0, "remanent": 50.0},
+            {"date": "2023-07-12 09:15:00", "amount": 250.0, "ceiling": 300.0, "remanent": 50.0}
+        ]
+    }
+
+    response = client.post(
+        "/blackrock/challenge/v1/transactions:validator?mode=compact&include_valid_ranges=true",
+        json=payload
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 6,
+        "validCount": 3,
+        "invalid": {"1": [2], "2": [1], "4": [3]},
+        "validRanges": [[0, 0], [4, 5]]
+    }
+
+def test_compact_validator_handles_empty_input():
+    result = validate_compact(ValidatorInput(wage=1, transactions=[]), include_valid_ranges=True)
+    assert result.total == 0 and result.invalid == {} and result.validRanges == []